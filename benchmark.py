@@ -0,0 +1,739 @@
+# =========================================================
+# Benchmark Pipeline Prediksi Penumpang
+# Generator data sintetis + pengukuran waktu & memori setiap tahap
+# =========================================================
+#
+# Contoh penggunaan:
+#   python benchmark.py generate --out /tmp/data_sintetis --years 20 --series 3
+#   python benchmark.py run --years 10 --repeat 5 --json hasil.json
+#   python benchmark.py run --years 10 --baseline hasil.json --tolerance 0.25
+#   python benchmark.py batch --series 2000 --years 10
+#   python benchmark.py stream --years 1 5 20 --rute 50
+#   python benchmark.py excel --copies 50
+#   python benchmark.py layanan --klien 16 --permintaan 4000
+#   python benchmark.py skor --baris 2000000
+
+import argparse
+import calendar
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+NAMA_BULAN = [
+    'Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni',
+    'Juli', 'Agustus', 'September', 'Oktober', 'November', 'Desember'
+]
+NAMA_HARI = ['Senin', 'Selasa', 'Rabu', 'Kamis', 'Jumat', 'Sabtu', 'Minggu']
+
+# Opsi fitur musiman yang diukur pada tahap bangun_fitur_musiman
+OPSI_FITUR_BENCHMARK = {
+    'dummy_bulan': True,
+    'fourier_k': 2,
+    'lag_penumpang': (1, 12),
+    'lag_libur': (1,),
+    'rata_bergulir': (3, 12),
+    'kalender_harian': True,
+}
+
+# --- GENERATOR DATA SINTETIS ---
+
+def generate_penumpang_values(rng, year_index, base=20000.0, trend=600.0):
+    """Membuat 12 nilai bulanan (penumpang, total jarak, rata-rata jarak) dengan tren dan musiman."""
+    months = np.arange(12)
+    seasonal = 1 + 0.08 * np.sin(2 * np.pi * (months - 3) / 12)
+    penumpang = (base + trend * (year_index * 12 + months)) * seasonal
+    penumpang *= rng.normal(1.0, 0.03, 12)
+    rata_jarak = rng.normal(62, 4, 12).clip(40, 90)
+    total_jarak = penumpang * rata_jarak / 1000
+    return np.round(penumpang), np.round(total_jarak), np.round(rata_jarak)
+
+def write_penumpang_file(path, year, rng, year_index=0, series_name="Kereta Api Nasional", base=20000.0):
+    """
+    Menulis satu file penumpang tahunan dengan tata letak "wide" yang sama
+    seperti file BPS: tiga baris judul, baris header bulan di baris ke-4, lalu
+    satu baris per metrik dan kolom 'Tahunan'.
+    """
+    penumpang, total_jarak, rata_jarak = generate_penumpang_values(rng, year_index, base=base)
+    n_cols = 14
+    rows = [
+        ['Statistik Penumpang Kereta Api'] + [''] * (n_cols - 1),
+        ['', f'Penumpang Angkutan {series_name} Bulanan'] + [''] * (n_cols - 2),
+        ['', str(year)] + [''] * (n_cols - 2),
+        [''] + NAMA_BULAN + ['Tahunan'],
+        ['Penumpang (000)'] + [f'{v:.0f}' for v in penumpang] + [f'{penumpang.sum():.0f}'],
+        ['Total Jarak Tempuh Penumpang (000.000 km)'] + [f'{v:.0f}' for v in total_jarak] + [f'{total_jarak.sum():.0f}'],
+        ['Rata-rata Jarak Perjalanan Per penumpang (km)'] + [f'{v:.0f}' for v in rata_jarak] + [f'{rata_jarak.mean():.0f}'],
+    ]
+    if path.endswith('.xlsx'):
+        pd.DataFrame(rows).to_excel(path, header=False, index=False)
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            for row in rows:
+                f.write(','.join(row) + '\n')
+
+def write_libur_file(path, year, rng, n_libur=16, n_cuti=8):
+    """Menulis satu file hari libur dengan kolom No, Hari, Tanggal, Bulan, Tahun, Libur Nasional, Cuti Bersama."""
+    days_in_year = 366 if calendar.isleap(year) else 365
+    day_numbers = np.sort(rng.choice(days_in_year, size=n_libur + n_cuti, replace=False))
+    is_cuti = np.zeros(len(day_numbers), dtype=bool)
+    is_cuti[rng.choice(len(day_numbers), size=n_cuti, replace=False)] = True
+    dates = pd.Timestamp(year=year, month=1, day=1) + pd.to_timedelta(day_numbers, unit='D')
+
+    df = pd.DataFrame({
+        'No': np.arange(1, len(dates) + 1),
+        'Hari': [NAMA_HARI[d.weekday()] for d in dates],
+        'Tanggal': dates.day,
+        'Bulan': [NAMA_BULAN[d.month - 1] for d in dates],
+        'Tahun': year,
+        'Libur Nasional': np.where(is_cuti, None, [f'Hari Libur Sintetis {i}' for i in range(len(dates))]),
+        'Cuti Bersama': np.where(is_cuti, [f'Cuti Bersama Sintetis {i}' for i in range(len(dates))], None),
+    })
+    if path.endswith('.xlsx'):
+        df.to_excel(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+def generate_dataset(out_dir, start_year=2000, years=10, series=1, libur_format='xlsx', seed=42):
+    """
+    Membuat data sintetis untuk `years` tahun dan `series` seri penumpang.
+    Mengembalikan dict berisi daftar path file penumpang per seri dan file libur.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    rng = np.random.default_rng(seed)
+    penumpang_paths = {}
+    for s in range(series):
+        series_name = 'Kereta Api Nasional' if s == 0 else f'Seri Sintetis {s}'
+        base = 20000.0 * (1 + 0.5 * s)
+        paths = []
+        for i, year in enumerate(range(start_year, start_year + years)):
+            path = os.path.join(out_dir, f'Penumpang {series_name} Bulanan , {year}.csv')
+            write_penumpang_file(path, year, rng, year_index=i, series_name=series_name, base=base)
+            paths.append(path)
+        penumpang_paths[series_name] = paths
+
+    libur_paths = []
+    for year in range(start_year, start_year + years):
+        path = os.path.join(out_dir, f'libur_cuti_{year}.{libur_format}')
+        write_libur_file(path, year, rng)
+        libur_paths.append(path)
+    return {'penumpang': penumpang_paths, 'libur': libur_paths}
+
+def write_penumpang_harian_file(path, start_year=2000, years=1, n_rute=50, seed=42):
+    """
+    Menulis ekspor penumpang harian format long (Tanggal, Rute, Penumpang,
+    Jarak Tempuh (km)) dengan `n_rute` baris per hari, per tahun agar penulisan
+    tetap hemat memori. Nilai harian dibagi dari total bulanan sintetis sehingga
+    agregasinya dapat dicek. Mengembalikan (jumlah_baris, DataFrame bulanan acuan).
+    """
+    rng = np.random.default_rng(seed)
+    acuan = []
+    n_rows = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('Tanggal,Rute,Penumpang,Jarak Tempuh (km)\n')
+        for i, year in enumerate(range(start_year, start_year + years)):
+            penumpang, total_jarak, _ = generate_penumpang_values(rng, i)
+            tanggal = pd.date_range(f'{year}-01-01', f'{year}-12-31', freq='D')
+            bulan = tanggal.month.to_numpy() - 1
+            bobot = rng.uniform(0.5, 1.5, (len(tanggal), n_rute))
+            bobot /= np.bincount(bulan, weights=bobot.sum(axis=1))[bulan][:, None]
+            df = pd.DataFrame({
+                'Tanggal': np.repeat(tanggal.strftime('%Y-%m-%d'), n_rute),
+                'Rute': np.tile([f'R{r:03d}' for r in range(n_rute)], len(tanggal)),
+                'Penumpang': (bobot * (penumpang[bulan] * 1e3)[:, None]).ravel(),
+                'Jarak Tempuh (km)': (bobot * (total_jarak[bulan] * 1e6)[:, None]).ravel(),
+            })
+            # Jumlah penumpang dan km bulat: '.' adalah pemisah ribuan menurut SKEMA_PENUMPANG
+            df.to_csv(f, header=False, index=False, float_format='%.0f')
+            n_rows += len(df)
+            acuan.append(pd.DataFrame({'Tahun': year, 'Bulan_Angka': np.arange(1, 13),
+                                       'Penumpang (000)': penumpang, 'Total Jarak Tempuh Penumpang': total_jarak}))
+    return n_rows, pd.concat(acuan, ignore_index=True)
+
+def generate_multi_series_frames(n_series=100, years=10, test_years=1, seed=42):
+    """
+    Membuat data training dan testing format long (kolom 'Seri') untuk banyak
+    seri sekaligus, langsung di memori tanpa menulis file.
+    """
+    rng = np.random.default_rng(seed)
+    frames = []
+    for s in range(n_series):
+        base = 20000.0 * rng.uniform(0.2, 3.0)
+        for i in range(years + test_years):
+            penumpang, total_jarak, rata_jarak = generate_penumpang_values(rng, i, base=base)
+            frames.append(pd.DataFrame({
+                'Seri': f'Seri Sintetis {s}',
+                'Bulan': NAMA_BULAN,
+                'Tahun': 2000 + i,
+                'Penumpang (000)': penumpang,
+                'Total Jarak Tempuh Penumpang': total_jarak,
+                'Rata-rata Jarak Perjalanan Per penumpang': rata_jarak,
+                'jumlah_libur_nasional': rng.poisson(1.3, 12),
+                'jumlah_cuti_bersama': rng.poisson(0.6, 12),
+                'Bulan ke-n': np.arange(i * 12 + 1, i * 12 + 13),
+            }))
+    df = pd.concat(frames, ignore_index=True)
+    is_test = df['Tahun'] >= 2000 + years
+    return df[~is_test].reset_index(drop=True), df[is_test].reset_index(drop=True)
+
+# --- BENCHMARK ---
+
+def _load_app():
+    """Mengimpor modul aplikasi tanpa menjalankan server Streamlit."""
+    import streamlit.logger
+    streamlit.logger.set_log_level("error")
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import streamlit_app
+    # Konfigurasi Streamlit mengatur ulang level log saat diimpor
+    streamlit.logger.set_log_level("error")
+    return streamlit_app
+
+def _open_files(paths):
+    return [open(path, 'rb') for path in paths]
+
+def _close_files(files):
+    for f in files:
+        f.close()
+
+def measure_stage(func, setup=None, teardown=None, repeat=5):
+    """
+    Mengukur satu tahap: waktu (median & minimum dari `repeat` kali) tanpa
+    tracemalloc, lalu satu kali lagi di bawah tracemalloc untuk memori puncak.
+    `setup()` dijalankan sebelum setiap pemanggilan dan hasilnya diteruskan ke
+    `func` lalu ke `teardown` (di luar waktu yang diukur).
+    """
+    durations = []
+    for _ in range(repeat):
+        arg = setup() if setup else None
+        start = time.perf_counter()
+        func(arg)
+        durations.append(time.perf_counter() - start)
+        if teardown:
+            teardown(arg)
+
+    arg = setup() if setup else None
+    tracemalloc.start()
+    func(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    if teardown:
+        teardown(arg)
+    return {
+        'median_s': statistics.median(durations),
+        'min_s': min(durations),
+        'peak_mem_mb': peak / 1e6,
+    }
+
+def run_benchmark(years=10, repeat=5, seed=42, data_dir=None):
+    """
+    Menjalankan seluruh tahap pipeline pada data sintetis (tahun terakhir
+    sebagai data testing) dan mengembalikan list hasil per tahap.
+    """
+    app = _load_app()
+    st = app.st
+    own_dir = data_dir is None
+    data_dir = data_dir or tempfile.mkdtemp(prefix='bench_krl_')
+    paths = generate_dataset(data_dir, years=years, seed=seed)
+    penumpang_paths = next(iter(paths['penumpang'].values()))
+    train_p, test_p = penumpang_paths[:-1], penumpang_paths[-1:]
+    train_l, test_l = paths['libur'][:-1], paths['libur'][-1:]
+
+    def read_all(reader, paths_):
+        files = _open_files(paths_)
+        df, _ = reader(files)
+        _close_files(files)
+        return df
+
+    df_p_train = read_all(app._read_penumpang_file, train_p)
+    df_l_train = read_all(app._read_libur_file, train_l)
+    df_p_test = read_all(app._read_penumpang_file, test_p)
+    df_l_test = read_all(app._read_libur_file, test_l)
+    df_training, df_testing, _ = app._process_and_combine_data(df_p_train, df_l_train, df_p_test, df_l_test)
+    results, _ = app.latih_dan_evaluasi_regresi(df_training, df_testing)
+    model_ols = app._fit_ols_cached(df_training[app.FITUR_REGRESI], df_training[app.TARGET_REGRESI])
+    st.session_state.df_training = df_training
+    st.session_state.df_testing = df_testing
+
+    def with_files(paths_):
+        def setup():
+            return _open_files(paths_)
+        return setup
+
+    semua_file = train_p + train_l + test_p + test_l
+    batas = np.cumsum([len(train_p), len(train_l), len(test_p)])
+
+    def deteksi_duplikat(files):
+        kelompok = np.split(np.array(files, dtype=object), batas)
+        kunci = [('training', 'penumpang'), ('training', 'libur'), ('testing', 'penumpang'), ('testing', 'libur')]
+        return app.deteksi_duplikat_unggahan({k: list(v) for k, v in zip(kunci, kelompok)})
+
+    stages = [
+        ('deteksi_duplikat_unggahan', deteksi_duplikat,
+         with_files(semua_file), len(df_p_train) + len(df_l_train) + len(df_p_test) + len(df_l_test)),
+        ('_read_penumpang_file', lambda files: app._read_penumpang_file(files, laporan=[]),
+         with_files(train_p), len(df_p_train)),
+        ('_read_libur_file', lambda files: app._read_libur_file(files, laporan=[]),
+         with_files(train_l), len(df_l_train)),
+        ('_process_and_combine_data',
+         lambda _: app._process_and_combine_data(df_p_train, df_l_train, df_p_test, df_l_test),
+         None, len(df_training) + len(df_testing)),
+        ('bangun_fitur_musiman', lambda _: app.bangun_fitur_musiman(df_training, df_testing, OPSI_FITUR_BENCHMARK),
+         None, len(df_training) + len(df_testing)),
+        ('latih_dan_evaluasi_regresi', lambda _: app.latih_dan_evaluasi_regresi(df_training, df_testing),
+         None, len(df_training) + len(df_testing)),
+        ('latih_dan_evaluasi_robust', lambda _: app.latih_dan_evaluasi_robust(df_training, df_testing),
+         None, len(df_training) + len(df_testing)),
+        ('hitung_uji_asumsi', lambda _: app.hitung_uji_asumsi(model_ols),
+         None, len(df_training)),
+        ('predict_5_years', lambda _: app.predict_5_years(results['model'], df_training),
+         None, 60),
+    ]
+
+    report = []
+    for name, func, setup, rows in stages:
+        stats = measure_stage(func, setup, _close_files if setup else None, repeat=repeat)
+        stats.update({
+            'stage': name,
+            'rows': rows,
+            'rows_per_s': rows / stats['median_s'] if stats['median_s'] else float('inf'),
+        })
+        report.append(stats)
+
+    if own_dir:
+        for path in [p for ps in paths['penumpang'].values() for p in ps] + paths['libur']:
+            os.remove(path)
+        os.rmdir(data_dir)
+    return report
+
+def run_batch_benchmark(n_series=1000, years=10, repeat=3, seed=42, loop_series=200):
+    """
+    Membandingkan regresi multi-seri bertumpuk dengan loop LinearRegression per
+    seri. Loop hanya diukur pada `loop_series` seri pertama lalu diekstrapolasi
+    secara linier agar benchmark tetap singkat untuk ribuan seri.
+    """
+    from sklearn.linear_model import LinearRegression
+
+    app = _load_app()
+    df_training, df_testing = generate_multi_series_frames(n_series, years, seed=seed)
+    rows = len(df_training) + len(df_testing)
+
+    batch = measure_stage(lambda _: app.latih_dan_evaluasi_regresi_batch(df_training, df_testing),
+                          repeat=repeat)
+    hasil, _ = app.latih_dan_evaluasi_regresi_batch(df_training, df_testing)
+
+    n_loop = min(loop_series, n_series)
+    subset = df_training[df_training['Seri'].isin(hasil['metrik']['Seri'].iloc[:n_loop])]
+
+    def loop_fit(_):
+        return [LinearRegression().fit(g[app.FITUR_REGRESI], g[app.TARGET_REGRESI])
+                for _, g in subset.groupby('Seri', sort=False)]
+
+    loop = measure_stage(loop_fit, repeat=repeat)
+    models = loop_fit(None)
+    coef_batch = hasil['metrik'][[f'coef_{f}' for f in app.FITUR_REGRESI]].to_numpy()[:n_loop]
+    coef_loop = np.array([m.coef_ for m in models])
+    max_rel_diff = float(np.max(np.abs(coef_batch - coef_loop) / (np.abs(coef_loop) + 1e-12)))
+
+    scale = n_series / n_loop
+    report = []
+    for name, stats in [('regresi_batch', batch), ('loop_sklearn_ekstrapolasi', loop)]:
+        if name.startswith('loop'):
+            stats = {k: v * scale if k != 'peak_mem_mb' else v for k, v in stats.items()}
+        stats.update({
+            'stage': name,
+            'rows': rows,
+            'rows_per_s': rows / stats['median_s'] if stats['median_s'] else float('inf'),
+        })
+        report.append(stats)
+    return report, max_rel_diff
+
+def run_stream_benchmark(years_list=(1, 5, 20), n_rute=50, chunk=None, repeat=1, seed=42):
+    """
+    Membandingkan ingesti streaming (baca_penumpang_streaming) dengan membaca
+    seluruh CSV harian sekaligus lalu groupby, pada beberapa ukuran file.
+    Memori puncak streaming seharusnya tetap walau ukuran file bertambah.
+    """
+    app = _load_app()
+    chunk = chunk or app.UKURAN_CHUNK_STREAMING
+    report = []
+    data_dir = tempfile.mkdtemp(prefix='bench_stream_')
+    for years in years_list:
+        path = os.path.join(data_dir, f'penumpang_harian_{years}.csv')
+        n_rows, acuan = write_penumpang_harian_file(path, years=years, n_rute=n_rute, seed=seed)
+
+        def streaming(files):
+            return app.baca_penumpang_streaming(files, chunk)
+
+        def sekaligus(_):
+            df = pd.read_csv(path)
+            tanggal = pd.to_datetime(df['Tanggal'])
+            return df.groupby([tanggal.dt.year, tanggal.dt.month])[['Penumpang', 'Jarak Tempuh (km)']].sum()
+
+        setup = lambda: _open_files([path])
+        files = setup()
+        hasil = app.baca_penumpang_streaming(files, chunk)
+        _close_files(files)
+        selisih = float(np.max(np.abs(hasil['Penumpang (000)'].to_numpy() - acuan['Penumpang (000)'].to_numpy())
+                               / acuan['Penumpang (000)'].to_numpy()))
+        for name, func, setup_ in [(f'streaming_{years}th', streaming, setup), (f'sekaligus_{years}th', sekaligus, None)]:
+            stats = measure_stage(func, setup_, _close_files if setup_ else None, repeat=repeat)
+            stats.update({'stage': name, 'rows': n_rows,
+                          'rows_per_s': n_rows / stats['median_s'] if stats['median_s'] else float('inf'),
+                          'selisih_relatif': selisih})
+            report.append(stats)
+        os.remove(path)
+    os.rmdir(data_dir)
+    return report
+
+def run_excel_benchmark(copies=20, repeat=3, excel_dir=None):
+    """
+    Membandingkan pd.read_excel (openpyxl mode penuh) dengan pembaca Excel cepat
+    aplikasi pada file libur di `data mentah/excel`, diulang `copies` kali untuk
+    mensimulasikan unggahan banyak workbook sekaligus.
+    """
+    import glob
+
+    app = _load_app()
+    excel_dir = excel_dir or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data mentah', 'excel')
+    paths = sorted(glob.glob(os.path.join(excel_dir, '*.xlsx'))) * copies
+    if not paths:
+        raise FileNotFoundError(f"Tidak ada file .xlsx di {excel_dir}")
+    setup = lambda: _open_files(paths)
+    rows = sum(len(pd.read_excel(p)) for p in paths[:len(paths) // copies]) * copies
+
+    stages = [
+        ('pd.read_excel', lambda files: [pd.read_excel(f) for f in files]),
+        ('_baca_excel_cepat', lambda files: [app._baca_excel_cepat(f, kata_kunci=app.KOLOM_LIBUR) for f in files]),
+        ('_read_libur_file', lambda files: app._read_libur_file(files, laporan=[])),
+    ]
+    report = []
+    for name, func in stages:
+        stats = measure_stage(func, setup, _close_files, repeat=repeat)
+        stats.update({'stage': name, 'rows': rows,
+                      'rows_per_s': rows / stats['median_s'] if stats['median_s'] else float('inf')})
+        report.append(stats)
+    return report, app.EXCEL_ENGINE_CEPAT or 'lxml streaming'
+
+def _artefak_sintetis(years=10, seed=42):
+    """Artefak koefisien dari model OLS yang dilatih aplikasi pada data sintetis (tahun terakhir = testing)."""
+    app = _load_app()
+    data_dir = tempfile.mkdtemp(prefix='bench_krl_')
+    paths = generate_dataset(data_dir, years=years, seed=seed)
+    penumpang_paths = next(iter(paths['penumpang'].values()))
+    frames = []
+    for reader, paths_ in ((app._read_penumpang_file, penumpang_paths[:-1]), (app._read_libur_file, paths['libur'][:-1]),
+                           (app._read_penumpang_file, penumpang_paths[-1:]), (app._read_libur_file, paths['libur'][-1:])):
+        files = _open_files(paths_)
+        frames.append(reader(files)[0])
+        _close_files(files)
+    df_training, df_testing, _ = app._process_and_combine_data(*frames)
+    results, _ = app.latih_dan_evaluasi_regresi(df_training, df_testing)
+    artefak, error = app.ekspor_model(results, df_training)
+    for path in penumpang_paths + paths['libur']:
+        os.remove(path)
+    os.rmdir(data_dir)
+    if error:
+        raise RuntimeError(error)
+    return artefak, df_testing[artefak['features']].to_numpy(dtype=np.float64)
+
+def run_service_benchmark(n_klien=16, n_permintaan=4000, baris_per_permintaan=1, seed=42):
+    """
+    Uji beban layanan prediksi lokal: `n_klien` thread klien dengan koneksi
+    keep-alive mengirim total `n_permintaan` POST /prediksi, sekali tanpa
+    batching (maks. 1 baris per batch) dan sekali dengan micro-batching.
+    Melaporkan latensi p50/p99, permintaan per detik, dan rata-rata permintaan per batch.
+    """
+    import http.client
+    import threading
+    import model_scorer
+    import prediction_service
+
+    artefak, X = _artefak_sintetis(seed=seed)
+    model = model_scorer.dari_dict(artefak)
+    rng = np.random.default_rng(seed)
+    payloads = [json.dumps({'data': X[rng.integers(0, len(X), baris_per_permintaan)].tolist(), 'tingkat': 0.95}).encode()
+                for _ in range(64)]
+
+    report = []
+    for mode, tunggu_ms, maks_baris in (('tanpa batching', 0.0, 1),
+                                        ('micro-batching', prediction_service.TUNGGU_BATCH_MS,
+                                         prediction_service.MAKS_BARIS_BATCH)):
+        server = prediction_service.buat_server(model, port=0, tunggu_ms=tunggu_ms, maks_baris=maks_baris)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        port = server.server_address[1]
+        latensi = [[] for _ in range(n_klien)]
+
+        def klien(i):
+            conn = http.client.HTTPConnection('127.0.0.1', port)
+            for j in range(i, n_permintaan, n_klien):
+                start = time.perf_counter()
+                conn.request('POST', '/prediksi', body=payloads[j % len(payloads)],
+                             headers={'Content-Type': 'application/json'})
+                respons = conn.getresponse()
+                respons.read()
+                latensi[i].append(time.perf_counter() - start)
+                if respons.status != 200:
+                    raise RuntimeError(f"status {respons.status}")
+            conn.close()
+
+        threads = [threading.Thread(target=klien, args=(i,)) for i in range(n_klien)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        durasi = time.perf_counter() - start
+        server.shutdown()
+        server.server_close()
+        server.pengumpul.tutup()
+
+        semua = np.concatenate([np.asarray(l) for l in latensi]) * 1e3
+        report.append({
+            'mode': mode, 'permintaan': len(semua),
+            'p50_ms': float(np.percentile(semua, 50)), 'p99_ms': float(np.percentile(semua, 99)),
+            'permintaan_per_s': len(semua) / durasi,
+            'rata_per_batch': float(np.mean(server.pengumpul.ukuran_batch)),
+        })
+    return report
+
+def _waktu_impor(modul, repeat=3):
+    """Median waktu impor `modul` (detik) di proses Python baru, termasuk dependensinya."""
+    import subprocess
+    kode = f"import time; t = time.perf_counter(); import {modul}; print(time.perf_counter() - t)"
+    durasi = [float(subprocess.run([sys.executable, '-c', kode], capture_output=True, text=True, check=True,
+                                   cwd=os.path.dirname(os.path.abspath(__file__))).stdout)
+              for _ in range(repeat)]
+    return statistics.median(durasi)
+
+def run_scorer_benchmark(n_baris=2_000_000, repeat=3, seed=42):
+    """
+    Membandingkan penilaian batch skenario lewat LinearRegression (sklearn) dengan
+    skorer murni NumPy dari artefak koefisien: waktu impor di proses baru, ukuran
+    artefak, dan waktu skor `n_baris` baris acak.
+    """
+    import model_scorer
+    from sklearn.linear_model import LinearRegression
+
+    artefak, X_test = _artefak_sintetis(seed=seed)
+    skorer = model_scorer.dari_dict(artefak)
+    sklearn_model = LinearRegression()
+    sklearn_model.coef_, sklearn_model.intercept_ = skorer.coef, skorer.intercept
+    sklearn_model.n_features_in_ = len(skorer.features)
+
+    rng = np.random.default_rng(seed)
+    X = X_test[rng.integers(0, len(X_test), n_baris)] * rng.uniform(0.9, 1.1, (n_baris, X_test.shape[1]))
+    df = pd.DataFrame(X, columns=skorer.features)
+    kolom = {f: df[f].to_numpy() for f in skorer.features}
+    selisih = float(np.max(np.abs(skorer.skor(X) - sklearn_model.predict(X))))
+
+    stages = [
+        ('sklearn predict', lambda _: sklearn_model.predict(X)),
+        ('model_scorer.skor', lambda _: skorer.skor(X)),
+        ('model_scorer.skor (DataFrame)', lambda _: skorer.skor(df)),
+        ('model_scorer.skor (dict kolom)', lambda _: skorer.skor(kolom)),
+        ('model_scorer.selang', lambda _: skorer.selang(X, 0.95)),
+    ]
+    report = []
+    for name, func in stages:
+        stats = measure_stage(func, repeat=repeat)
+        stats.update({'stage': name, 'rows': n_baris,
+                      'rows_per_s': n_baris / stats['median_s'] if stats['median_s'] else float('inf')})
+        report.append(stats)
+    info = {
+        'impor_numpy_s': _waktu_impor('numpy'),
+        'impor_skorer_s': _waktu_impor('model_scorer'),
+        'impor_sklearn_s': _waktu_impor('sklearn.linear_model'),
+        'ukuran_artefak_b': len(json.dumps(artefak, separators=(',', ':'))),
+        'selisih_maks': selisih,
+    }
+    return report, info
+
+def run_monitor_benchmark(n_bulan=100_000, loop_bulan=2000, repeat=3, seed=42):
+    """
+    Membandingkan pembaruan monitoring drift inkremental (model_monitor.perbarui,
+    O(1) per bulan) dengan menghitung ulang CUSUM/EWMA/bias dari seluruh riwayat
+    residual setiap kali satu bulan baru tiba (`loop_bulan` bulan karena O(n²)).
+    """
+    import model_monitor
+
+    rng = np.random.default_rng(seed)
+    prediksi = rng.uniform(30_000, 45_000, n_bulan)
+    aktual = prediksi + rng.normal(0, 300, n_bulan)
+    p = model_monitor.PARAMETER_DEFAULT
+
+    def inkremental(n):
+        state = model_monitor.inisialisasi(300.0, 5.0)
+        for i, (y, yhat) in enumerate(zip(aktual[:n].tolist(), prediksi[:n].tolist())):
+            model_monitor.perbarui(state, i, y, yhat)
+        return state
+
+    def hitung_ulang(n):
+        for akhir in range(1, n + 1):
+            residual = aktual[:akhir] - prediksi[:akhir]
+            atas = bawah = 0.0
+            for z in residual / 300.0:
+                atas, bawah = max(0.0, atas + z - p['k_cusum']), max(0.0, bawah - z - p['k_cusum'])
+            ape = np.abs(residual) / aktual[:akhir] * 100
+            bobot = p['lambda_ewma'] * (1 - p['lambda_ewma']) ** np.arange(akhir - 1, -1, -1)
+            bobot[0] = (1 - p['lambda_ewma']) ** (akhir - 1)
+            float(ape @ bobot), float(residual[-p['jendela_bias']:].mean())
+
+    stages = [
+        ('hitung ulang penuh per bulan', lambda _: hitung_ulang(loop_bulan), loop_bulan),
+        ('perbarui inkremental', lambda _: inkremental(loop_bulan), loop_bulan),
+        ('perbarui inkremental (semua)', lambda _: inkremental(n_bulan), n_bulan),
+    ]
+    report = []
+    for name, func, n in stages:
+        stats = measure_stage(func, repeat=repeat)
+        stats.update({'stage': name, 'rows': n, 'rows_per_s': n / stats['median_s'] if stats['median_s'] else float('inf')})
+        report.append(stats)
+    ukuran_state = len(json.dumps(inkremental(n_bulan), separators=(',', ':')))
+    return report, ukuran_state
+
+def compare_with_baseline(report, baseline, tolerance):
+    """Mengembalikan daftar tahap yang median waktunya lebih lambat dari baseline melebihi toleransi."""
+    baseline_by_stage = {row['stage']: row for row in baseline}
+    regressions = []
+    for row in report:
+        base = baseline_by_stage.get(row['stage'])
+        if base and row['median_s'] > base['median_s'] * (1 + tolerance):
+            regressions.append((row['stage'], base['median_s'], row['median_s']))
+    return regressions
+
+def _print_report(report):
+    print(f"{'Tahap':<30}{'Baris':>8}{'Median (ms)':>14}{'Min (ms)':>12}{'Baris/detik':>14}{'Memori (MB)':>14}")
+    for row in report:
+        print(f"{row['stage']:<30}{row['rows']:>8}{row['median_s'] * 1e3:>14.2f}{row['min_s'] * 1e3:>12.2f}"
+              f"{row['rows_per_s']:>14.0f}{row['peak_mem_mb']:>14.2f}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generator data sintetis dan benchmark pipeline prediksi penumpang.")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    gen = sub.add_parser('generate', help="Membuat file penumpang dan libur sintetis.")
+    gen.add_argument('--out', required=True, help="Folder tujuan.")
+    gen.add_argument('--start-year', type=int, default=2000)
+    gen.add_argument('--years', type=int, default=10)
+    gen.add_argument('--series', type=int, default=1)
+    gen.add_argument('--libur-format', choices=['xlsx', 'csv'], default='xlsx')
+    gen.add_argument('--seed', type=int, default=42)
+
+    run = sub.add_parser('run', help="Mengukur waktu dan memori setiap tahap pipeline.")
+    run.add_argument('--years', type=int, default=10)
+    run.add_argument('--repeat', type=int, default=5)
+    run.add_argument('--seed', type=int, default=42)
+    run.add_argument('--data-dir', help="Simpan data sintetis di folder ini (default: folder sementara).")
+    run.add_argument('--json', help="Simpan hasil ke file JSON.")
+    run.add_argument('--baseline', help="File JSON hasil sebelumnya untuk deteksi regresi performa.")
+    run.add_argument('--tolerance', type=float, default=0.25, help="Toleransi perlambatan relatif (default 0.25).")
+
+    batch = sub.add_parser('batch', help="Membandingkan regresi multi-seri bertumpuk dengan loop sklearn.")
+    batch.add_argument('--series', type=int, default=1000)
+    batch.add_argument('--years', type=int, default=10)
+    batch.add_argument('--repeat', type=int, default=3)
+    batch.add_argument('--seed', type=int, default=42)
+    batch.add_argument('--loop-series', type=int, default=200,
+                       help="Jumlah seri yang benar-benar di-fit dengan loop sklearn (sisanya diekstrapolasi).")
+
+    stream = sub.add_parser('stream', help="Mengukur ingesti streaming file penumpang harian format long.")
+    stream.add_argument('--years', type=int, nargs='+', default=[1, 5, 20],
+                        help="Panjang data (tahun) untuk setiap file yang diukur.")
+    stream.add_argument('--rute', type=int, default=50, help="Jumlah baris (rute) per hari.")
+    stream.add_argument('--chunk', type=int, help="Ukuran chunk (default: UKURAN_CHUNK_STREAMING).")
+    stream.add_argument('--repeat', type=int, default=1)
+    stream.add_argument('--seed', type=int, default=42)
+
+    excel = sub.add_parser('excel', help="Membandingkan pembacaan workbook libur (pd.read_excel vs pembaca cepat).")
+    excel.add_argument('--copies', type=int, default=20, help="Berapa kali file di 'data mentah/excel' diulang.")
+    excel.add_argument('--repeat', type=int, default=3)
+    excel.add_argument('--excel-dir', help="Folder workbook libur (default: data mentah/excel).")
+
+    layanan = sub.add_parser('layanan', help="Uji beban layanan prediksi lokal (latensi p50/p99 dan permintaan/detik).")
+    layanan.add_argument('--klien', type=int, default=16, help="Jumlah klien konkuren.")
+    layanan.add_argument('--permintaan', type=int, default=4000, help="Total permintaan per mode.")
+    layanan.add_argument('--baris', type=int, default=1, help="Jumlah baris input per permintaan.")
+    layanan.add_argument('--seed', type=int, default=42)
+
+    skor = sub.add_parser('skor', help="Membandingkan skorer artefak murni NumPy dengan LinearRegression sklearn.")
+    skor.add_argument('--baris', type=int, default=2_000_000, help="Jumlah baris skenario yang dinilai.")
+    skor.add_argument('--repeat', type=int, default=3)
+    skor.add_argument('--seed', type=int, default=42)
+
+    monitor = sub.add_parser('monitor', help="Membandingkan pembaruan monitoring drift inkremental dengan hitung ulang penuh.")
+    monitor.add_argument('--bulan', type=int, default=100_000, help="Jumlah bulan untuk pembaruan inkremental.")
+    monitor.add_argument('--loop-bulan', type=int, default=2000, help="Jumlah bulan untuk perbandingan hitung ulang penuh.")
+    monitor.add_argument('--repeat', type=int, default=3)
+    monitor.add_argument('--seed', type=int, default=42)
+
+    args = parser.parse_args(argv)
+    if args.command == 'generate':
+        paths = generate_dataset(args.out, args.start_year, args.years, args.series, args.libur_format, args.seed)
+        n_files = sum(len(p) for p in paths['penumpang'].values()) + len(paths['libur'])
+        print(f"{n_files} file sintetis ditulis ke {args.out}")
+        return 0
+
+    if args.command == 'batch':
+        report, max_rel_diff = run_batch_benchmark(args.series, args.years, args.repeat, args.seed, args.loop_series)
+        _print_report(report)
+        speedup = report[1]['median_s'] / report[0]['median_s']
+        print(f"Percepatan: {speedup:.1f}x; selisih relatif koefisien maksimum: {max_rel_diff:.2e}")
+        return 0
+
+    if args.command == 'excel':
+        report, engine = run_excel_benchmark(args.copies, args.repeat, args.excel_dir)
+        _print_report(report)
+        print(f"Engine pembaca cepat: {engine}; percepatan baca: {report[0]['median_s'] / report[1]['median_s']:.1f}x")
+        return 0
+
+    if args.command == 'layanan':
+        report = run_service_benchmark(args.klien, args.permintaan, args.baris, args.seed)
+        print(f"{'Mode':<20}{'Permintaan':>12}{'p50 (ms)':>12}{'p99 (ms)':>12}{'Permintaan/detik':>18}{'Per batch':>12}")
+        for row in report:
+            print(f"{row['mode']:<20}{row['permintaan']:>12}{row['p50_ms']:>12.2f}{row['p99_ms']:>12.2f}"
+                  f"{row['permintaan_per_s']:>18.0f}{row['rata_per_batch']:>12.1f}")
+        return 0
+
+    if args.command == 'skor':
+        report, info = run_scorer_benchmark(args.baris, args.repeat, args.seed)
+        _print_report(report)
+        print(f"Impor (proses baru): numpy {info['impor_numpy_s'] * 1e3:.0f} ms, model_scorer (termasuk numpy) "
+              f"{info['impor_skorer_s'] * 1e3:.0f} ms, sklearn.linear_model {info['impor_sklearn_s'] * 1e3:.0f} ms")
+        print(f"Artefak JSON {info['ukuran_artefak_b']} B; selisih prediksi maksimum vs sklearn {info['selisih_maks']:.2e}")
+        return 0
+
+    if args.command == 'monitor':
+        report, ukuran_state = run_monitor_benchmark(args.bulan, args.loop_bulan, args.repeat, args.seed)
+        _print_report(report)
+        print(f"Percepatan pada {args.loop_bulan} bulan: {report[0]['median_s'] / report[1]['median_s']:.0f}x; "
+              f"{report[2]['median_s'] / args.bulan * 1e6:.1f} µs per bulan; state JSON {ukuran_state} B")
+        return 0
+
+    if args.command == 'stream':
+        report = run_stream_benchmark(args.years, args.rute, args.chunk, args.repeat, args.seed)
+        _print_report(report)
+        print(f"Selisih relatif penumpang bulanan maksimum: {max(r['selisih_relatif'] for r in report):.2e}")
+        return 0
+
+    report = run_benchmark(args.years, args.repeat, args.seed, args.data_dir)
+    _print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_with_baseline(report, json.load(f), args.tolerance)
+        for stage, before, after in regressions:
+            print(f"REGRESI: {stage} {before * 1e3:.2f} ms -> {after * 1e3:.2f} ms")
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+# =========================================================
+# Monitoring Drift & Residual Model
+# CUSUM, EWMA MAPE, dan bias bergulir yang diperbarui inkremental per bulan
+# =========================================================
+#
+# Modul ini hanya memakai pustaka standar (dan model_scorer untuk CLI) agar
+# dapat dijalankan terjadwal di samping layanan prediksi. State monitoring
+# adalah dict kecil siap JSON; setiap observasi baru diproses O(1):
+#   - CUSUM dua sisi (Page) atas residual terstandarisasi z = (aktual - prediksi) / sigma
+#   - EWMA dari APE, dibandingkan dengan MAPE testing saat model dilatih
+#   - rata-rata residual pada jendela bergulir (ring buffer + jumlah berjalan)
+# Alarm yang pernah terpicu dicatat di 'alarm_belum_ditangani' dan tetap ada
+# walaupun bulan-bulan berikutnya normal, sampai ditandai ditangani (atau model
+# dilatih ulang dan state baru dibuat).
+#
+# Contoh CLI (state dibuat bila belum ada, lalu ditulis kembali):
+#   python model_monitor.py state_monitor.json --artefak model_regresi.json --data bulan_baru.csv
+#   python model_monitor.py state_monitor.json --tandai-ditangani
+
+import argparse
+import csv
+import json
+import math
+import os
+
+VERSI_STATE = 1
+PARAMETER_DEFAULT = {
+    'k_cusum': 0.5,          # slack CUSUM (dalam satuan sigma)
+    'h_cusum': 5.0,          # ambang alarm CUSUM
+    'lambda_ewma': 0.3,      # bobot observasi terbaru pada EWMA APE
+    'faktor_mape': 1.5,      # alarm bila EWMA MAPE > faktor x MAPE testing
+    'jendela_bias': 12,      # panjang jendela bias bergulir (bulan)
+    'z_bias': 2.0,           # alarm bila |bias| > z * sigma / sqrt(n jendela)
+    'min_bias': 3,           # observasi minimal sebelum bias dievaluasi
+}
+BULAN = ['Januari', 'Februari', 'Maret', 'April', 'Mei', 'Juni', 'Juli',
+         'Agustus', 'September', 'Oktober', 'November', 'Desember']
+
+def inisialisasi(sigma, mape_dasar, periode_awal=None, parameter=None):
+    """
+    State monitoring baru. `sigma` = simpangan baku residual training,
+    `mape_dasar` = MAPE testing (%), `periode_awal` = indeks bulan terakhir
+    yang sudah diketahui model (Tahun*12 + bulan - 1); bulan sebelum atau sama
+    dengan periode ini diabaikan saat pembaruan.
+    """
+    parameter = dict(PARAMETER_DEFAULT, **(parameter or {}))
+    return {
+        'versi': VERSI_STATE,
+        'parameter': parameter,
+        'sigma': float(sigma),
+        'mape_dasar': float(mape_dasar),
+        'periode_terakhir': periode_awal,
+        'n': 0,
+        'cusum_atas': 0.0,
+        'cusum_bawah': 0.0,
+        'ewma_mape': None,
+        'bias_buffer': [0.0] * parameter['jendela_bias'],
+        'bias_jumlah': 0.0,
+        'alarm_aktif': [],
+        'alarm_belum_ditangani': {},
+    }
+
+def indeks_periode(tahun, bulan):
+    """Indeks bulan integer; `bulan` boleh angka 1-12 atau nama bulan Indonesia."""
+    if isinstance(bulan, str) and not bulan.strip().isdigit():
+        bulan = BULAN.index(bulan.strip().capitalize()) + 1
+    return int(tahun) * 12 + int(bulan) - 1
+
+def label_periode(indeks):
+    return f"{BULAN[indeks % 12]} {indeks // 12}"
+
+def perbarui(state, periode, aktual, prediksi):
+    """
+    Memproses satu bulan baru dalam O(1) dan mengembalikan list alarm (dict)
+    yang terpicu. Bulan yang tidak lebih baru dari periode terakhir dilewati
+    (pembaruan idempoten bila file yang sama diproses ulang). Setiap alarm juga
+    dicatat per jenis di 'alarm_belum_ditangani' (periode pertama & terakhir,
+    jumlah bulan) sehingga ukuran state tetap konstan.
+    """
+    if state['periode_terakhir'] is not None and periode <= state['periode_terakhir']:
+        return []
+    p = state['parameter']
+    residual = float(aktual) - float(prediksi)
+    z = residual / state['sigma']
+    ape = abs(residual) / max(abs(float(aktual)), 1e-10) * 100
+
+    state['cusum_atas'] = max(0.0, state['cusum_atas'] + z - p['k_cusum'])
+    state['cusum_bawah'] = max(0.0, state['cusum_bawah'] - z - p['k_cusum'])
+    state['ewma_mape'] = ape if state['ewma_mape'] is None else \
+        p['lambda_ewma'] * ape + (1 - p['lambda_ewma']) * state['ewma_mape']
+    posisi = state['n'] % p['jendela_bias']
+    state['bias_jumlah'] += residual - state['bias_buffer'][posisi]
+    state['bias_buffer'][posisi] = residual
+    state['n'] += 1
+    state['periode_terakhir'] = periode
+
+    alarm = []
+    label = label_periode(periode)
+    if state['cusum_atas'] > p['h_cusum']:
+        alarm.append({'periode': label, 'jenis': 'cusum_atas', 'nilai': state['cusum_atas'],
+                      'pesan': "aktual konsisten di atas prediksi (model under-predict)"})
+        state['cusum_atas'] = 0.0
+    if state['cusum_bawah'] > p['h_cusum']:
+        alarm.append({'periode': label, 'jenis': 'cusum_bawah', 'nilai': state['cusum_bawah'],
+                      'pesan': "aktual konsisten di bawah prediksi (model over-predict)"})
+        state['cusum_bawah'] = 0.0
+    if state['ewma_mape'] > p['faktor_mape'] * state['mape_dasar']:
+        alarm.append({'periode': label, 'jenis': 'ewma_mape', 'nilai': state['ewma_mape'],
+                      'pesan': f"EWMA MAPE melebihi {p['faktor_mape']:g}x MAPE testing ({state['mape_dasar']:.2f}%)"})
+    n_jendela = min(state['n'], p['jendela_bias'])
+    bias = state['bias_jumlah'] / n_jendela
+    if n_jendela >= p['min_bias'] and abs(bias) > p['z_bias'] * state['sigma'] / math.sqrt(n_jendela):
+        alarm.append({'periode': label, 'jenis': 'bias', 'nilai': bias,
+                      'pesan': f"rata-rata residual {n_jendela} bulan terakhir berbeda nyata dari nol"})
+    state['alarm_aktif'] = [a['jenis'] for a in alarm]
+    for a in alarm:
+        catatan = state['alarm_belum_ditangani'].setdefault(a['jenis'], {'pertama': label, 'jumlah': 0})
+        catatan['terakhir'] = label
+        catatan['jumlah'] += 1
+    return alarm
+
+def tandai_ditangani(state):
+    """Mengosongkan catatan alarm setelah ditinjau; statistik CUSUM/EWMA/bias tidak diubah."""
+    state['alarm_belum_ditangani'] = {}
+
+def ringkasan(state):
+    """Statistik monitoring terkini (bias dihitung dari jumlah berjalan)."""
+    n_jendela = min(state['n'], state['parameter']['jendela_bias'])
+    return {
+        'n': state['n'],
+        'periode_terakhir': None if state['periode_terakhir'] is None else label_periode(state['periode_terakhir']),
+        'cusum_atas': state['cusum_atas'],
+        'cusum_bawah': state['cusum_bawah'],
+        'ewma_mape': state['ewma_mape'],
+        'bias_bergulir': state['bias_jumlah'] / n_jendela if n_jendela else None,
+        'alarm_aktif': list(state['alarm_aktif']),
+        'alarm_belum_ditangani': dict(state['alarm_belum_ditangani']),
+        'perlu_latih_ulang': bool(state['alarm_belum_ditangani']),
+    }
+
+def muat_state(path):
+    with open(path, encoding='utf-8') as f:
+        state = json.load(f)
+    if state.get('versi') != VERSI_STATE:
+        raise ValueError(f"versi state {state.get('versi')} tidak didukung (harus {VERSI_STATE})")
+    return state
+
+def simpan_state(state, path):
+    """Menulis state sebagai JSON ringkas; ditulis ke file sementara lalu diganti agar tidak korup."""
+    sementara = f"{path}.tmp"
+    with open(sementara, 'w', encoding='utf-8') as f:
+        json.dump(state, f, separators=(',', ':'))
+    os.replace(sementara, path)
+
+def main(argv=None):
+    from model_scorer import muat_artefak
+
+    parser = argparse.ArgumentParser(description="Memperbarui state monitoring drift dengan data bulanan baru.")
+    parser.add_argument('state', help="File state JSON (dibuat bila belum ada).")
+    parser.add_argument('--artefak', help="Artefak model JSON hasil ekspor aplikasi.")
+    parser.add_argument('--data', help="CSV bulan baru: kolom Tahun, Bulan, fitur model, dan kolom target aktual.")
+    parser.add_argument('--tandai-ditangani', action='store_true',
+                        help="Mengosongkan catatan alarm sebelum data baru (bila ada) diproses.")
+    parser.add_argument('--mape-dasar', type=float, help="MAPE testing (%%) untuk state baru.")
+    parser.add_argument('--periode-awal', help="Bulan terakhir yang sudah diketahui model untuk state baru, mis. 2024-12.")
+    args = parser.parse_args(argv)
+    if args.data and not args.artefak:
+        parser.error("--artefak wajib bila --data diberikan")
+    if not args.data and not args.tandai_ditangani:
+        parser.error("berikan --data dan/atau --tandai-ditangani")
+
+    model = muat_artefak(args.artefak) if args.artefak else None
+    if os.path.exists(args.state):
+        state = muat_state(args.state)
+        if args.tandai_ditangani:
+            tandai_ditangani(state)
+    elif not args.data:
+        parser.error(f"file state {args.state} tidak ditemukan")
+    else:
+        if args.mape_dasar is None:
+            parser.error("--mape-dasar wajib untuk membuat state baru")
+        awal = None
+        if args.periode_awal:
+            tahun, bulan = args.periode_awal.split('-')
+            awal = indeks_periode(tahun, bulan)
+        state = inisialisasi(model.sigma, args.mape_dasar, awal)
+
+    if args.data:
+        with open(args.data, newline='', encoding='utf-8-sig') as f:
+            baris = sorted(csv.DictReader(f), key=lambda b: indeks_periode(b['Tahun'], b['Bulan']))
+        target = model.artefak.get('target', 'Penumpang (000)')
+        prediksi = model.skor({f: [float(b[f]) for b in baris] for f in model.features}) if baris else []
+        for b, yhat in zip(baris, prediksi):
+            for a in perbarui(state, indeks_periode(b['Tahun'], b['Bulan']), float(b[target]), float(yhat)):
+                print(f"ALARM {a['periode']}: {a['jenis']} = {a['nilai']:.2f} - {a['pesan']}")
+    simpan_state(state, args.state)
+    r = ringkasan(state)
+    print(f"{r['n']} bulan dipantau (terakhir {r['periode_terakhir']}); "
+          f"latih ulang {'DISARANKAN' if r['perlu_latih_ulang'] else 'belum perlu'}")
+    for jenis, c in r['alarm_belum_ditangani'].items():
+        print(f"  alarm {jenis} belum ditangani: {c['jumlah']} bulan ({c['pertama']} s.d. {c['terakhir']})")
+    return 1 if r['perlu_latih_ulang'] else 0
+
+if __name__ == '__main__':
+    raise SystemExit(main())
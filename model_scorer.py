@@ -0,0 +1,110 @@
+# =========================================================
+# Skorer Model Linear Tanpa Dependensi
+# Artefak koefisien ringkas + penilaian batch murni NumPy
+# =========================================================
+#
+# Modul ini sengaja hanya mengimpor json dan NumPy (tanpa Streamlit, pandas,
+# maupun sklearn) agar dapat disalin bersama artefak model dan diimpor hampir
+# tanpa biaya. Model linear cukup disimpan sebagai intercept, koefisien, urutan
+# fitur, dan faktor segitiga F dengan (Z'Z)^-1 = F F' untuk selang prediksi.
+# Selang prediksi hanya diekspor untuk model OLS; artefak model lain (ridge,
+# robust, dll.) hanya mendukung prediksi titik.
+#
+# Contoh penggunaan:
+#   from model_scorer import muat_artefak
+#   model = muat_artefak('model_regresi.json')
+#   y = model.skor(X)                         # X: array (n x fitur) atau DataFrame/dict kolom
+#   y, bawah, atas = model.selang(X, 0.95)
+
+import json
+
+import numpy as np
+
+VERSI_ARTEFAK = 2
+# Baris per blok saat menghitung selang; membatasi matriks sementara (blok x parameter)
+UKURAN_BLOK_SELANG = 1 << 18
+
+class SkorerLinear:
+    """
+    Model linear dari artefak koefisien. Prediksi titik adalah satu perkalian
+    X @ coef + intercept; selang prediksi OLS yhat ± t * sigma * sqrt(1 + ||z'F||²)
+    dengan z = [1, x] dihitung per blok tanpa membentuk Z. Artefak tanpa
+    'faktor_kovarians' (model non-OLS) hanya mendukung `skor`.
+    """
+
+    def __init__(self, artefak):
+        self.artefak = artefak
+        self.features = list(artefak['features'])
+        self.intercept = float(artefak['intercept'])
+        self.coef = np.asarray(artefak['coef'], dtype=np.float64)
+        self.sigma = float(artefak['sigma'])
+        self.ada_selang = 'faktor_kovarians' in artefak
+        self.faktor = np.asarray(artefak['faktor_kovarians'], dtype=np.float64) if self.ada_selang else None
+        self.t_kritis = {float(k): float(v) for k, v in artefak.get('t_kritis', {}).items()}
+
+    def matriks(self, X):
+        """
+        Matriks regresor (n x fitur) berurutan sesuai `features`: array diterima
+        apa adanya (satu baris boleh 1 dimensi), DataFrame atau dict kolom dipilih
+        berdasarkan nama fitur. DataFrame yang kolomnya sudah sesuai urutan fitur
+        diambil tanpa salinan; kolom dict disusun column-major agar tiap kolom
+        cukup disalin sekali secara berurutan.
+        """
+        if isinstance(X, np.ndarray):
+            X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        elif hasattr(X, 'to_numpy'):
+            X = (X if list(X.columns) == self.features else X[self.features]).to_numpy(dtype=np.float64)
+        else:
+            kolom = [np.asarray(X[f], dtype=np.float64) for f in self.features]
+            X = np.empty((len(kolom[0]), len(kolom)), order='F')
+            for j, nilai in enumerate(kolom):
+                X[:, j] = nilai
+        if X.shape[1] != len(self.features):
+            raise ValueError(f"input memiliki {X.shape[1]} kolom, model membutuhkan {len(self.features)}: "
+                             f"{', '.join(self.features)}")
+        return X
+
+    def kritis(self, tingkat):
+        if not self.ada_selang:
+            raise ValueError(f"model {self.artefak.get('jenis_model', '')} tidak memiliki selang prediksi; "
+                             "selang hanya diekspor untuk model OLS")
+        if tingkat not in self.t_kritis:
+            raise ValueError(f"tingkat {tingkat} tidak tersedia; pilih salah satu dari {sorted(self.t_kritis)}")
+        return self.t_kritis[tingkat]
+
+    def skor(self, X):
+        """Prediksi titik untuk semua baris X."""
+        return self.matriks(X) @ self.coef + self.intercept
+
+    def selang(self, X, tingkat=0.95, t=None, ukuran_blok=UKURAN_BLOK_SELANG):
+        """
+        (prediksi, batas_bawah, batas_atas). `t` (skalar atau array per baris)
+        menggantikan nilai kritis dari `tingkat`, mis. untuk batch campuran tingkat.
+        """
+        X = self.matriks(X)
+        t = self.kritis(tingkat) if t is None or not self.ada_selang else np.asarray(t, dtype=np.float64)
+        yhat = X @ self.coef + self.intercept
+        leverage = np.empty(len(X))
+        for awal in range(0, len(X), ukuran_blok):
+            # z'F = F[0] + x'F[1:] karena kolom pertama Z adalah konstanta
+            zf = X[awal:awal + ukuran_blok] @ self.faktor[1:] + self.faktor[0]
+            leverage[awal:awal + ukuran_blok] = np.einsum('ij,ij->i', zf, zf)
+        setengah = t * self.sigma * np.sqrt(1.0 + leverage)
+        return yhat, yhat - setengah, yhat + setengah
+
+def dari_dict(artefak):
+    """SkorerLinear dari dict artefak; versi artefak lain ditolak."""
+    versi = artefak.get('versi')
+    if versi != VERSI_ARTEFAK:
+        raise ValueError(f"versi artefak {versi} tidak didukung (harus {VERSI_ARTEFAK})")
+    return SkorerLinear(artefak)
+
+def muat_artefak(path):
+    """Membaca artefak koefisien (JSON) hasil ekspor aplikasi."""
+    with open(path, encoding='utf-8') as f:
+        return dari_dict(json.load(f))
+
+def simpan_artefak(artefak, path):
+    """Menulis artefak sebagai JSON ringkas (tanpa indentasi)."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(artefak, f, separators=(',', ':'))
@@ -0,0 +1,200 @@
+# =========================================================
+# Layanan Prediksi Lokal (HTTP/JSON) dengan Micro-Batching
+# Memuat koefisien model hasil ekspor aplikasi dan melayani prediksi titik
+# beserta selang prediksi untuk input regresor sembarang
+# =========================================================
+#
+# Modul ini sengaja tidak mengimpor Streamlit maupun sklearn: penilaian dilakukan
+# oleh model_scorer (murni NumPy) dari artefak koefisien.
+#
+# Menjalankan layanan:
+#   python prediction_service.py model_regresi.json --port 8765
+# Contoh permintaan:
+#   curl -X POST localhost:8765/prediksi -d '{"baris": [{"Bulan ke-n": 61, ...}], "tingkat": 0.95}'
+
+import argparse
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from model_scorer import muat_artefak
+
+PORT_DEFAULT = 8765
+# Jendela tunggu tambahan untuk permintaan berikutnya. 0 berarti hanya permintaan yang
+# sudah mengantre selama batch sebelumnya dihitung yang digabung (tanpa menambah latensi);
+# di mesin satu CPU biaya parsing HTTP/JSON mendominasi sehingga menunggu tidak menambah throughput
+TUNGGU_BATCH_MS = 0.0
+MAKS_BARIS_BATCH = 4096
+
+def matriks_payload(model, payload):
+    """
+    Matriks regresor (n x fitur) dari payload permintaan: 'baris' (list dict
+    nama fitur -> nilai) atau 'data' (list baris berurutan sesuai features model).
+    Payload yang bukan objek JSON atau 'data' yang bukan matriks 2 dimensi
+    dengan tepat satu kolom per fitur ditolak (ValueError), bukan dibentuk ulang.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("body permintaan harus berupa objek JSON")
+    if 'baris' in payload:
+        baris = payload['baris']
+        if not isinstance(baris, list) or not all(isinstance(b, dict) for b in baris):
+            raise ValueError("'baris' harus berupa list objek nama fitur -> nilai")
+        hilang = sorted({f for b in baris for f in model.features if f not in b})
+        if hilang:
+            raise ValueError(f"fitur tidak ada di input: {', '.join(hilang)}")
+        X = np.array([[b[f] for f in model.features] for b in baris], dtype=np.float64).reshape(len(baris), len(model.features))
+    else:
+        X = np.asarray(payload['data'], dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(model.features):
+            raise ValueError(f"'data' harus berupa list baris dengan tepat {len(model.features)} nilai per baris "
+                             f"(urutan: {', '.join(model.features)}), diterima bentuk {X.shape}")
+    if not np.isfinite(X).all():
+        raise ValueError("input memuat nilai kosong atau tak hingga")
+    return X
+
+class PengumpulBatch:
+    """
+    Menggabungkan permintaan konkuren: thread pekerja mengambil permintaan
+    pertama dari antrean beserta semua yang sudah mengantre (atau tiba dalam
+    `tunggu_ms`, maks. `maks_baris` baris), lalu menghitung semuanya dalam satu
+    perkalian matriks dan membagikan hasilnya kembali. maks_baris=1 berarti
+    tanpa batching.
+    """
+
+    def __init__(self, model, tunggu_ms=TUNGGU_BATCH_MS, maks_baris=MAKS_BARIS_BATCH):
+        self.model = model
+        self.tunggu = tunggu_ms / 1e3
+        self.maks_baris = maks_baris
+        self.ukuran_batch = []
+        self._antrean = queue.Queue()
+        self._pekerja = threading.Thread(target=self._loop, daemon=True)
+        self._pekerja.start()
+
+    def prediksi(self, X, tingkat):
+        """(prediksi, batas_bawah, atas) atau (prediksi,) bila model tanpa selang prediksi."""
+        t = self.model.kritis(tingkat) if self.model.ada_selang else None
+        tugas = {'X': X, 't': t, 'selesai': threading.Event()}
+        self._antrean.put(tugas)
+        tugas['selesai'].wait()
+        if 'error' in tugas:
+            raise tugas['error']
+        return tugas['hasil']
+
+    def tutup(self):
+        self._antrean.put(None)
+        self._pekerja.join()
+
+    def _kumpulkan(self):
+        """Satu batch permintaan; None bila pengumpul ditutup."""
+        pertama = self._antrean.get()
+        if pertama is None:
+            return None
+        batch, n_baris = [pertama], len(pertama['X'])
+        batas_waktu = time.perf_counter() + self.tunggu
+        while n_baris < self.maks_baris:
+            try:
+                sisa = batas_waktu - time.perf_counter()
+                tugas = self._antrean.get(timeout=sisa) if sisa > 0 else self._antrean.get_nowait()
+            except queue.Empty:
+                break
+            if tugas is None:
+                self._antrean.put(None)
+                break
+            batch.append(tugas)
+            n_baris += len(tugas['X'])
+        return batch
+
+    def _loop(self):
+        while (batch := self._kumpulkan()) is not None:
+            try:
+                panjang = [len(tugas['X']) for tugas in batch]
+                X = np.concatenate([tugas['X'] for tugas in batch])
+                if self.model.ada_selang:
+                    hasil = self.model.selang(X, t=np.repeat([tugas['t'] for tugas in batch], panjang))
+                else:
+                    hasil = (self.model.skor(X),)
+                potong = np.cumsum(panjang)[:-1]
+                for tugas, *bagian in zip(batch, *(np.split(h, potong) for h in hasil)):
+                    tugas['hasil'] = bagian
+            except Exception as e:
+                for tugas in batch:
+                    tugas['error'] = e
+            self.ukuran_batch.append(len(batch))
+            for tugas in batch:
+                tugas['selesai'].set()
+
+class _Handler(BaseHTTPRequestHandler):
+    """GET /kesehatan (info model) dan POST /prediksi."""
+    protocol_version = 'HTTP/1.1'
+    # Header dan body ditulis terpisah; tanpa TCP_NODELAY keduanya tertahan delayed-ACK (~40 ms)
+    disable_nagle_algorithm = True
+
+    def _kirim(self, status, isi):
+        body = json.dumps(isi).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != '/kesehatan':
+            return self._kirim(404, {'error': f'path tidak dikenal: {self.path}'})
+        artefak = self.server.pengumpul.model.artefak
+        self._kirim(200, {'status': 'ok', 'jenis_model': artefak.get('jenis_model'),
+                          'features': artefak['features'], 'tingkat': sorted(self.server.pengumpul.model.t_kritis)})
+
+    def do_POST(self):
+        if self.path != '/prediksi':
+            return self._kirim(404, {'error': f'path tidak dikenal: {self.path}'})
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            X = matriks_payload(self.server.pengumpul.model, payload)
+            tingkat = float(payload.get('tingkat', 0.95))
+            hasil = self.server.pengumpul.prediksi(X, tingkat)
+        except (ValueError, KeyError, TypeError) as e:
+            return self._kirim(400, {'error': str(e)})
+        if len(hasil) == 1:
+            return self._kirim(200, {'prediksi': hasil[0].tolist(),
+                                     'catatan': 'selang prediksi hanya tersedia untuk model OLS'})
+        yhat, bawah, atas = hasil
+        self._kirim(200, {'prediksi': yhat.tolist(), 'batas_bawah': bawah.tolist(),
+                          'batas_atas': atas.tolist(), 'tingkat': tingkat})
+
+    def log_message(self, format, *args):
+        pass
+
+def buat_server(model, host='127.0.0.1', port=PORT_DEFAULT, tunggu_ms=TUNGGU_BATCH_MS, maks_baris=MAKS_BARIS_BATCH):
+    """ThreadingHTTPServer yang meneruskan setiap permintaan ke satu PengumpulBatch bersama."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.pengumpul = PengumpulBatch(model, tunggu_ms, maks_baris)
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Layanan prediksi lokal dari artefak koefisien model.")
+    parser.add_argument('model', help="Path artefak JSON hasil 'Unduh Model' di halaman Deployment.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=PORT_DEFAULT)
+    parser.add_argument('--tunggu-ms', type=float, default=TUNGGU_BATCH_MS,
+                        help="Jendela tunggu micro-batching; 0 hanya menggabungkan permintaan yang sudah mengantre.")
+    parser.add_argument('--maks-baris', type=int, default=MAKS_BARIS_BATCH)
+    args = parser.parse_args(argv)
+
+    server = buat_server(muat_artefak(args.model), args.host, args.port, args.tunggu_ms, args.maks_baris)
+    print(f"Layanan prediksi berjalan di http://{args.host}:{server.server_address[1]} (Ctrl+C untuk berhenti)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+        server.server_close()
+        server.pengumpul.tutup()
+
+if __name__ == '__main__':
+    main()
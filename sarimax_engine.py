@@ -0,0 +1,143 @@
+# =========================================================
+# Mesin Regresi dengan Galat ARIMA (SARIMAX)
+# Pencarian orde (p,d,q)(P,D,Q,12) paralel dengan pemangkasan AIC
+# =========================================================
+#
+# Modul ini sengaja tidak mengimpor Streamlit agar fungsi pekerja dapat
+# di-pickle dan dijalankan di process pool.
+
+import itertools
+import warnings
+
+import numpy as np
+import pandas as pd
+from statsmodels.tsa.statespace.sarimax import SARIMAX
+
+MUSIM = 12
+RENTANG_ORDE = {
+    'p': (0, 1, 2), 'd': (0, 1), 'q': (0, 1, 2),
+    'P': (0, 1), 'D': (0, 1), 'Q': (0, 1),
+}
+# Kandidat tahap 1 yang AIC-nya lebih buruk dari (terbaik + selisih) tidak diperluas ke orde musiman
+SELISIH_AIC_PANGKAS = 4.0
+KANDIDAT_TAHAP_DUA = 5
+MAKS_ITERASI = 200
+
+def _buat_model(y, X, order, seasonal_order):
+    """SARIMAX dengan regresor X; konstanta hanya dipakai bila tidak ada differencing."""
+    trend = 'c' if order[1] == 0 and seasonal_order[1] == 0 else 'n'
+    return SARIMAX(y, exog=X, order=order, seasonal_order=seasonal_order, trend=trend,
+                   enforce_stationarity=False, enforce_invertibility=False)
+
+def _perkiraan_burn_in(order, seasonal_order):
+    """Perkiraan jumlah observasi awal yang tidak ikut likelihood (differencing + state awal)."""
+    p, d, q = order
+    P, D, Q, s = seasonal_order
+    return d + D * s + max(p + P * s, q + Q * s + 1)
+
+def evaluasi_orde(tugas):
+    """
+    Fungsi pekerja: melatih satu kombinasi orde dan mengembalikan AIC-nya.
+    `tugas` = (y, X, order, seasonal_order); kegagalan dikembalikan sebagai status.
+    """
+    y, X, order, seasonal_order = tugas
+    hasil = {'order': order, 'seasonal_order': seasonal_order, 'aic': np.inf}
+    # Minimal dua observasi efektif per parameter; di bawah itu AIC tidak bermakna
+    n_efektif = len(y) - _perkiraan_burn_in(order, seasonal_order)
+    n_parameter = sum(order[::2]) + sum(seasonal_order[:3:2]) + X.shape[1] + 2
+    if n_efektif < 2 * n_parameter:
+        hasil['status'] = 'data kurang'
+        return hasil
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        try:
+            fit = _buat_model(y, X, order, seasonal_order).fit(disp=False, maxiter=MAKS_ITERASI)
+        except Exception as e:
+            hasil['status'] = f'gagal: {e}'
+            return hasil
+    aic = float(fit.aic)
+    if not fit.mle_retvals.get('converged', True):
+        hasil['status'] = 'tidak konvergen'
+    elif not np.isfinite(aic):
+        hasil['status'] = 'aic tidak valid'
+    else:
+        hasil['aic'] = aic
+        hasil['status'] = 'ok'
+    return hasil
+
+def _jalankan(tugas, executor):
+    if executor is None:
+        return [evaluasi_orde(t) for t in tugas]
+    return list(executor.map(evaluasi_orde, tugas))
+
+def cari_orde(y, X, executor=None, rentang=RENTANG_ORDE, selisih_aic=SELISIH_AIC_PANGKAS,
+              kandidat=KANDIDAT_TAHAP_DUA):
+    """
+    Grid search orde SARIMAX dua tahap dengan pemangkasan berdasarkan AIC:
+    1. Semua (p,d,q) x (0,D,0,12).
+    2. Hanya kandidat terbaik tahap 1 (maks. `kandidat`, AIC dalam `selisih_aic`
+       dari yang terbaik) yang dicoba dengan komponen musiman P/Q.
+    Setiap tahap dijalankan lewat `executor` (mis. ProcessPoolExecutor) bila ada.
+    Catatan: AIC antar orde differencing berbeda hanya perbandingan pendekatan.
+    Mengembalikan DataFrame semua orde yang dicoba, terurut dari AIC terbaik,
+    beserta jumlah kombinasi yang dipangkas.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    X = np.asarray(X, dtype=np.float64)
+
+    tahap_satu = [((p, d, q), (0, D, 0, MUSIM))
+                  for p, d, q, D in itertools.product(rentang['p'], rentang['d'], rentang['q'], rentang['D'])]
+    hasil_satu = _jalankan([(y, X, o, so) for o, so in tahap_satu], executor)
+
+    valid = sorted((h for h in hasil_satu if np.isfinite(h['aic'])), key=lambda h: h['aic'])
+    terpilih = [h for h in valid[:kandidat] if h['aic'] <= valid[0]['aic'] + selisih_aic] if valid else []
+    musiman = [(P, Q) for P, Q in itertools.product(rentang['P'], rentang['Q']) if (P, Q) != (0, 0)]
+    tahap_dua = [(h['order'], (P, h['seasonal_order'][1], Q, MUSIM)) for h in terpilih for P, Q in musiman]
+    hasil_dua = _jalankan([(y, X, o, so) for o, so in tahap_dua], executor)
+
+    n_penuh = len(tahap_satu) * (1 + len(musiman))
+    grid = pd.DataFrame([dict(h, tahap=1) for h in hasil_satu] + [dict(h, tahap=2) for h in hasil_dua])
+    grid = grid.sort_values('aic', kind='stable').reset_index(drop=True)
+    return grid, n_penuh - len(grid)
+
+class RegresiARIMA:
+    """
+    Regresi berganda dengan galat SARIMA. Antarmukanya mengikuti LinearRegression
+    (`fit`, `predict`, `coef_`, `intercept_`, `feature_names_in_`) agar dapat dipakai
+    oleh tampilan metrik dan prediksi yang sama.
+    """
+
+    def __init__(self, order, seasonal_order):
+        self.order = tuple(order)
+        self.seasonal_order = tuple(seasonal_order)
+
+    def fit(self, X, y):
+        self.feature_names_in_ = np.asarray(X.columns, dtype=object)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            self.hasil_ = _buat_model(np.asarray(y, dtype=np.float64), X.to_numpy(dtype=np.float64),
+                                      self.order, self.seasonal_order).fit(disp=False, maxiter=MAKS_ITERASI)
+        params = pd.Series(self.hasil_.params, index=self.hasil_.model.param_names)
+        self.coef_ = params[[f'x{i + 1}' for i in range(len(self.feature_names_in_))]].to_numpy()
+        self.intercept_ = float(params.get('intercept', 0.0))
+        self.aic_ = float(self.hasil_.aic)
+        return self
+
+    def prediksi_dalam_sampel(self):
+        """Prediksi satu langkah ke depan pada data latih; observasi burn-in (state awal) bernilai NaN."""
+        prediksi = np.asarray(self.hasil_.fittedvalues, dtype=np.float64).copy()
+        prediksi[:self.hasil_.loglikelihood_burn] = np.nan
+        return prediksi
+
+    def tambah_observasi(self, X, y):
+        """Menambahkan observasi baru ke state filter tanpa melatih ulang parameter."""
+        self.hasil_ = self.hasil_.append(np.asarray(y, dtype=np.float64),
+                                         exog=X[self.feature_names_in_].to_numpy(dtype=np.float64))
+        return self
+
+    def predict(self, X):
+        """
+        Meramal len(X) bulan berturut-turut tepat setelah observasi terakhir,
+        memakai nilai regresor pada X (berbeda dengan LinearRegression, urutan baris penting).
+        """
+        return np.asarray(self.hasil_.forecast(steps=len(X), exog=X[self.feature_names_in_].to_numpy(dtype=np.float64)))
@@ -9,14 +9,36 @@ import numpy as np
 import os
 import io
 import altair as alt
-from sklearn.linear_model import LinearRegression
+from sklearn.linear_model import LinearRegression, HuberRegressor, enet_path
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.model_selection import TimeSeriesSplit
 from sklearn.metrics import mean_absolute_error
 import matplotlib.pyplot as plt
 import statsmodels.api as sm
-from statsmodels.stats.outliers_influence import variance_inflation_factor
 from scipy import stats
+from scipy.linalg import solve_triangular
 import warnings
 import re
+import itertools
+import openpyxl
+import zipfile
+from lxml import etree
+import time
+import logging
+import hashlib
+import threading
+import queue
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+import tracemalloc
+import weakref
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from sarimax_engine import RegresiARIMA, cari_orde
+import model_scorer
+import model_monitor
 
 # --- KONFIGURASI APLIKASI ---
 st.set_page_config(
@@ -25,21 +47,28 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# --- INTEGRASI GROQ API ---
+# --- INTEGRASI LLM (GROQ / SERVER LOKAL / OFFLINE) ---
 from groq import Groq
+import json
+import urllib.request
 
-# Mengakses API key dari file secrets.toml
-try:
-    groq_api_key = st.secrets["GROQ_API_KEY"]
-except KeyError:
-    st.error("GROQ_API_KEY tidak ditemukan di file .streamlit/secrets.toml. Harap tambahkan API key Anda.")
-    groq_api_key = None
+def _get_config(name, default=None):
+    """Membaca konfigurasi dari .streamlit/secrets.toml, lalu variabel lingkungan."""
+    try:
+        return st.secrets[name]
+    except (KeyError, FileNotFoundError):
+        return os.environ.get(name, default)
 
-if groq_api_key:
-    groq_client = Groq(api_key=groq_api_key)
-else:
-    groq_client = None
-# --- AKHIR INTEGRASI GROQ API ---
+# Mengakses API key dari file secrets.toml (opsional; tanpa key chatbot memakai backend lain)
+groq_api_key = _get_config("GROQ_API_KEY")
+# Backend default: "groq", "openai_compat" (server inferensi lokal), atau "template" (offline)
+LLM_BACKEND = _get_config("LLM_BACKEND", "groq" if groq_api_key else "template")
+LLM_GROQ_MODEL = _get_config("LLM_GROQ_MODEL", "openai/gpt-oss-20b")
+# Server lokal yang kompatibel dengan OpenAI API (mis. llama.cpp, vLLM, Ollama)
+LLM_LOCAL_BASE_URL = _get_config("LLM_LOCAL_BASE_URL")
+LLM_LOCAL_MODEL = _get_config("LLM_LOCAL_MODEL", "local-model")
+LLM_LOCAL_API_KEY = _get_config("LLM_LOCAL_API_KEY")
+# --- AKHIR INTEGRASI LLM ---
 
 # Menggunakan gaya visualisasi yang lebih elegan dan serasi dengan tema Streamlit
 plt.style.use('dark_background')
@@ -69,10 +98,217 @@ def _format_indonesian_numeric(value, decimals=0):
     Jika decimals=0, akan dibulatkan ke integer.
     Jika decimals > 0, akan menampilkan desimal.
     """
-    if isinstance(value, (int, float)):
+    if isinstance(value, (int, float, np.integer, np.floating)):
         return f"{value:,.{decimals}f}".replace(",", "@").replace(".", ",").replace("@", ".")
     return value
 
+# --- Instrumentasi Performa ---
+# Kapasitas ring buffer peristiwa instrumentasi per sesi
+INSTRUMENTATION_BUFFER_SIZE = 500
+
+def _get_instrumentation_buffer():
+    """Ring buffer peristiwa instrumentasi milik sesi ini."""
+    if 'instrumentation_events' not in st.session_state:
+        st.session_state.instrumentation_events = deque(maxlen=INSTRUMENTATION_BUFFER_SIZE)
+    return st.session_state.instrumentation_events
+
+@contextmanager
+def instrument(stage, rows=None):
+    """
+    Mengukur waktu (wall time), alokasi memori bersih (bila tracemalloc aktif
+    lewat panel debug), dan jumlah baris sebuah tahap. Blok `with` dapat
+    mengisi `record['rows']` setelah jumlah baris diketahui. Alokasi diukur
+    untuk seluruh proses, sehingga ikut memuat alokasi sesi/thread lain yang
+    berjalan bersamaan.
+    """
+    record = {'stage': stage, 'rows': rows}
+    tracing = tracemalloc.is_tracing()
+    mem_before = tracemalloc.get_traced_memory()[0] if tracing else 0
+    record['start_ts'] = time.time()
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record['duration_ms'] = (time.perf_counter() - start) * 1e3
+        record['alloc_kb'] = (tracemalloc.get_traced_memory()[0] - mem_before) / 1024 if tracing else None
+        _get_instrumentation_buffer().append(record)
+
+def instrumentation_to_json(events):
+    """Ekspor peristiwa instrumentasi sebagai JSON."""
+    return json.dumps(list(events), indent=2, default=float)
+
+def instrumentation_to_chrome_trace(events):
+    """Ekspor peristiwa dalam format Chrome Trace Event (dibuka di chrome://tracing atau Perfetto)."""
+    trace_events = [{
+        'name': event['stage'],
+        'cat': event['stage'].split('.')[0],
+        'ph': 'X',
+        'ts': event['start_ts'] * 1e6,
+        'dur': event['duration_ms'] * 1e3,
+        'pid': 1,
+        'tid': 1,
+        'args': {'rows': event['rows'], 'alloc_kb': event['alloc_kb']},
+    } for event in events]
+    return json.dumps({'traceEvents': trace_events, 'displayTimeUnit': 'ms'})
+
+@st.cache_resource
+def _get_tracemalloc_registry():
+    """
+    Sesi yang sedang menyalakan panel debug. tracemalloc bersifat global per
+    proses, jadi pelacakan hanya berjalan selama set ini tidak kosong. Memakai
+    WeakSet sehingga sesi yang ditutup tanpa mematikan panel ikut terlepas.
+    """
+    return {'lock': threading.Lock(), 'sesi': weakref.WeakSet()}
+
+class _TandaDebug:
+    """Penanda sesi di registry tracemalloc (objek biasa agar dapat di-weakref)."""
+
+def sinkronkan_tracemalloc(aktif):
+    """Mendaftarkan atau melepas sesi ini, lalu menyalakan/mematikan tracemalloc sesuai isi registry."""
+    registry = _get_tracemalloc_registry()
+    with registry['lock']:
+        if aktif:
+            if '_tanda_debug' not in st.session_state:
+                st.session_state._tanda_debug = _TandaDebug()
+            registry['sesi'].add(st.session_state._tanda_debug)
+        elif '_tanda_debug' in st.session_state:
+            registry['sesi'].discard(st.session_state._tanda_debug)
+            del st.session_state._tanda_debug
+        if len(registry['sesi']) and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not len(registry['sesi']) and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+def show_instrumentation_panel():
+    """Panel debug opsional di sidebar: memori sesi dan peristiwa instrumentasi terakhir."""
+    st.sidebar.markdown("---")
+    debug_enabled = st.sidebar.checkbox("🛠️ Panel Debug Performa", key="debug_instrumentation")
+    sinkronkan_tracemalloc(debug_enabled)
+    if not debug_enabled:
+        return
+
+    st.sidebar.markdown("##### Memori Sesi")
+    df_memory = session_memory_report()
+    if not df_memory.empty:
+        st.sidebar.dataframe(df_memory.style.format({'memori_kb': '{:.1f}'}), hide_index=True)
+        private_kb = df_memory.loc[~df_memory['bersama'], 'memori_kb'].sum()
+        st.sidebar.caption(f"Total sesi: {df_memory['memori_kb'].sum():.1f} KB, di antaranya {private_kb:.1f} KB khusus sesi ini.")
+    n_shared, shared_mb = dataset_store_summary()
+    st.sidebar.caption(f"Dataset bersama di server: {n_shared} ({shared_mb:.2f} MB).")
+
+    st.sidebar.markdown("##### Tahap Terakhir")
+    events = list(_get_instrumentation_buffer())
+    if not events:
+        st.sidebar.caption("Belum ada tahap yang tercatat.")
+        return
+    df_events = pd.DataFrame(events)[['stage', 'duration_ms', 'alloc_kb', 'rows']].iloc[::-1]
+    df_events = df_events.rename(columns={'alloc_kb': 'alloc_kb_proses'})
+    st.sidebar.dataframe(df_events.head(30).style.format({
+        'duration_ms': '{:.1f}',
+        'alloc_kb_proses': lambda x: '-' if pd.isna(x) else f'{x:.0f}',
+        'rows': lambda x: '-' if pd.isna(x) else f'{x:.0f}',
+    }), hide_index=True)
+    st.sidebar.caption("alloc_kb_proses adalah alokasi bersih seluruh proses selama tahap berjalan, "
+                       "termasuk sesi dan thread lain yang aktif bersamaan.")
+    st.sidebar.download_button("Unduh JSON", instrumentation_to_json(events),
+                               file_name="instrumentasi.json", mime="application/json")
+    st.sidebar.download_button("Unduh Chrome Trace", instrumentation_to_chrome_trace(events),
+                               file_name="instrumentasi_trace.json", mime="application/json")
+    if st.sidebar.button("Kosongkan Log Instrumentasi", key="btn_clear_instrumentation"):
+        _get_instrumentation_buffer().clear()
+
+# --- Penyimpanan Dataset Bersama (Hemat Memori) ---
+@st.cache_resource
+def _get_dataset_store():
+    """
+    Penyimpanan dataset lintas sesi yang dialamatkan berdasarkan isi (hash).
+    Memakai WeakValueDictionary sehingga dataset otomatis dilepas ketika tidak
+    ada lagi sesi yang mereferensikannya.
+    """
+    return {'lock': threading.Lock(), 'datasets': weakref.WeakValueDictionary()}
+
+def _downcast_numeric(df):
+    """
+    Menurunkan tipe kolom numerik tanpa kehilangan nilai: kolom bernilai bulat
+    menjadi int32, kolom float yang tepat direpresentasikan float32 menjadi
+    float32. Tipe yang lebih kecil dari 32-bit sengaja tidak dipakai agar
+    operasi aritmetika lanjutan tidak overflow.
+    """
+    df = df.copy(deep=False)
+    int32_info = np.iinfo(np.int32)
+    for col in df.columns:
+        series = df[col]
+        if pd.api.types.is_bool_dtype(series) or not pd.api.types.is_numeric_dtype(series):
+            continue
+        values = series.to_numpy()
+        if series.isna().any():
+            if pd.api.types.is_float_dtype(series) and np.array_equal(values.astype(np.float32).astype(values.dtype), values, equal_nan=True):
+                df[col] = series.astype(np.float32)
+            continue
+        if pd.api.types.is_integer_dtype(series) or np.array_equal(values, np.round(values)):
+            if len(values) == 0 or (values.min() >= int32_info.min and values.max() <= int32_info.max):
+                df[col] = series.astype(np.int32)
+        elif np.array_equal(values.astype(np.float32).astype(values.dtype), values):
+            df[col] = series.astype(np.float32)
+    return df
+
+def dataset_fingerprint(df):
+    """Hash isi DataFrame (nilai, indeks, nama dan tipe kolom)."""
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    digest.update(repr([(str(col), str(dtype)) for col, dtype in df.dtypes.items()]).encode("utf-8"))
+    return digest.hexdigest()
+
+def share_dataset(df):
+    """
+    Menurunkan tipe numerik lalu mengembalikan instance DataFrame bersama untuk
+    isi yang sama. Sesi yang mengunggah data identik memegang referensi ke
+    objek yang sama. Dataset bersama diperlakukan read-only: kode yang perlu
+    mengubahnya harus membuat salinan sendiri.
+    """
+    if df is None:
+        return None
+    df = _downcast_numeric(df)
+    key = dataset_fingerprint(df)
+    store = _get_dataset_store()
+    with store['lock']:
+        shared = store['datasets'].get(key)
+        if shared is None:
+            store['datasets'][key] = df
+            shared = df
+    return shared
+
+def session_memory_report():
+    """
+    Laporan memori sesi ini: setiap DataFrame di session_state beserta ukuran
+    (deep) dan status berbagi, ditambah array di hasil model.
+    """
+    store = _get_dataset_store()
+    with store['lock']:
+        shared_ids = {id(df) for df in store['datasets'].values()}
+    rows = []
+    for key in list(st.session_state.keys()):
+        value = st.session_state[key]
+        if isinstance(value, pd.DataFrame):
+            rows.append({
+                'objek': key,
+                'baris': len(value),
+                'memori_kb': value.memory_usage(deep=True).sum() / 1024,
+                'bersama': id(value) in shared_ids,
+            })
+    results = st.session_state.get('model_results')
+    if results:
+        arrays_bytes = sum(v.nbytes for v in results.values() if isinstance(v, np.ndarray))
+        rows.append({'objek': 'model_results (array)', 'baris': len(results.get('y_pred_training', [])),
+                     'memori_kb': arrays_bytes / 1024, 'bersama': False})
+    return pd.DataFrame(rows, columns=['objek', 'baris', 'memori_kb', 'bersama'])
+
+def dataset_store_summary():
+    """Jumlah dataset bersama di proses ini dan total memorinya (MB)."""
+    store = _get_dataset_store()
+    with store['lock']:
+        datasets = list(store['datasets'].values())
+    return len(datasets), sum(df.memory_usage(deep=True).sum() for df in datasets) / 1e6
+
 # --- UI Components ---
 def create_header():
     """Membuat header aplikasi."""
@@ -137,13 +373,6 @@ def create_sidebar_menu():
     else:
         st.sidebar.success("✅ Data berhasil dimuat.")
     
-    st.sidebar.markdown("---")
-    st.sidebar.subheader("Pilihan Visualisasi")
-    st.session_state.chart_type_option = st.sidebar.selectbox(
-        "Pilih jenis grafik:",
-        ('Garis', 'Batang')
-    )
-
     st.sidebar.markdown("---")
     
     st.sidebar.markdown("### 1. Unggah Data")
@@ -176,6 +405,24 @@ def create_sidebar_menu():
         st.session_state.page = 'chatbot'
         st.rerun()
 
+CHART_TYPE_OPTIONS = ('Garis', 'Batang')
+
+def chart_type_selector(key):
+    """
+    Pilihan jenis grafik yang diletakkan di dalam fragmen grafik, sehingga
+    menggantinya hanya menggambar ulang grafik tersebut. Pilihan terakhir
+    disimpan di session_state dan dipakai sebagai default di halaman lain.
+    """
+    current = st.session_state.get('chart_type_option', CHART_TYPE_OPTIONS[0])
+    st.session_state.chart_type_option = st.radio(
+        "Pilih jenis grafik:",
+        CHART_TYPE_OPTIONS,
+        index=CHART_TYPE_OPTIONS.index(current),
+        horizontal=True,
+        key=key,
+    )
+    return st.session_state.chart_type_option
+
 # --- Fungsi-fungsi Respons Chatbot yang Diprogram (Hardcoded) ---
 def handle_summary_response():
     """Menampilkan respons ringkasan prediksi."""
@@ -203,12 +450,26 @@ def handle_summary_response():
         Nilai MAPE yang rendah menunjukkan bahwa model memiliki kesalahan persentase rata-rata yang kecil, sehingga prediksi model cukup dapat diandalkan.
         """)
 
+        hasil_asumsi, error = uji_asumsi_klasik(st.session_state.df_training)
+        if hasil_asumsi is not None:
+            tabel = hasil_asumsi['tabel']
+            gagal = tabel.loc[tabel['Hasil'] == 'Gagal', 'Asumsi'].unique()
+            st.markdown("**Uji Asumsi Klasik (OLS data training):**")
+            st.markdown("\n".join(f"- {r['Asumsi']} — {r['Uji']}: **{r['Hasil']}**" for _, r in tabel.iterrows()))
+            if len(gagal):
+                st.write(f"Asumsi yang belum terpenuhi ({', '.join(gagal)}) perlu diperhatikan sebelum menafsirkan "
+                         "signifikansi koefisien.")
+
 def handle_coefficient_response():
     """Menampilkan respons penjelasan koefisien model."""
     with st.chat_message("assistant"):
         if 'model_results' in st.session_state and st.session_state.data_loaded:
             results = st.session_state.model_results
             model = results['model']
+            if not hasattr(model, 'coef_'):
+                st.write(f"Model aktif ({results.get('jenis_model', type(model).__name__)}) bukan model linear, "
+                         "sehingga tidak memiliki koefisien per variabel.")
+                return
             intercept = model.intercept_
             coefs = model.coef_
             features = results['features']
@@ -232,7 +493,7 @@ def handle_5_year_forecast_response():
         if 'df_future' in st.session_state:
             st.subheader("Prediksi Penumpang untuk 5 Tahun ke Depan")
             st.write("Berdasarkan model regresi yang dilatih, berikut adalah prediksi jumlah penumpang (dalam ribuan) untuk 5 tahun ke depan.")
-            df_future_display = st.session_state.df_future[['Bulan', 'Tahun', 'Penumpang (000)']].copy()
+            df_future_display = st.session_state.df_future[['Bulan', 'Tahun', 'Penumpang (000)']]
             styled_df = df_future_display.style.format({
                 'Tahun': '{:.0f}',
                 'Penumpang (000)': lambda x: _format_indonesian_numeric(x, 0)
@@ -283,28 +544,34 @@ def handle_improvement_response():
         Beberapa cara yang dapat Anda lakukan untuk meningkatkan akurasi model adalah:
         - **Menambahkan Variabel Baru:** Coba tambahkan variabel lain yang mungkin memengaruhi jumlah penumpang, misalnya harga bahan bakar, harga tiket, atau data acara besar (konser, festival).
         - **Penggunaan Model Lanjutan:** Eksplorasi model regresi yang lebih kompleks, seperti Random Forest, XGBoost, atau model deret waktu seperti Prophet, yang mungkin lebih baik dalam menangkap pola non-linier.
-        - **Pembersihan Data (Data Cleaning):** Periksa kembali data untuk outlier atau kesalahan yang mungkin memengaruhi model.
+        - **Model Deret Waktu SARIMAX:** Di halaman Modeling & Evaluasi tersedia regresi dengan galat ARIMA (SARIMAX) yang menangani autokorelasi residual OLS pada data bulanan ini.
+        - **Pembersihan Data (Data Cleaning):** Periksa kembali data untuk outlier atau kesalahan yang mungkin memengaruhi model. Panel **Diagnostik Pengaruh & Pencilan** di halaman Modeling menandai bulan berpengaruh (leverage, Cook's distance, DFFITS) dan dapat langsung melatih ulang model tanpa bulan tersebut.
         - **Peningkatan Ukuran Dataset:** Menggunakan lebih banyak data historis (jika tersedia) dapat membantu model belajar pola yang lebih baik.
         """)
         
-def handle_specific_data_query(prompt):
+def handle_specific_data_query(prompt, match=None):
     """Menangani pertanyaan spesifik tentang data di bulan dan tahun tertentu."""
     bulan_dict = {
         'januari': 'Januari', 'februari': 'Februari', 'maret': 'Maret', 'april': 'April',
         'mei': 'Mei', 'juni': 'Juni', 'juli': 'Juli', 'agustus': 'Agustus',
         'september': 'September', 'oktober': 'Oktober', 'november': 'November', 'desember': 'Desember'
     }
-    
-    match = re.search(r'(januari|februari|maret|april|mei|juni|juli|agustus|september|oktober|november|desember)\s+(\d{4})', prompt.lower())
-    
+
+    # Router intent sudah mencocokkan pola bulan-tahun; hanya cocokkan ulang bila dipanggil langsung
+    if match is None:
+        match = _get_intent_router()['pola_bulan_tahun'].search(prompt.lower())
+
     if not match:
         return False
-        
+
     bulan_str = bulan_dict[match.group(1)]
     tahun_int = int(match.group(2))
-    
+
     with st.chat_message("assistant"):
-        df_all = pd.concat([st.session_state.df_training, st.session_state.df_testing, st.session_state.df_future], ignore_index=True)
+        df_sources = [st.session_state.df_training, st.session_state.df_testing]
+        if 'df_future' in st.session_state:
+            df_sources.append(st.session_state.df_future)
+        df_all = pd.concat(df_sources, ignore_index=True)
         
         data_found = df_all[(df_all['Bulan'] == bulan_str) & (df_all['Tahun'] == tahun_int)]
         
@@ -326,11 +593,14 @@ def handle_specific_data_query(prompt):
 
 def handle_graph_request(prompt):
     """Menangani permintaan untuk menampilkan grafik."""
-    if 'grafik' in prompt.lower() or 'diagram' in prompt.lower():
+    if _get_intent_router()['pola_grafik'].search(prompt.lower()):
         with st.chat_message("assistant"):
             st.subheader("Visualisasi Tren Penumpang")
             
-            df_combined_all = pd.concat([st.session_state.df_training, st.session_state.df_testing, st.session_state.df_future], ignore_index=True)
+            df_sources = [st.session_state.df_training, st.session_state.df_testing]
+            if 'df_future' in st.session_state:
+                df_sources.append(st.session_state.df_future)
+            df_combined_all = pd.concat(df_sources, ignore_index=True)
             df_combined_all['Jenis Data'] = np.nan
             df_combined_all.loc[len(st.session_state.df_training)+len(st.session_state.df_testing):, 'Jenis Data'] = 'Prediksi 5 Tahun'
             df_combined_all.loc[:len(st.session_state.df_training)-1, 'Jenis Data'] = 'Training'
@@ -342,47 +612,208 @@ def handle_graph_request(prompt):
         return True
     return False
 
+# --- Router Intent Chatbot ---
+# Ambang minimum skor keyakinan agar sebuah intent dijawab secara lokal (tanpa LLM).
+# Kata kunci + satu kata pendukung bernilai 0.75 dan terlalu lemah (mis. "berapa MAPE
+# training" bukan pertanyaan beda MAPE); minimal dua kata pendukung (0.95) diperlukan.
+INTENT_CONFIDENCE_THRESHOLD = 0.9
+# Jumlah maksimum keputusan routing yang disimpan di session_state
+INTENT_LOG_MAX = 200
+
+logger = logging.getLogger(__name__)
+
+# Definisi intent: (nama, frasa persis, kata kunci utama, kata pendukung, membutuhkan data)
+_INTENT_DEFINITIONS = [
+    ('ringkasan', "kesimpulan dari hasil prediksi",
+     {'kesimpulan', 'ringkasan', 'simpulkan', 'rangkuman'},
+     {'hasil', 'prediksi', 'model', 'akurasi', 'dataset'}, True),
+    ('koefisien', "koefisien model regresi",
+     {'koefisien', 'intercept', 'konstanta'},
+     {'model', 'regresi', 'jelaskan', 'variabel', 'signifikansi', 'arti'}, True),
+    ('prediksi_5_tahun', "prediksi jumlah penumpang untuk 5 tahun ke depan",
+     {'5', 'lima'},
+     {'prediksi', 'tahun', 'depan', 'tampilkan', 'penumpang'}, True),
+    ('beda_mape', "mape pada data training berbeda dengan data testing",
+     {'mape', 'error'},
+     {'training', 'testing', 'berbeda', 'beda', 'perbedaan', 'mengapa'}, True),
+    ('jangka_panjang', "model ini bisa digunakan untuk memprediksi lebih dari 5 tahun",
+     {'10', 'sepuluh', 'panjang'},
+     {'jangka', 'lebih', 'lama', 'prediksi', 'memprediksi', 'tahun'}, True),
+    ('saran_akurasi', "cara meningkatkan akurasi model ini",
+     {'meningkatkan', 'tingkatkan', 'memperbaiki', 'saran'},
+     {'akurasi', 'model', 'cara', 'prediksi'}, True),
+]
+
+@st.cache_resource
+def _get_intent_router():
+    """
+    Menyusun (sekali per proses server) seluruh pola regex dan himpunan kata kunci
+    yang dipakai router intent, sehingga tidak dikompilasi ulang di setiap rerun.
+    """
+    intents = []
+    for nama, frasa, kunci, pendukung, butuh_data in _INTENT_DEFINITIONS:
+        intents.append({
+            'nama': nama,
+            'frasa': re.compile(re.escape(frasa)),
+            'kunci': frozenset(kunci),
+            'pendukung': frozenset(pendukung),
+            'butuh_data': butuh_data,
+        })
+    return {
+        'intents': intents,
+        'token': re.compile(r'\w+'),
+        'pola_bulan_tahun': re.compile(r'(januari|februari|maret|april|mei|juni|juli|agustus|september|oktober|november|desember)\s+(\d{4})'),
+        'pola_grafik': re.compile(r'grafik|diagram'),
+    }
+
+def route_chatbot_intent(prompt):
+    """
+    Menentukan intent sebuah prompt secara lokal beserta skor keyakinannya.
+
+    Urutan pencocokan: frasa persis (keyakinan 1.0), pola bulan-tahun untuk pencarian
+    data (1.0), kata kunci grafik (0.9), lalu klasifikasi kata kunci sederhana
+    (0.55 - 0.95). Mengembalikan dict berisi 'intent', 'confidence', dan 'match';
+    'intent' bernilai None bila prompt sebaiknya diteruskan ke LLM.
+    """
+    router = _get_intent_router()
+    text = prompt.lower()
+    data_loaded = st.session_state.get('data_loaded', False)
+    keputusan = {'intent': None, 'confidence': 0.0, 'match': None}
+
+    for intent in router['intents']:
+        if intent['frasa'].search(text):
+            if intent['butuh_data'] and not data_loaded:
+                continue
+            return {'intent': intent['nama'], 'confidence': 1.0, 'match': None}
+
+    if data_loaded:
+        match = router['pola_bulan_tahun'].search(text)
+        if match:
+            return {'intent': 'data_bulan', 'confidence': 1.0, 'match': match}
+        if router['pola_grafik'].search(text):
+            return {'intent': 'grafik', 'confidence': 0.9, 'match': None}
+
+    tokens = set(router['token'].findall(text))
+    for intent in router['intents']:
+        if intent['butuh_data'] and not data_loaded:
+            continue
+        if not tokens & intent['kunci']:
+            continue
+        jumlah_pendukung = len(tokens & intent['pendukung'])
+        confidence = 0.55 + 0.4 * min(1.0, jumlah_pendukung / 2)
+        if confidence > keputusan['confidence']:
+            keputusan = {'intent': intent['nama'], 'confidence': confidence, 'match': None}
+
+    if keputusan['confidence'] < INTENT_CONFIDENCE_THRESHOLD:
+        keputusan['intent'] = None
+    return keputusan
+
+def _log_intent_decision(prompt, keputusan, durasi_us):
+    """Mencatat keputusan routing ke logger dan ke riwayat di session_state."""
+    tujuan = keputusan['intent'] or 'llm'
+    logger.info("Routing chatbot: intent=%s confidence=%.2f durasi=%.1fus prompt=%r",
+                tujuan, keputusan['confidence'], durasi_us, prompt[:80])
+    if 'intent_log' not in st.session_state:
+        st.session_state.intent_log = []
+    st.session_state.intent_log.append({
+        'prompt': prompt[:80],
+        'intent': tujuan,
+        'confidence': round(keputusan['confidence'], 2),
+        'durasi_us': round(durasi_us, 1),
+    })
+    del st.session_state.intent_log[:-INTENT_LOG_MAX]
+
 def handle_chatbot_response(prompt):
     """Fungsi utama untuk memproses respons chatbot."""
-    if 'data_loaded' in st.session_state:
-        if "kesimpulan dari hasil prediksi" in prompt.lower():
-            handle_summary_response()
-            return
-        elif "koefisien model regresi" in prompt.lower():
-            handle_coefficient_response()
-            return
-        elif "prediksi jumlah penumpang untuk 5 tahun ke depan" in prompt.lower():
-            handle_5_year_forecast_response()
-            return
-        elif "mape pada data training berbeda dengan data testing" in prompt.lower():
-            handle_mape_difference_response()
-            return
-        elif "model ini bisa digunakan untuk memprediksi lebih dari 5 tahun" in prompt.lower():
-            handle_long_term_prediction_response()
-            return
-        elif "cara meningkatkan akurasi model ini" in prompt.lower():
-            handle_improvement_response()
-            return
-        elif handle_specific_data_query(prompt):
-            return
-        elif handle_graph_request(prompt):
-            return
-    
+    start = time.perf_counter()
+    keputusan = route_chatbot_intent(prompt)
+    _log_intent_decision(prompt, keputusan, (time.perf_counter() - start) * 1e6)
+
+    handlers = {
+        'ringkasan': handle_summary_response,
+        'koefisien': handle_coefficient_response,
+        'prediksi_5_tahun': handle_5_year_forecast_response,
+        'beda_mape': handle_mape_difference_response,
+        'jangka_panjang': handle_long_term_prediction_response,
+        'saran_akurasi': handle_improvement_response,
+    }
+    intent = keputusan['intent']
+    if intent in handlers:
+        handlers[intent]()
+        return
+    elif intent == 'data_bulan' and handle_specific_data_query(prompt, keputusan['match']):
+        return
+    elif intent == 'grafik' and handle_graph_request(prompt):
+        return
+
     send_to_groq(prompt)
 
 def show_chatbot_page():
-    """Menampilkan antarmuka chatbot dengan Groq API."""
+    """Menampilkan antarmuka chatbot dengan backend LLM yang dipilih."""
     st.title("🤖 Asisten AI: Tanya Tentang Aplikasi Ini")
     st.info("Anda bisa bertanya tentang konsep statistik, interpretasi hasil, atau cara menggunakan aplikasi ini.")
     
-    if groq_client is None:
-        st.warning("Integrasi chatbot tidak aktif. Harap pastikan GROQ_API_KEY sudah diatur dengan benar di file .streamlit/secrets.toml")
-        return
+    if not groq_api_key and not LLM_LOCAL_BASE_URL:
+        st.warning("GROQ_API_KEY belum diatur di file .streamlit/secrets.toml. Chatbot berjalan dengan backend offline (template).")
 
     # Inisialisasi riwayat chat
     if "groq_messages" not in st.session_state:
         st.session_state.groq_messages = []
 
+    _chatbot_settings_fragment()
+    _chatbot_conversation_fragment()
+
+@st.fragment
+def _chatbot_settings_fragment():
+    """Pengaturan backend dan statistik cache; interaksi di sini hanya menjalankan ulang bagian ini."""
+    backends = get_llm_backends()
+    with st.expander("Backend AI & Perbandingan", expanded=False):
+        backend_names = list(backends)
+        default_name = st.session_state.get('llm_backend', LLM_BACKEND)
+        st.session_state.llm_backend = st.selectbox(
+            "Pilih backend chatbot:",
+            backend_names,
+            index=backend_names.index(default_name) if default_name in backend_names else 0,
+            format_func=lambda name: backends[name].label,
+            key="select_llm_backend",
+        )
+        st.dataframe(pd.DataFrame([backend.stats() for backend in backends.values()]).style.format({
+            'latensi_rata2_s': '{:.3f}',
+            'ttft_rata2_s': '{:.3f}',
+            'token_per_detik': '{:.1f}',
+        }))
+        if st.button("Bandingkan Semua Backend", key="btn_benchmark_llm"):
+            with st.spinner("Menjalankan pertanyaan uji ke setiap backend..."):
+                df_benchmark = benchmark_llm_backends(
+                    backends.values(), [{"role": "user", "content": LLM_BENCHMARK_PROMPT}]
+                )
+            st.dataframe(df_benchmark.style.format({
+                'Latensi (s)': '{:.3f}',
+                'TTFT (s)': '{:.3f}',
+                'Token/detik': '{:.1f}',
+            }))
+
+    with st.expander("Statistik Cache Respons AI", expanded=False):
+        cache_stats = get_llm_response_cache().stats()
+        stat_col1, stat_col2, stat_col3 = st.columns(3)
+        stat_col1.metric("Hit Rate", f"{_format_indonesian_numeric(cache_stats['hit_rate'], 1)}%")
+        stat_col2.metric("Hit / Miss", f"{cache_stats['hits']} / {cache_stats['misses']}")
+        stat_col3.metric("Jawaban Tersimpan", cache_stats['entries'])
+        st.caption(f"Jawaban disimpan selama {LLM_CACHE_TTL_SECONDS // 60} menit, maksimum {LLM_CACHE_MAX_ENTRIES} entri (LRU).")
+        if st.button("Kosongkan Cache", key="btn_clear_llm_cache"):
+            get_llm_response_cache().clear()
+
+@st.fragment
+def _chatbot_conversation_fragment():
+    """
+    Tombol pertanyaan cepat, riwayat, dan input chat. Mengirim pesan hanya
+    menjalankan ulang fragmen ini, bukan header, sidebar, atau halaman lain.
+    """
+    with instrument('fragmen.chatbot'):
+        _render_chatbot_conversation()
+
+def _render_chatbot_conversation():
+    """Isi fragmen percakapan chatbot."""
     # --- BAGIAN BARU: Tombol Pertanyaan yang Direkomendasikan ---
     if 'data_loaded' in st.session_state and st.session_state.data_loaded:
         st.subheader("Pertanyaan Cepat:")
@@ -439,135 +870,624 @@ def show_chatbot_page():
             st.markdown(prompt)
         handle_chatbot_response(prompt)
 
+# --- Cache Respons LLM ---
+# Masa berlaku jawaban yang disimpan (detik) dan kapasitas maksimum cache
+LLM_CACHE_TTL_SECONDS = 3600
+LLM_CACHE_MAX_ENTRIES = 256
+# Jumlah pesan terakhir dari riwayat chat yang ikut menentukan kunci cache
+LLM_CACHE_TAIL_MESSAGES = 4
+
+class LLMResponseCache:
+    """
+    Cache LRU dengan TTL untuk jawaban LLM, dibagikan ke semua sesi dalam satu
+    proses server. Kunci cache adalah pasangan (hash konteks, ekor percakapan
+    yang dinormalisasi).
+    """
+
+    def __init__(self, max_entries=LLM_CACHE_MAX_ENTRIES, ttl_seconds=LLM_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Mengembalikan jawaban yang tersimpan, atau None bila tidak ada/kedaluwarsa."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] > self.ttl_seconds:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, response):
+        """Menyimpan jawaban dan membuang entri yang paling lama tidak dipakai."""
+        with self._lock:
+            self._entries[key] = (time.monotonic(), response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Metrik cache: jumlah hit/miss, hit rate (%), entri, dan eviksi."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits / total * 100) if total else 0.0,
+                'entries': len(self._entries),
+                'evictions': self.evictions,
+            }
+
+@st.cache_resource
+def get_llm_response_cache():
+    """Instance cache respons LLM bersama untuk seluruh sesi."""
+    return LLMResponseCache()
+
+def _normalize_chat_text(text):
+    """Normalisasi teks untuk kunci cache: huruf kecil, spasi tunggal, tanpa tanda baca di ujung."""
+    return " ".join(text.lower().split()).strip(" ?!.,")
+
+def _llm_cache_key(context_prompt, messages):
+    """Menyusun kunci cache dari hash konteks model dan ekor percakapan yang dinormalisasi."""
+    context_hash = hashlib.sha256((context_prompt or "").encode("utf-8")).hexdigest()
+    tail = tuple(
+        (m["role"], _normalize_chat_text(m["content"]))
+        for m in messages[-LLM_CACHE_TAIL_MESSAGES:]
+    )
+    return context_hash, tail
+
+# --- Penyusun Konteks LLM dengan Anggaran Token ---
+# Anggaran token untuk seluruh prompt (konteks sistem + riwayat chat)
+LLM_CONTEXT_TOKEN_BUDGET = 3000
+# Jumlah pesan terakhir yang dikirim utuh; pesan yang lebih lama diringkas
+LLM_HISTORY_FULL_MESSAGES = 6
+# Jumlah maksimum pertanyaan lama yang dimasukkan ke ringkasan percakapan
+LLM_HISTORY_SUMMARY_QUESTIONS = 8
+# Jumlah baris data testing dengan selisih terbesar yang dilampirkan ke konteks
+LLM_CONTEXT_SAMPLE_ROWS = 5
+# Jumlah maksimum laporan ukuran prompt yang disimpan di session_state
+LLM_PROMPT_LOG_MAX = 200
+
+LLM_SYSTEM_INSTRUCTION = """Anda adalah asisten AI yang ahli dalam statistik dan prediksi regresi. Jawab pertanyaan pengguna tentang hasil prediksi secara akurat, terperinci, dan relevan.
+Aplikasi memprediksi jumlah penumpang KRL Commuter Line Jabodetabek dengan regresi linier berganda: cek korelasi, uji asumsi klasik (normalitas, homoskedastisitas, non-multikolinieritas), latih model pada data training, prediksi data testing dan 5 tahun ke depan, lalu nilai akurasi dengan MAPE/MAE untuk membantu PT KAI mengambil keputusan.
+Satuan: Penumpang (000) dalam ribuan orang (39.861 = 39.861.000 penumpang); Total Jarak Tempuh dalam juta km (2.234 = 2.234.000.000 km); Rata-rata Jarak dalam km.
+Kategori MAPE: <10% Sangat Akurat; 10-20% Akurat; 20-50% Cukup Akurat; >50% Tidak Akurat."""
+
+def estimate_tokens(text):
+    """
+    Perkiraan jumlah token sebuah teks (sekitar 4 karakter per token), cukup
+    akurat untuk menegakkan anggaran tanpa memuat tokenizer model.
+    """
+    return (len(text) + 3) // 4
+
+@st.cache_data(show_spinner=False)
+def _build_model_diagnostics_context(df_training, df_testing, features, y_pred_testing, metrics):
+    """
+    Meringkas hasil model menjadi teks terstruktur yang ringkas untuk prompt LLM.
+    Mengembalikan (bagian_inti, bagian_sampel); bagian sampel boleh dibuang saat
+    anggaran token terlampaui. Hasil di-cache per data sehingga OLS dan VIF tidak
+    dihitung ulang di setiap pertanyaan.
+    """
+    mae_training, mape_training, mae_testing, mape_testing = metrics
+    features = list(features)
+
+    if mape_testing <= 10:
+        accuracy_status = "Sangat Akurat"
+    elif mape_testing <= 20:
+        accuracy_status = "Akurat"
+    elif mape_testing <= 50:
+        accuracy_status = "Cukup Akurat"
+    else:
+        accuracy_status = "Tidak Akurat"
+
+    # OLS, VIF, dan uji asumsi diambil dari cache yang sama dengan halaman Analisis Data
+    hasil_asumsi, error = uji_asumsi_klasik(df_training, tuple(features))
+    if error:
+        raise ValueError(error)
+    model_ols = hasil_asumsi['ols']
+
+    lines = [
+        f"MODEL: OLS, n_training={len(df_training)}, n_testing={len(df_testing)}",
+        f"METRIK: MAE_train={mae_training:.2f}; MAPE_train={mape_training:.2f}%; "
+        f"MAE_test={mae_testing:.2f}; MAPE_test={mape_testing:.2f}% ({accuracy_status})",
+        f"R2={model_ols.rsquared:.4f}; adjR2={model_ols.rsquared_adj:.4f}; "
+        f"F={model_ols.fvalue:.2f}; p(F)={model_ols.f_pvalue:.3g}",
+        "KOEFISIEN (coef | std err | p):",
+    ]
+    for name in model_ols.params.index:
+        lines.append(f"- {name}: {model_ols.params[name]:.4g} | {model_ols.bse[name]:.3g} | {model_ols.pvalues[name]:.3g}")
+    lines.append("VIF: " + "; ".join(f"{r['Variabel']}={r['VIF']:.2f}" for _, r in hasil_asumsi['vif'].iterrows()))
+    lines.append("UJI ASUMSI: " + ringkasan_uji_asumsi(hasil_asumsi['tabel']))
+    core = "\n".join(lines)
+
+    aktual = df_testing['Penumpang (000)'].to_numpy()
+    selisih = np.abs(aktual - np.asarray(y_pred_testing))
+    terbesar = np.argsort(selisih)[::-1][:LLM_CONTEXT_SAMPLE_ROWS]
+    sample_lines = [f"SAMPEL TESTING (selisih terbesar dari {len(df_testing)} bulan; Bulan Tahun: aktual | prediksi | selisih):"]
+    for i in terbesar:
+        row = df_testing.iloc[i]
+        sample_lines.append(f"- {row['Bulan']} {int(row['Tahun'])}: {aktual[i]:.0f} | {y_pred_testing[i]:.0f} | {selisih[i]:.0f}")
+    return core, "\n".join(sample_lines)
+
+def _summarize_old_messages(messages):
+    """Meringkas pesan lama menjadi satu baris berisi pertanyaan-pertanyaan terakhir pengguna."""
+    questions = [" ".join(m["content"].split())[:80] for m in messages if m["role"] == "user"]
+    questions = questions[-LLM_HISTORY_SUMMARY_QUESTIONS:]
+    if not questions:
+        return ""
+    return "Ringkasan percakapan sebelumnya, pengguna telah bertanya: " + "; ".join(questions)
+
+def build_llm_messages(system_sections, history, token_budget=LLM_CONTEXT_TOKEN_BUDGET):
+    """
+    Menyusun daftar pesan untuk LLM dalam batas anggaran token.
+
+    `system_sections` adalah list (teks, wajib); bagian yang tidak wajib dibuang
+    lebih dulu bila anggaran terlampaui. Pesan lama di luar
+    LLM_HISTORY_FULL_MESSAGES diringkas, lalu bila masih terlalu besar ringkasan
+    dan pesan tertua dibuang (pesan terakhir selalu dikirim).
+    Mengembalikan (messages, laporan_ukuran).
+    """
+    sections = [text for text, _ in system_sections if text]
+    optional = [text for text, wajib in system_sections if text and not wajib]
+    recent = [{"role": m["role"], "content": m["content"]} for m in history[-LLM_HISTORY_FULL_MESSAGES:]]
+    summary = _summarize_old_messages(history[:-LLM_HISTORY_FULL_MESSAGES])
+
+    def total_tokens():
+        system_text = "\n\n".join(sections + ([summary] if summary else []))
+        return estimate_tokens(system_text) + sum(estimate_tokens(m["content"]) for m in recent)
+
+    trimmed = False
+    while total_tokens() > token_budget and optional:
+        sections.remove(optional.pop())
+        trimmed = True
+    if total_tokens() > token_budget and summary:
+        summary = ""
+        trimmed = True
+    while total_tokens() > token_budget and len(recent) > 1:
+        recent.pop(0)
+        trimmed = True
+
+    system_text = "\n\n".join(sections + ([summary] if summary else []))
+    messages = [{"role": "system", "content": system_text}] + recent
+    report = {
+        'token_sistem': estimate_tokens(system_text),
+        'token_riwayat': sum(estimate_tokens(m["content"]) for m in recent),
+        'pesan_utuh': len(recent),
+        'pesan_diringkas': max(0, len(history) - LLM_HISTORY_FULL_MESSAGES),
+        'dipangkas': trimmed,
+        'anggaran': token_budget,
+    }
+    report['token_total'] = report['token_sistem'] + report['token_riwayat']
+    return messages, report
+
+# --- Klien Streaming LLM (Non-blocking) ---
+# Batas waktu menunggu token pertama, jeda antar potongan, dan total durasi jawaban (detik)
+LLM_FIRST_TOKEN_TIMEOUT = 30
+LLM_CHUNK_TIMEOUT = 15
+LLM_TOTAL_TIMEOUT = 180
+# Jumlah percobaan ulang bila koneksi gagal sebelum ada teks yang diterima
+LLM_MAX_RETRIES = 2
+LLM_RETRY_BACKOFF = 0.5
+# Irama pembaruan UI: tampilkan ulang jawaban setiap interval ini atau setelah sejumlah karakter baru
+LLM_FLUSH_INTERVAL = 0.1
+LLM_FLUSH_CHARS = 200
+
+class LLMStreamTimeout(Exception):
+    """Dilempar ketika stream LLM tidak mengirim data dalam batas waktu."""
+
+# --- Backend LLM ---
+class LLMBackend:
+    """
+    Antarmuka dasar backend chatbot. Subkelas cukup mengimplementasikan
+    `_stream(messages, usage)` yang menghasilkan potongan teks dan boleh mengisi
+    `usage` dengan jumlah token yang dilaporkan server. Kelas dasar mencatat
+    latensi dan jumlah token setiap permintaan.
+    """
+
+    name = "base"
+    label = "Backend"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {
+            'permintaan': 0, 'gagal': 0, 'latensi_total': 0.0, 'ttft_total': 0.0,
+            'token_prompt': 0, 'token_jawaban': 0,
+        }
+
+    def _stream(self, messages, usage):
+        raise NotImplementedError
+
+    def stream(self, messages):
+        """Menghasilkan potongan teks jawaban sambil mencatat latensi dan token."""
+        usage = {}
+        parts = []
+        start = time.perf_counter()
+        first_token = None
+        failed = True
+        try:
+            for piece in self._stream(messages, usage):
+                if piece and first_token is None:
+                    first_token = time.perf_counter() - start
+                parts.append(piece)
+                yield piece
+            failed = False
+        finally:
+            latency = time.perf_counter() - start
+            prompt_tokens = usage.get('prompt_tokens') or sum(estimate_tokens(m["content"]) for m in messages)
+            completion_tokens = usage.get('completion_tokens') or estimate_tokens("".join(parts))
+            with self._lock:
+                self._stats['permintaan'] += 1
+                self._stats['gagal'] += int(failed)
+                self._stats['latensi_total'] += latency
+                self._stats['ttft_total'] += first_token if first_token is not None else latency
+                self._stats['token_prompt'] += prompt_tokens
+                self._stats['token_jawaban'] += completion_tokens
+
+    def stats(self):
+        """Ringkasan akuntansi: rata-rata latensi, time-to-first-token, dan token per detik."""
+        with self._lock:
+            stats = dict(self._stats)
+        n = stats['permintaan']
+        return {
+            'backend': self.label,
+            'permintaan': n,
+            'gagal': stats['gagal'],
+            'latensi_rata2_s': stats['latensi_total'] / n if n else 0.0,
+            'ttft_rata2_s': stats['ttft_total'] / n if n else 0.0,
+            'token_prompt': stats['token_prompt'],
+            'token_jawaban': stats['token_jawaban'],
+            'token_per_detik': stats['token_jawaban'] / stats['latensi_total'] if stats['latensi_total'] else 0.0,
+        }
+
+class GroqBackend(LLMBackend):
+    """Adapter untuk Groq API (streaming)."""
+
+    name = "groq"
+
+    def __init__(self, api_key, model=LLM_GROQ_MODEL):
+        super().__init__()
+        self.client = Groq(api_key=api_key)
+        self.model = model
+        self.label = f"Groq ({model})"
+
+    def _stream(self, messages, usage):
+        completion = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            stream=True,
+            timeout=LLM_CHUNK_TIMEOUT,
+        )
+        try:
+            for chunk in completion:
+                x_groq = getattr(chunk, 'x_groq', None)
+                if x_groq is not None and x_groq.usage is not None:
+                    usage['prompt_tokens'] = x_groq.usage.prompt_tokens
+                    usage['completion_tokens'] = x_groq.usage.completion_tokens
+                if chunk.choices:
+                    yield chunk.choices[0].delta.content or ""
+        finally:
+            completion.close()
+
+class OpenAICompatibleBackend(LLMBackend):
+    """
+    Adapter HTTP untuk server inferensi lokal yang mengikuti OpenAI Chat
+    Completions API (endpoint /v1/chat/completions dengan stream SSE).
+    Hanya memakai pustaka standar sehingga cocok untuk deployment air-gapped.
+    """
+
+    name = "openai_compat"
+
+    def __init__(self, base_url, model=LLM_LOCAL_MODEL, api_key=None):
+        super().__init__()
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.api_key = api_key
+        self.label = f"Server Lokal ({model})"
+
+    def _stream(self, messages, usage):
+        body = json.dumps({
+            "model": self.model,
+            "messages": messages,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(f"{self.base_url}/v1/chat/completions", data=body, headers=headers)
+        with urllib.request.urlopen(request, timeout=LLM_CHUNK_TIMEOUT) as response:
+            for raw_line in response:
+                line = raw_line.decode("utf-8").strip()
+                if not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                if event.get("usage"):
+                    usage['prompt_tokens'] = event["usage"].get("prompt_tokens")
+                    usage['completion_tokens'] = event["usage"].get("completion_tokens")
+                for choice in event.get("choices") or []:
+                    yield (choice.get("delta") or {}).get("content") or ""
+
+class TemplateBackend(LLMBackend):
+    """
+    Backend offline deterministik: menyusun jawaban dari ringkasan model di
+    konteks sistem tanpa jaringan. Dipakai saat tidak ada API key dan untuk pengujian.
+    """
+
+    name = "template"
+    label = "Offline (Template)"
+
+    def __init__(self, delay=0.0):
+        super().__init__()
+        self.delay = delay
+
+    def _stream(self, messages, usage):
+        system_text = messages[0]["content"] if messages and messages[0]["role"] == "system" else ""
+        question = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+        facts = [line for line in system_text.splitlines() if line.startswith(("MODEL:", "METRIK:", "R2="))]
+        text = f'Pertanyaan Anda: "{" ".join(question.split())[:200]}"\n\n'
+        if facts:
+            text += "Ringkasan model yang sedang aktif:\n" + "\n".join(f"- {fact}" for fact in facts) + "\n\n"
+        text += (
+            "Jawaban ini dibuat oleh backend offline tanpa model bahasa. Untuk analisis yang lebih "
+            "mendalam, aktifkan backend Groq atau server inferensi lokal."
+        )
+        for word in text.split(" "):
+            if self.delay:
+                time.sleep(self.delay)
+            yield word + " "
+
+@st.cache_resource
+def get_llm_backends():
+    """Daftar backend yang terkonfigurasi, dibuat sekali per proses server."""
+    backends = {}
+    if groq_api_key:
+        backends[GroqBackend.name] = GroqBackend(groq_api_key)
+    if LLM_LOCAL_BASE_URL:
+        backends[OpenAICompatibleBackend.name] = OpenAICompatibleBackend(
+            LLM_LOCAL_BASE_URL, LLM_LOCAL_MODEL, LLM_LOCAL_API_KEY
+        )
+    backends[TemplateBackend.name] = TemplateBackend()
+    return backends
+
+def get_active_llm_backend():
+    """Backend yang dipilih pengguna di sesi ini, atau backend default dari konfigurasi."""
+    backends = get_llm_backends()
+    name = st.session_state.get('llm_backend', LLM_BACKEND)
+    return backends.get(name) or next(iter(backends.values()))
+
+LLM_BENCHMARK_PROMPT = "Jelaskan secara singkat arti nilai MAPE pada model regresi."
+
+def benchmark_llm_backends(backends, messages, repeats=1):
+    """Menjalankan pesan yang sama ke setiap backend dan mengembalikan tabel latensi/token."""
+    rows = []
+    for backend in backends:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            first_token = None
+            text = ""
+            error = ""
+            try:
+                for piece in backend.stream(messages):
+                    if piece and first_token is None:
+                        first_token = time.perf_counter() - start
+                    text += piece
+            except Exception as e:
+                error = str(e)
+            latency = time.perf_counter() - start
+            tokens = estimate_tokens(text)
+            rows.append({
+                'Backend': backend.label,
+                'Latensi (s)': latency,
+                'TTFT (s)': first_token if first_token is not None else latency,
+                'Token Jawaban': tokens,
+                'Token/detik': tokens / latency if latency else 0.0,
+                'Error': error,
+            })
+    return pd.DataFrame(rows)
+
+def stream_llm_response(stream_factory, on_flush, cancel_event=None,
+                        first_token_timeout=LLM_FIRST_TOKEN_TIMEOUT,
+                        chunk_timeout=LLM_CHUNK_TIMEOUT,
+                        total_timeout=LLM_TOTAL_TIMEOUT,
+                        max_retries=LLM_MAX_RETRIES):
+    """
+    Membaca stream LLM di thread pekerja sehingga thread skrip Streamlit hanya
+    menunggu antrean dengan batas waktu dan tidak pernah terblokir oleh stream
+    yang macet.
+
+    `stream_factory()` harus mengembalikan iterator potongan teks; ia dipanggil
+    ulang (dengan backoff) bila gagal sebelum ada teks diterima. `on_flush(teks,
+    selesai)` dipanggil paling sering setiap LLM_FLUSH_INTERVAL detik atau
+    LLM_FLUSH_CHARS karakter baru, bukan di setiap potongan. Pembatalan lewat
+    `cancel_event`, termasuk otomatis ketika skrip dihentikan oleh rerun.
+    Mengembalikan teks jawaban lengkap.
+    """
+    cancel_event = cancel_event or threading.Event()
+    chunks = queue.Queue()
+
+    def worker():
+        for attempt in range(max_retries + 1):
+            received = False
+            try:
+                stream = stream_factory()
+                try:
+                    for piece in stream:
+                        if cancel_event.is_set():
+                            break
+                        if piece:
+                            received = True
+                            chunks.put(('chunk', piece))
+                finally:
+                    close = getattr(stream, 'close', None)
+                    if close is not None:
+                        close()
+                chunks.put(('done', None))
+                return
+            except Exception as e:
+                if received or attempt == max_retries or cancel_event.is_set():
+                    chunks.put(('error', e))
+                    return
+                logger.warning("Stream LLM gagal (percobaan %d): %s", attempt + 1, e)
+                cancel_event.wait(LLM_RETRY_BACKOFF * (2 ** attempt))
+
+    threading.Thread(target=worker, daemon=True).start()
+
+    parts = []
+    pending_chars = 0
+    started = time.monotonic()
+    last_flush = last_chunk = started
+    try:
+        while True:
+            now = time.monotonic()
+            if now - started >= total_timeout:
+                raise LLMStreamTimeout("Batas waktu total jawaban terlampaui.")
+            if now - last_chunk >= (chunk_timeout if parts else first_token_timeout):
+                raise LLMStreamTimeout("Layanan LLM tidak merespons dalam batas waktu.")
+            try:
+                kind, payload = chunks.get(timeout=LLM_FLUSH_INTERVAL)
+            except queue.Empty:
+                if pending_chars:
+                    on_flush("".join(parts), False)
+                    pending_chars = 0
+                    last_flush = time.monotonic()
+                continue
+
+            last_chunk = time.monotonic()
+            if kind == 'error':
+                raise payload
+            if kind == 'done':
+                break
+            parts.append(payload)
+            pending_chars += len(payload)
+            now = time.monotonic()
+            if pending_chars >= LLM_FLUSH_CHARS or now - last_flush >= LLM_FLUSH_INTERVAL:
+                on_flush("".join(parts), False)
+                pending_chars = 0
+                last_flush = now
+    finally:
+        cancel_event.set()
+
+    full_response = "".join(parts)
+    on_flush(full_response, True)
+    return full_response
+
 def send_to_groq(prompt):
-    """Mengirim prompt ke Groq API dan menampilkan respons."""
+    """Mengirim prompt ke backend LLM aktif (Groq, server lokal, atau offline) dan menampilkan respons."""
     if 'model_results' in st.session_state and st.session_state.data_loaded:
         results = st.session_state.model_results
-        
-        # --- MODIFIKASI: Mendapatkan data untuk dimasukkan ke prompt ---
-        mape_training = results['mape_training']
-        mape_testing = results['mape_testing']
-        mae_training = results['mae_training']
-        mae_testing = results['mae_testing']
-        
-        # Lakukan perhitungan VIF
-        X_vif = st.session_state.df_training[results['features']]
-        vif_data = pd.DataFrame()
-        vif_data["feature"] = X_vif.columns
-        vif_data["VIF"] = [variance_inflation_factor(X_vif.values, i) for i in range(len(X_vif.columns))]
-        vif_text = vif_data.to_markdown(index=False)
-        
-        # Dapatkan status akurasi model
-        mape_category_data = {
-            'Nilai': ['<10%', '10% - 20%', '20% - 50%', '>50%'],
-            'Kategori Peramalan': ['Sangat Akurat', 'Akurat', 'Cukup Akurat', 'Tidak Akurat']
-        }
-        mape_category_df = pd.DataFrame(mape_category_data)
-        
-        accuracy_status = ""
-        mape_testing_real = results['mape_testing']
-        if mape_testing_real <= 10:
-            accuracy_status = "Sangat Akurat (< 10%)"
-        elif mape_testing_real <= 20:
-            accuracy_status = "Akurat (10% - 20%)"
-        elif mape_testing_real <= 50:
-            accuracy_status = "Cukup Akurat (20% - 50%)"
-        else:
-            accuracy_status = "Tidak Akurat (> 50%)"
-        
-        # Dapatkan ringkasan OLS
-        X = st.session_state.df_training[results['features']]
-        y = st.session_state.df_training['Penumpang (000)']
-        X_with_const = sm.add_constant(X)
-        model_ols = sm.OLS(y, X_with_const).fit()
-        ols_summary = model_ols.summary().as_text()
-
-        # Dapatkan sampel data prediksi testing
-        df_testing_sample = st.session_state.df_testing[['Bulan', 'Tahun', 'Penumpang (000)', 'Bulan ke-n']].copy()
-        df_testing_sample['Y_Prediksi'] = results['y_pred_testing']
-        df_testing_sample['Selisih'] = np.abs(df_testing_sample['Penumpang (000)'] - df_testing_sample['Y_Prediksi'])
-        
-        # --- BAGIAN BARU: CONTEXT PROMPT YANG LEBIH LENGKAP ---
-        context_prompt = f"""
-        Anda adalah asisten AI yang ahli dalam statistik dan prediksi regresi. Anda akan menjawab pertanyaan pengguna terkait hasil prediksi yang baru saja dibuat. Gunakan semua informasi dan konteks berikut untuk memberikan jawaban yang akurat, terperinci, dan relevan.
-
-        ---
-
-        ### **Tujuan dan Proses Aplikasi**
-        Aplikasi ini melakukan prediksi jumlah penumpang KRL Commuter Line Jabodetabek menggunakan algoritma regresi linier berganda berdasarkan data historis yang diupload. Aplikasi telah melalui serangkaian proses:
-        1.  Pengecekan korelasi antar variabel.
-        2.  Uji asumsi klasik (Normalitas, Homoskedastisitas, Non-Multikolinieritas).
-        3.  Pembuatan model regresi berdasarkan data training.
-        4.  Melakukan prediksi pada data testing dan data 5 tahun ke depan.
-        5.  Menentukan akurasi hasil prediksi berdasarkan nilai MAPE dan MAE pada data training dan data testing dengan memperhatikan kategori nilai MAPE pada tingkat angka berapa nilai MAPE tersebut tergolong.
-        6.  Memaparkan hasilnya dengan membandingkan juga antara data aktual dengan data prediksi pada perhitungan.
-        7.  Lalu menyimpulkannya dengan mengecek antara nilai prediksi dengan nilai aktual didunia nyata apakah hasil prediksi ini baik atau tidak untuk membantu pengelola pihak PT KAI dalam mengambil keputusan.
-
-        ---
-
-        ### **Konteks Dataset di Dunia Nyata**
-        - **`Penumpang (000)`:** Angka dalam ribuan orang. Contoh: 39.861 berarti 39.861.000 penumpang.
-        - **`Total Jarak Tempuh Penumpang (000.000 km)`:** Angka dalam juta kilometer. Contoh: 2.234 berarti 2.234.000.000 km.
-        - **`Rata-rata Jarak Perjalanan Per Penumpang (km)`:** Angka dalam kilometer. Contoh: 56 berarti 56 km per penumpang.
-
-        ---
-
-        ### **Hasil Analisis dan Evaluasi Model**
-        - **Status Akurasi Model**: {accuracy_status}
-        - **Tabel Kategori Akurasi MAPE**:
-        {mape_category_df.to_markdown(index=False)}
-        - **MAE (Mean Absolute Error) Training:** {mae_training}
-        - **MAPE (Mean Absolute Percentage Error) Training:** {mape_training}%
-        - **MAE (Mean Absolute Error) Testing:** {mae_testing}
-        - **MAPE (Mean Absolute Percentage Error) Testing:** {mape_testing}%
-        - **Ringkasan Koefisien Model**: {model_ols.summary2().tables[1].to_markdown()}
-        - **Nilai VIF (untuk Multikolinieritas)**:
-        {vif_text}
-        
-        - **Sampel Hasil Prediksi (Data Testing)**:
-        {df_testing_sample.to_markdown(index=False)}
-
-        ---
-        
-        Berdasarkan semua informasi di atas, jawablah pertanyaan pengguna dengan analisis yang mendalam dan relevan.
-        """
+        with instrument('llm.bangun_konteks'):
+            core_context, sample_context = _build_model_diagnostics_context(
+                st.session_state.df_training,
+                st.session_state.df_testing,
+                tuple(results['features']),
+                np.asarray(results['y_pred_testing']),
+                (results['mae_training'], results['mape_training'], results['mae_testing'], results['mape_testing']),
+            )
+        system_sections = [
+            (LLM_SYSTEM_INSTRUCTION, True),
+            ("### Hasil Analisis dan Evaluasi Model\n"
+             f"MODEL AKTIF: {results.get('jenis_model', 'OLS')}\n" + core_context, True),
+            (sample_context, False),
+        ]
     else:
-        context_prompt = "Belum ada data yang diunggah dan diproses. Anda hanya bisa menjawab pertanyaan umum."
+        system_sections = [
+            (LLM_SYSTEM_INSTRUCTION, True),
+            ("Belum ada data yang diunggah dan diproses. Anda hanya bisa menjawab pertanyaan umum.", True),
+        ]
+
+    with instrument('llm.susun_prompt') as rec:
+        messages_to_send, prompt_report = build_llm_messages(system_sections, st.session_state.groq_messages)
+        rec['rows'] = prompt_report['token_total']
+    context_prompt = messages_to_send[0]["content"]
+    logger.info("Ukuran prompt LLM: %d token (sistem %d, riwayat %d, anggaran %d)",
+                prompt_report['token_total'], prompt_report['token_sistem'],
+                prompt_report['token_riwayat'], prompt_report['anggaran'])
+    if 'prompt_size_log' not in st.session_state:
+        st.session_state.prompt_size_log = []
+    st.session_state.prompt_size_log.append(prompt_report)
+    del st.session_state.prompt_size_log[:-LLM_PROMPT_LOG_MAX]
 
     with st.chat_message("assistant"):
         message_placeholder = st.empty()
-        full_response = ""
-        
-        messages_to_send = []
-        if context_prompt:
-            messages_to_send.append({"role": "system", "content": context_prompt})
-        
-        messages_to_send.extend([
-            {"role": m["role"], "content": m["content"]}
-            for m in st.session_state.groq_messages
-        ])
-        
+
+        backend = get_active_llm_backend()
+        response_cache = get_llm_response_cache()
+        cache_key = _llm_cache_key(f"{backend.label}\n{context_prompt}", st.session_state.groq_messages)
+        cached_response = response_cache.get(cache_key)
+        if cached_response is not None:
+            message_placeholder.markdown(cached_response)
+            st.session_state.groq_messages.append({"role": "assistant", "content": cached_response})
+            return
+
+        # Batalkan stream lama dari sesi ini yang mungkin masih berjalan
+        previous_cancel = st.session_state.get('llm_cancel_event')
+        if previous_cancel is not None:
+            previous_cancel.set()
+        cancel_event = threading.Event()
+        st.session_state.llm_cancel_event = cancel_event
+        st.button("⏹️ Hentikan Jawaban", key="btn_cancel_llm")
+
+        shown = {'text': ""}
+        def on_flush(text, done):
+            shown['text'] = text
+            message_placeholder.markdown(text if done else text + "▌")
+
+        stream_factory = lambda: backend.stream(messages_to_send)
+
+        completed = False
         try:
-            completion = groq_client.chat.completions.create(
-                model="openai/gpt-oss-20b",
-                messages=messages_to_send,
-                stream=True,
-            )
-            
-            for chunk in completion:
-                full_response += (chunk.choices[0].delta.content or "")
-                message_placeholder.markdown(full_response + "▌")
-            message_placeholder.markdown(full_response)
+            with instrument(f'llm.stream.{backend.name}') as rec:
+                full_response = stream_llm_response(stream_factory, on_flush, cancel_event)
+                rec['rows'] = estimate_tokens(full_response)
+            completed = True
             
             st.session_state.groq_messages.append({"role": "assistant", "content": full_response})
+            if full_response:
+                response_cache.put(cache_key, full_response)
             
+        except LLMStreamTimeout as e:
+            st.error(f"Waktu tunggu jawaban habis: {e}")
         except Exception as e:
             st.error(f"Terjadi kesalahan saat memproses permintaan: {e}")
+        finally:
+            # Jawaban yang terpotong (dibatalkan, timeout, atau error) tetap disimpan di riwayat
+            if not completed and shown['text']:
+                st.session_state.groq_messages.append(
+                    {"role": "assistant", "content": shown['text'] + " _(jawaban terhenti)_"}
+                )
+
+        st.caption(
+            f"Ukuran prompt: ~{prompt_report['token_total']} token "
+            f"(sistem {prompt_report['token_sistem']}, riwayat {prompt_report['token_riwayat']}; "
+            f"anggaran {prompt_report['anggaran']})"
+        )
 
-def predict_5_years(model, df_training):
-    """Melakukan prediksi 5 tahun ke depan dan menyimpan hasilnya di session_state."""
+def predict_5_years(model, df_training, opsi_fitur=None):
+    """
+    Melakukan prediksi 5 tahun ke depan dan menyimpan hasilnya di session_state.
+    Jika model memakai fitur lag (`opsi_fitur`), prediksi dilakukan rekursif per bulan.
+    """
     if not 'df_training' in st.session_state:
         return
+    df_testing = st.session_state.df_testing
 
     # Ambil rata-rata variabel independen (kecuali Bulan ke-n) dari data training
     avg_total_jarak = df_training['Total Jarak Tempuh Penumpang'].mean()
@@ -576,7 +1496,7 @@ def predict_5_years(model, df_training):
     avg_cuti_bersama = df_training['jumlah_cuti_bersama'].mean()
 
     # Buat DataFrame untuk 5 tahun ke depan (60 bulan)
-    start_month = len(df_training) + len(st.session_state.df_testing) + 1
+    start_month = len(df_training) + len(df_testing) + 1
     future_months = np.arange(start_month, start_month + 60)
     
     df_future = pd.DataFrame({
@@ -586,9 +1506,26 @@ def predict_5_years(model, df_training):
         'jumlah_libur_nasional': [avg_libur_nasional] * 60,
         'jumlah_cuti_bersama': [avg_cuti_bersama] * 60
     })
-    
+
+    # Bulan dan Tahun melanjutkan bulan terakhir data historis (testing, bila ada)
+    df_history = pd.concat([df_training, df_testing], ignore_index=True)
+    last_row = df_history.iloc[-1]
+    indeks_bulan = int(last_row['Tahun']) * 12 + BULAN_KE_ANGKA[last_row['Bulan']] - 1 + np.arange(1, 61)
+    df_future.insert(0, 'Bulan', [ANGKA_KE_BULAN[m] for m in indeks_bulan % 12 + 1])
+    df_future.insert(1, 'Tahun', indeks_bulan // 12)
+
+    # Fitur kalender masa depan diambil dari kalender yang sudah dihitung saat data diproses
+    features = list(getattr(model, 'feature_names_in_', FITUR_REGRESI))
+    if set(FITUR_KALENDER) & set(features):
+        kalender = _kalender_bulanan_cached(st.session_state.df_libur_train, st.session_state.df_libur_test,
+                                            int(st.session_state.df_training['Tahun'].min()))
+        df_future = pd.merge(df_future, kalender[['Bulan', 'Tahun'] + FITUR_KALENDER], on=['Bulan', 'Tahun'], how='left')
+
     # Lakukan prediksi
-    y_pred_future = model.predict(df_future)
+    if set(_nama_fitur_musiman(opsi_fitur)) & set(features):
+        y_pred_future = _prediksi_rekursif(model, df_history, df_future, {**OPSI_FITUR_DEFAULT, **opsi_fitur})
+    else:
+        y_pred_future = model.predict(df_future[features])
     
     # Tambahkan hasil prediksi ke DataFrame
     df_future['Penumpang (000)'] = y_pred_future
@@ -596,40 +1533,559 @@ def predict_5_years(model, df_training):
     st.session_state.df_future = df_future
     st.session_state.df_future.reset_index(drop=True, inplace=True)
     
-    # Tambahkan Bulan dan Tahun ke df_future
-    current_year = df_training['Tahun'].iloc[-1]
-    current_month_index = df_training['Bulan'].iloc[-1]
-    month_mapping = {
-        'Januari': 1, 'Februari': 2, 'Maret': 3, 'April': 4,
-        'Mei': 5, 'Juni': 6, 'Juli': 7, 'Agustus': 8,
-        'September': 9, 'Oktober': 10, 'November': 11, 'Desember': 12
-    }
-    reverse_month_mapping = {v: k for k, v in month_mapping.items()}
-    
-    start_month_num = month_mapping[current_month_index] + 1
-    start_year = current_year
-    
-    months = []
-    years = []
-    
-    for i in range(60):
-        month_num = (start_month_num + i - 1) % 12 + 1
-        months.append(reverse_month_mapping[month_num])
-        
-        year_to_add = (start_month_num + i - 1) // 12
-        years.append(start_year + year_to_add)
-
-    df_future.insert(0, 'Bulan', months)
-    df_future.insert(1, 'Tahun', years)
-    
 # --- Core Logic Functions ---
-def _read_penumpang_file(uploaded_files):
-    """
-    MODIFIKASI: Menerima list file dan menggabungkannya.
-    Fungsi untuk membaca data penumpang dalam format "wide".
-    """
-    if not uploaded_files:
-        return None, "Tidak ada file penumpang yang diunggah."
+# --- Pembaca Excel Cepat ---
+# Engine calamine (paket python-calamine, opsional) dipakai bila terpasang
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE_CEPAT = 'calamine'
+except ImportError:
+    EXCEL_ENGINE_CEPAT = None
+
+_NS_XLSX = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+def _indeks_kolom_xlsx(ref):
+    """Referensi sel ('AB12') ke indeks kolom berbasis nol (27)."""
+    n = 0
+    for ch in ref:
+        if ch.isdigit():
+            break
+        n = n * 26 + ord(ch) - 64
+    return n - 1
+
+def _angka_xlsx(teks):
+    try:
+        return int(teks)
+    except ValueError:
+        return float(teks)
+
+def _buka_lembar_xlsx(uploaded_file):
+    """
+    Membuka arsip xlsx, membaca shared strings, dan mencari path XML sheet
+    pertama. Mengembalikan (zip, path_sheet, daftar_teks).
+    """
+    arsip = zipfile.ZipFile(uploaded_file)
+    try:
+        teks_bersama = []
+        if 'xl/sharedStrings.xml' in arsip.namelist():
+            for _, si in etree.iterparse(arsip.open('xl/sharedStrings.xml'), tag=f'{_NS_XLSX}si'):
+                teks_bersama.append(''.join(si.itertext()))
+                si.clear()
+        sheet = etree.parse(arsip.open('xl/workbook.xml')).find(f'{_NS_XLSX}sheets/{_NS_XLSX}sheet')
+        rid = sheet.get(f'{_NS_REL}id')
+        rels = etree.parse(arsip.open('xl/_rels/workbook.xml.rels')).getroot()
+        target = next(r.get('Target') for r in rels if r.get('Id') == rid)
+        path = target.lstrip('/') if target.startswith('/') else f'xl/{target}'
+        return arsip, path, teks_bersama
+    except Exception:
+        arsip.close()
+        raise
+
+def _baris_xlsx(arsip, path, teks_bersama):
+    """
+    Iterasi streaming elemen <row> sheet dengan lxml: setiap baris dibebaskan
+    setelah dibaca. Baris kosong di antara baris terisi dikembalikan sebagai
+    tuple kosong, sama seperti openpyxl.
+    """
+    berikut = 0
+    for _, row in etree.iterparse(arsip.open(path), tag=f'{_NS_XLSX}row'):
+        r = int(row.get('r', berikut + 1)) - 1
+        while berikut < r:
+            yield ()
+            berikut += 1
+        nilai = []
+        for c in row.iterchildren(f'{_NS_XLSX}c'):
+            ref = c.get('r')
+            if ref:
+                nilai.extend([None] * (_indeks_kolom_xlsx(ref) - len(nilai)))
+            jenis = c.get('t', 'n')
+            if jenis == 'inlineStr':
+                nilai.append(''.join(c.itertext()))
+                continue
+            v = c.findtext(f'{_NS_XLSX}v')
+            if v is None:
+                nilai.append(None)
+            elif jenis == 's':
+                nilai.append(teks_bersama[int(v)])
+            elif jenis == 'n':
+                nilai.append(_angka_xlsx(v))
+            elif jenis == 'b':
+                nilai.append(v == '1')
+            else:
+                nilai.append(v)
+        yield tuple(nilai)
+        berikut = r + 1
+        row.clear()
+        while row.getprevious() is not None:
+            del row.getparent()[0]
+
+def _baris_excel(uploaded_file):
+    """
+    Generator baris (tuple nilai) sheet pertama sebuah workbook. Urutan engine:
+    calamine bila terpasang, lalu parser XML streaming (lxml) yang tidak memuat
+    gaya maupun tema, dan openpyxl read-only bila struktur arsip tidak dikenali.
+    Seperti pada pembacaan mentah, tanggal Excel dikembalikan sebagai angka seri.
+    """
+    uploaded_file.seek(0)
+    if EXCEL_ENGINE_CEPAT:
+        df = pd.read_excel(uploaded_file, header=None, engine=EXCEL_ENGINE_CEPAT)
+        yield from df.astype(object).where(df.notna(), None).itertuples(index=False, name=None)
+        return
+    try:
+        arsip, path, teks_bersama = _buka_lembar_xlsx(uploaded_file)
+    except Exception:
+        uploaded_file.seek(0)
+        wb = openpyxl.load_workbook(uploaded_file, read_only=True, data_only=True)
+        try:
+            yield from wb.worksheets[0].iter_rows(values_only=True)
+        finally:
+            wb.close()
+        return
+    try:
+        yield from _baris_xlsx(arsip, path, teks_bersama)
+    finally:
+        arsip.close()
+
+def _header_excel(uploaded_file):
+    """Baris pertama workbook saja (untuk deteksi format), tanpa membaca sisa sheet."""
+    baris = _baris_excel(uploaded_file)
+    try:
+        return next(baris, ())
+    finally:
+        baris.close()
+        uploaded_file.seek(0)
+
+def _baca_excel_cepat(uploaded_file, header=0, kata_kunci=None):
+    """
+    Pengganti pd.read_excel untuk workbook satu sheet: baris sebelum `header`
+    dilewati, dan bila `kata_kunci` diberikan hanya kolom yang namanya memuat
+    salah satu kata kunci (huruf kecil) yang disimpan. header=None mengembalikan
+    seluruh sel dengan kolom bernomor, seperti pd.read_excel(header=None).
+    """
+    baris = _baris_excel(uploaded_file)
+    if header is None:
+        return pd.DataFrame(list(baris))
+    for _ in range(header):
+        next(baris, None)
+    nama = next(baris, ())
+    nama = [f'Unnamed: {i}' if h is None else h for i, h in enumerate(nama)]
+    indeks = [i for i, h in enumerate(nama)
+              if kata_kunci is None or any(k in str(h).strip().lower() for k in kata_kunci)]
+    # Kolom dipilih dan baris kosong dibuang sebelum DataFrame dibentuk, agar
+    # tipe kolom (mis. int64 untuk Tahun) disimpulkan hanya dari baris berisi
+    data = []
+    for row in baris:
+        nilai = tuple(np.nan if i >= len(row) or row[i] is None else row[i] for i in indeks)
+        if any(v is not np.nan for v in nilai):
+            data.append(nilai)
+    return pd.DataFrame(data, columns=[nama[i] for i in indeks])
+
+# --- Skema & Validasi Kualitas Data ---
+# Skema deklaratif per dataset: nama kolom kanonik -> aturan. 'pola' (regex, huruf kecil)
+# mengenali nama kolom di file; 'ribuan' adalah pemisah ribuan yang dibuang saat konversi,
+# sehingga nilai teks harus cocok dengan 'format'; 'bulat' mewajibkan nilai bilangan bulat.
+SKEMA_PENUMPANG = {
+    'Penumpang (000)': {
+        'pola': r'^(?!.*jarak).*penumpang.*000', 'tipe': 'angka', 'ribuan': '.',
+        'format': r'\d+|\d{1,3}(\.\d{3})+', 'bulat': True, 'min': 0, 'max': 1e6, 'belum_terbit': True,
+    },
+    'Total Jarak Tempuh Penumpang': {
+        'pola': r'total jarak', 'tipe': 'angka', 'ribuan': '.',
+        'format': r'\d+|\d{1,3}(\.\d{3})+', 'bulat': True, 'min': 0, 'max': 1e5, 'belum_terbit': True,
+    },
+    'Rata-rata Jarak Perjalanan Per penumpang': {
+        'pola': r'rata-rata jarak|rata2', 'tipe': 'angka', 'ribuan': ',',
+        'format': r'\d+(\.\d+)?', 'min': 1, 'max': 1000, 'belum_terbit': True,
+    },
+}
+# Varian untuk file long/harian: satuan penumpang dan total jarak berbeda antar file
+# (jumlah asli atau ribuan), sehingga batas atas rentangnya tidak dipakai; rata-rata
+# (km per penumpang) tetap. Kolom yang wajib ada sudah diperiksa _normalisasi_chunk.
+SKEMA_PENUMPANG_STREAMING = {
+    kolom: {**{k: v for k, v in aturan.items()
+               if k != 'max' or kolom == 'Rata-rata Jarak Perjalanan Per penumpang'}, 'opsional': True}
+    for kolom, aturan in SKEMA_PENUMPANG.items()
+}
+SKEMA_LIBUR = {
+    'Bulan': {'pola': r'bulan', 'tipe': 'bulan'},
+    'Tahun': {'pola': r'tahun', 'tipe': 'angka', 'bulat': True, 'min': 1900, 'max': 2100},
+    'Libur Nasional': {'pola': r'libur nasional', 'tipe': 'teks', 'boleh_kosong': True},
+    'Cuti Bersama': {'pola': r'cuti bersama', 'tipe': 'teks', 'boleh_kosong': True},
+    'Tanggal': {'pola': r'tanggal', 'tipe': 'angka', 'bulat': True, 'min': 1, 'max': 31, 'opsional': True},
+}
+KOLOM_LAPORAN_KUALITAS = ['File', 'Kolom', 'Pemeriksaan', 'Jumlah', 'Contoh', 'Tingkat']
+# Penanda BPS untuk bulan yang belum dipublikasikan; pada kolom ber-'belum_terbit' diperlakukan
+# seperti sel kosong dan hanya dilaporkan sebagai info
+PENANDA_BELUM_TERBIT = ('-', '')
+
+def cocokkan_kolom(kolom, skema):
+    """
+    Memetakan nama kolom kanonik skema ke kolom pertama di file yang cocok
+    dengan polanya (satu pencocokan regex tervektorisasi per aturan).
+    Kolom tanpa pasangan bernilai None.
+    """
+    nama = pd.Index(kolom).astype(str).str.strip().str.lower()
+    hasil = {}
+    for kanonik, aturan in skema.items():
+        cocok = np.flatnonzero(nama.str.contains(aturan['pola'], regex=True))
+        hasil[kanonik] = kolom[cocok[0]] if len(cocok) else None
+    return hasil
+
+def _konversi_angka(series, ribuan):
+    """
+    Mengonversi kolom campuran ke angka: sel yang sudah berupa angka dipakai apa
+    adanya, sel teks dibuang pemisah ribuannya lalu di-parse. Sel angka tidak
+    di-stringify agar 2074.0 tidak berubah menjadi 20740.
+    """
+    if pd.api.types.is_numeric_dtype(series):
+        return series
+    if pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty'):
+        # Jalur cepat untuk kolom teks penuh (CSV streaming): float() sudah menoleransi
+        # spasi di tepi, dan astype jauh lebih cepat dari to_numeric
+        bersih = series.str.replace(ribuan, '', regex=False) if ribuan else series
+        try:
+            return bersih.astype(float)
+        except ValueError:
+            return pd.to_numeric(bersih.str.strip(), errors='coerce')
+    teks = series.map(type).eq(str)
+    bersih = series.str.strip()
+    if ribuan:
+        bersih = bersih.str.replace(ribuan, '', regex=False)
+    return pd.to_numeric(series.where(~teks, bersih), errors='coerce')
+
+def _temuan(berkas, kolom, pemeriksaan, mask, nilai, tingkat='peringatan'):
+    """
+    Baris laporan kualitas per file untuk pelanggaran pada `mask`. `berkas` berisi
+    nama file asal setiap baris (atau satu nama untuk semua baris); pengelompokan
+    per file hanya dilakukan pada baris yang melanggar.
+    """
+    mask = np.asarray(mask, dtype=bool)
+    if not mask.any():
+        return []
+    pelanggaran = pd.DataFrame({
+        'File': np.broadcast_to(np.asarray(berkas, dtype=object), mask.shape)[mask],
+        'nilai': np.asarray(nilai, dtype=object)[mask],
+    })
+    return [{'File': nama, 'Kolom': kolom, 'Pemeriksaan': pemeriksaan, 'Jumlah': len(grup),
+             'Contoh': ', '.join(map(str, pd.unique(grup['nilai'])[:3])), 'Tingkat': tingkat}
+            for nama, grup in pelanggaran.groupby('File', sort=False)]
+
+def validasi_skema(df, skema, berkas, angka=None):
+    """
+    Memeriksa DataFrame mentah (kolom sudah bernama kanonik, boleh gabungan
+    beberapa file) terhadap skema secara tervektorisasi per kolom: kolom hilang,
+    nilai kosong, format pemisah ribuan/desimal, nilai bukan angka atau tidak
+    bulat, rentang nilai, dan nama bulan. `berkas` adalah nama file asal per baris.
+    Pada kolom dengan 'belum_terbit', sel kosong atau berisi PENANDA_BELUM_TERBIT
+    dilaporkan sekali sebagai info. Setiap sel bermasalah dilaporkan satu kali:
+    sel yang bukan angka tidak ikut diperiksa format pemisahnya.
+    Bila dict `angka` diberikan, hasil konversi kolom bertipe angka disimpan di
+    dalamnya agar tidak perlu dikonversi ulang.
+    Mengembalikan list temuan (dict berkolom KOLOM_LAPORAN_KUALITAS).
+    """
+    berkas = np.asarray(berkas, dtype=object)
+    temuan = []
+    for kolom, aturan in skema.items():
+        if kolom not in df.columns:
+            if not aturan.get('opsional'):
+                temuan += [{'File': nama, 'Kolom': kolom, 'Pemeriksaan': 'kolom tidak ditemukan',
+                            'Jumlah': 1, 'Contoh': '', 'Tingkat': 'error'} for nama in pd.unique(berkas.ravel())]
+            continue
+        mentah = df[kolom]
+        kosong = mentah.isna().to_numpy()
+        teks = mentah.map(type).eq(str).to_numpy()
+        # Teks tanpa spasi tepi dihitung sekali untuk pemeriksaan penanda dan format
+        bersih = mentah.astype(str).str.strip() if teks.any() else mentah.astype(str)
+        if aturan.get('belum_terbit'):
+            kosong = kosong | (teks & bersih.isin(PENANDA_BELUM_TERBIT).to_numpy())
+            temuan += _temuan(berkas, kolom, 'belum dipublikasikan atau kosong (baris dibuang)', kosong,
+                              mentah.where(mentah.notna(), ''), 'info')
+        elif not aturan.get('boleh_kosong'):
+            temuan += _temuan(berkas, kolom, 'nilai kosong (baris dibuang)', kosong, mentah)
+
+        if aturan['tipe'] == 'angka':
+            konversi = _konversi_angka(mentah, aturan.get('ribuan'))
+            if angka is not None:
+                angka[kolom] = konversi
+            nilai = konversi.to_numpy(dtype=np.float64)
+            bukan_angka = np.isnan(nilai) & ~kosong
+            temuan += _temuan(berkas, kolom, 'bukan angka (baris dibuang)', bukan_angka, mentah, 'error')
+            if 'format' in aturan and teks.any():
+                periksa = teks & ~np.isnan(nilai)
+                salah_format = np.zeros(len(mentah), dtype=bool)
+                salah_format[periksa] = ~bersih[periksa].str.fullmatch(aturan['format']).to_numpy(dtype=bool)
+                temuan += _temuan(berkas, kolom, 'pemisah ribuan/desimal tidak sesuai', salah_format, mentah)
+            with np.errstate(invalid='ignore'):
+                if aturan.get('bulat'):
+                    temuan += _temuan(berkas, kolom, 'bukan bilangan bulat', (np.mod(nilai, 1) != 0) & ~np.isnan(nilai), mentah)
+                di_luar = (nilai < aturan.get('min', -np.inf)) | (nilai > aturan.get('max', np.inf))
+            temuan += _temuan(berkas, kolom, f"di luar rentang [{aturan.get('min', '-∞')}, {aturan.get('max', '∞')}]", di_luar, mentah)
+        elif aturan['tipe'] == 'bulan':
+            tidak_dikenal = ~mentah.astype(str).str.strip().isin(list(BULAN_KE_ANGKA)).to_numpy() & ~kosong
+            temuan += _temuan(berkas, kolom, 'nama bulan tidak dikenal', tidak_dikenal, mentah, 'error')
+    return temuan
+
+def _gabung_temuan(temuan):
+    """
+    Menggabungkan temuan dari banyak chunk menjadi satu baris per (File, Kolom,
+    Pemeriksaan, Tingkat): Jumlah dijumlahkan, Contoh berisi hingga tiga nilai
+    unik pertama.
+    """
+    gabungan = {}
+    for t in temuan:
+        kunci = (t['File'], t['Kolom'], t['Pemeriksaan'], t['Tingkat'])
+        if kunci not in gabungan:
+            gabungan[kunci] = {**t, 'Contoh': []}
+        else:
+            gabungan[kunci]['Jumlah'] += t['Jumlah']
+        contoh = gabungan[kunci]['Contoh']
+        contoh += [c for c in t['Contoh'].split(', ') if c and c not in contoh][:3 - len(contoh)]
+    return [{**t, 'Contoh': ', '.join(t['Contoh'])} for t in gabungan.values()]
+
+def validasi_periode(df, berkas, nama_gabungan):
+    """
+    Memeriksa grain (Tahun, Bulan) dari indeks bulan integer (Tahun*12 + bulan)
+    tanpa loop per baris: periode yang sudah muncul sebelumnya (di file yang sama
+    maupun file lain) dilaporkan pada file baris tersebut, dan bulan yang hilang
+    di antara bulan pertama dan terakhir dilaporkan atas nama `nama_gabungan`.
+    """
+    tahun = pd.to_numeric(df['Tahun'], errors='coerce').to_numpy(dtype=np.float64)
+    bulan = df['Bulan'].map(BULAN_KE_ANGKA).to_numpy(dtype=np.float64)
+    valid = ~np.isnan(tahun) & ~np.isnan(bulan)
+    indeks = (tahun[valid] * 12 + bulan[valid] - 1).astype(np.int64)
+    label = (df['Bulan'].astype(str) + ' ' + df['Tahun'].astype(str)).to_numpy()[valid]
+    berkas = np.broadcast_to(np.asarray(berkas, dtype=object), valid.shape)[valid]
+    temuan = _temuan(berkas, 'Tahun, Bulan', '(Tahun, Bulan) ganda', pd.Series(indeks).duplicated().to_numpy(), label)
+    if len(indeks):
+        ada = np.zeros(indeks.max() - indeks.min() + 1, dtype=bool)
+        ada[indeks - indeks.min()] = True
+        hilang = np.flatnonzero(~ada) + indeks.min()
+        nama_hilang = np.array([f"{ANGKA_KE_BULAN[i % 12 + 1]} {i // 12}" for i in hilang], dtype=object)
+        temuan += _temuan(nama_gabungan, 'Tahun, Bulan', 'bulan hilang', np.ones(len(hilang), dtype=bool), nama_hilang)
+    return temuan
+
+def _validasi_libur(df, berkas):
+    """
+    Pemeriksaan khusus data libur: baris tanpa keterangan libur maupun cuti,
+    tanggal yang tidak ada di kalender (mis. 30 Februari), dan tanggal ganda.
+    """
+    kosong = (df['Libur Nasional'].isna() & df['Cuti Bersama'].isna()).to_numpy()
+    temuan = _temuan(berkas, 'Libur Nasional, Cuti Bersama', 'keterangan libur/cuti kosong', kosong,
+                     df['Bulan'].astype(str) + ' ' + df['Tahun'].astype(str))
+    if 'Tanggal' in df.columns:
+        tanggal = pd.to_datetime(pd.DataFrame({
+            'year': pd.to_numeric(df['Tahun'], errors='coerce'),
+            'month': df['Bulan'].map(BULAN_KE_ANGKA),
+            'day': pd.to_numeric(df['Tanggal'], errors='coerce'),
+        }), errors='coerce')
+        label = df['Tanggal'].astype(str) + ' ' + df['Bulan'].astype(str) + ' ' + df['Tahun'].astype(str)
+        tidak_valid = (tanggal.isna() & df['Tanggal'].notna()).to_numpy()
+        temuan += _temuan(berkas, 'Tanggal', 'tanggal tidak valid', tidak_valid, label, 'error')
+        ganda = (tanggal.duplicated() & tanggal.notna()).to_numpy()
+        temuan += _temuan(berkas, 'Tanggal', 'tanggal ganda', ganda, label)
+    return temuan
+
+def laporan_kualitas(temuan):
+    """Menyusun list temuan menjadi DataFrame laporan kualitas (kosong bila tidak ada temuan)."""
+    return pd.DataFrame(temuan, columns=KOLOM_LAPORAN_KUALITAS)
+
+def show_quality_report(laporan):
+    """Menampilkan laporan kualitas data per file."""
+    if laporan is None or laporan.empty:
+        st.success("Tidak ada masalah kualitas data yang terdeteksi.")
+        return
+    n_error = int((laporan['Tingkat'] == 'error').sum())
+    n_info = int((laporan['Tingkat'] == 'info').sum())
+    n_peringatan = len(laporan) - n_error - n_info
+    st.write(f"Ditemukan **{n_error}** temuan error, **{n_peringatan}** peringatan, dan **{n_info}** info "
+             f"pada {laporan['File'].nunique()} file.")
+    st.dataframe(laporan.style.map(
+        lambda v: {'error': 'color: #F63366', 'peringatan': 'color: #f0ad4e'}.get(v, ''), subset=['Tingkat']
+    ), hide_index=True)
+
+# --- Ingesti Streaming Format Long/Harian ---
+# Jumlah baris CSV per chunk; memori puncak dibatasi oleh ukuran chunk, bukan ukuran file
+UKURAN_CHUNK_STREAMING = 50_000
+
+def _deteksi_format_penumpang(uploaded_file):
+    """
+    Mengenali format file penumpang dari baris header: 'harian' (ada kolom Tanggal),
+    'long' (ada kolom Tahun dan Bulan), atau 'wide' (format BPS per tahun).
+    """
+    file_extension = os.path.splitext(uploaded_file.name)[1].lower()
+    uploaded_file.seek(0)
+    if file_extension == '.csv':
+        header = pd.read_csv(uploaded_file, nrows=0, encoding='utf-8-sig').columns
+    else:
+        header = _header_excel(uploaded_file)
+    uploaded_file.seek(0)
+    kolom = [str(col).strip().lower() for col in header]
+    if any(col.startswith('tanggal') for col in kolom):
+        return 'harian'
+    if 'tahun' in kolom and 'bulan' in kolom:
+        return 'long'
+    return 'wide'
+
+# Hanya kolom yang namanya memuat kata kunci ini yang dibaca dari file format long/harian
+_KATA_KUNCI_KOLOM_STREAMING = ('tanggal', 'tahun', 'bulan', 'penumpang', 'jarak', 'rata')
+
+def _baca_chunk(uploaded_file, ukuran_chunk):
+    """
+    Generator chunk DataFrame: CSV dibaca bertahap, Excel (kecil) dibaca sebagai
+    satu chunk. Kolom lain (mis. rute, stasiun) tidak dibaca sama sekali. Sel CSV
+    dibaca sebagai teks agar "31.000" tidak lebih dulu ditebak pandas sebagai 31.0;
+    konversi angka mengikuti aturan pemisah SKEMA_PENUMPANG.
+    """
+    pakai = lambda col: any(k in str(col).strip().lower() for k in _KATA_KUNCI_KOLOM_STREAMING)
+    uploaded_file.seek(0)
+    if os.path.splitext(uploaded_file.name)[1].lower() == '.csv':
+        with pd.read_csv(uploaded_file, chunksize=ukuran_chunk, encoding='utf-8-sig', usecols=pakai,
+                         dtype=str) as reader:
+            yield from reader
+    else:
+        yield _baca_excel_cepat(uploaded_file, kata_kunci=_KATA_KUNCI_KOLOM_STREAMING)
+
+def _tahun_bulan_chunk(chunk, nama_file):
+    """
+    Periode setiap baris chunk long/harian sebagai (tahun, bulan) numerik, dari
+    kolom Tanggal (ISO atau dd/mm/yyyy) atau pasangan kolom Tahun dan Bulan.
+    """
+    kolom = {str(col).strip().lower(): col for col in chunk.columns}
+    tanggal_col = next((asli for nama, asli in kolom.items() if 'tanggal' in nama), None)
+    tahun_col, bulan_col = kolom.get('tahun'), kolom.get('bulan')
+    if tanggal_col is not None:
+        teks = chunk[tanggal_col].astype(str).str.strip()
+        # Format ditentukan dari satu nilai contoh agar parsing tetap tervektorisasi
+        contoh = teks.iloc[0] if len(teks) else ''
+        if re.match(r'^\d{4}-\d{1,2}-\d{1,2}', contoh):
+            tanggal = pd.to_datetime(teks, format='ISO8601', errors='coerce')
+        else:
+            tanggal = pd.to_datetime(teks.str.replace('-', '/', regex=False), format='%d/%m/%Y', errors='coerce')
+        return tanggal.dt.year, tanggal.dt.month
+    if tahun_col is not None and bulan_col is not None:
+        tahun = pd.to_numeric(chunk[tahun_col], errors='coerce')
+        bulan_teks = chunk[bulan_col].astype(str).str.strip().str.capitalize()
+        return tahun, bulan_teks.map(BULAN_KE_ANGKA).fillna(pd.to_numeric(bulan_teks, errors='coerce'))
+    raise ValueError(f"Tidak dapat menemukan kolom Tanggal atau Tahun/Bulan di {nama_file}")
+
+def _normalisasi_chunk(chunks, nama_file, dibuang=None, temuan=None):
+    """
+    Generator yang memetakan setiap chunk mentah ke kolom (Tahun, Bulan_Angka,
+    penumpang_ribu, jarak_juta_km). Satuan dibaca dari nama kolom: penumpang
+    berlabel '000'/'ribu' sudah dalam ribuan, jarak berlabel '000.000'/'juta' atau
+    bernama kanonik 'Total Jarak Tempuh Penumpang' sudah dalam juta km (seperti
+    format wide); selain itu dianggap satuan asli. Angka teks dikonversi dengan
+    aturan pemisah ribuan SKEMA_PENUMPANG. Bila hanya ada kolom rata-rata jarak,
+    total jarak diturunkan dari rata-rata x penumpang.
+    Bila list `temuan` diberikan, setiap chunk divalidasi dengan
+    SKEMA_PENUMPANG_STREAMING. Jumlah baris yang dibuang karena periodenya tidak
+    valid dicatat di dict `dibuang` per file.
+    """
+    for chunk in chunks:
+        kolom = {str(col).strip().lower(): col for col in chunk.columns}
+        cari = lambda *kunci: next((asli for nama, asli in kolom.items() if any(k in nama for k in kunci)), None)
+        penumpang_col = cari('penumpang (000)', 'penumpang')
+        total_col, rata_col = cari('total jarak', 'jarak tempuh'), cari('rata-rata jarak', 'rata2')
+        if penumpang_col in (total_col, rata_col):
+            penumpang_col = next((asli for nama, asli in kolom.items()
+                                  if 'penumpang' in nama and asli not in (total_col, rata_col)), None)
+        if penumpang_col is None or (total_col is None and rata_col is None):
+            raise ValueError(f"Tidak dapat menemukan kolom penumpang dan jarak tempuh di {nama_file}")
+
+        # Konversi angka dari validasi dipakai ulang; tanpa validasi dikonversi langsung
+        angka = {}
+        if temuan is not None:
+            mentah = pd.DataFrame({kanonik: chunk[col] for kanonik, col in [
+                ('Penumpang (000)', penumpang_col), ('Total Jarak Tempuh Penumpang', total_col),
+                ('Rata-rata Jarak Perjalanan Per penumpang', rata_col)] if col is not None})
+            temuan.extend(validasi_skema(mentah, SKEMA_PENUMPANG_STREAMING, nama_file, angka))
+        konversi = lambda kanonik, col: (angka[kanonik] if kanonik in angka
+                                         else _konversi_angka(chunk[col], SKEMA_PENUMPANG[kanonik]['ribuan']))
+
+        nama_penumpang = str(penumpang_col).lower()
+        penumpang = konversi('Penumpang (000)', penumpang_col)
+        if not ('000' in nama_penumpang or 'ribu' in nama_penumpang):
+            penumpang = penumpang / 1e3
+        if total_col is not None:
+            nama_total = str(total_col).strip().lower()
+            jarak = konversi('Total Jarak Tempuh Penumpang', total_col)
+            if not ('000.000' in nama_total or 'juta' in nama_total
+                    or nama_total == 'total jarak tempuh penumpang'):
+                jarak = jarak / 1e6
+        else:
+            # rata-rata (km) x penumpang (ribu) = ribu km; dibagi 1000 menjadi juta km
+            rata = konversi('Rata-rata Jarak Perjalanan Per penumpang', rata_col)
+            jarak = rata * penumpang / 1e3
+
+        tahun, bulan = _tahun_bulan_chunk(chunk, nama_file)
+
+        normal = pd.DataFrame({
+            'Tahun': tahun, 'Bulan_Angka': bulan,
+            'penumpang_ribu': penumpang, 'jarak_juta_km': jarak,
+        })
+        valid = normal.notna().all(axis=1) & (penumpang >= 0) & (jarak >= 0)
+        if dibuang is not None:
+            # Nilai kosong/bukan angka/negatif sudah dilaporkan validasi skema per sel
+            dibuang[nama_file] = dibuang.get(nama_file, 0) + int(normal[['Tahun', 'Bulan_Angka']].isna().any(axis=1).sum())
+        yield normal[valid]
+
+def _agregasi_bulanan(chunks):
+    """
+    Menjumlahkan chunk ternormalisasi ke grain bulanan secara inkremental; yang
+    disimpan hanya satu baris akumulasi per bulan.
+    """
+    total = None
+    for chunk in chunks:
+        parsial = chunk.groupby(['Tahun', 'Bulan_Angka'])[['penumpang_ribu', 'jarak_juta_km']].sum()
+        total = parsial if total is None else total.add(parsial, fill_value=0)
+    return total
+
+def baca_penumpang_streaming(uploaded_files, ukuran_chunk=UKURAN_CHUNK_STREAMING, laporan=None):
+    """
+    Membaca file penumpang format long atau harian secara streaming (generator
+    chunk -> normalisasi -> agregasi bulanan) dan mengembalikan skema yang sama
+    dengan format wide: Bulan, Penumpang (000), Total Jarak Tempuh Penumpang,
+    Rata-rata Jarak Perjalanan Per penumpang, Tahun, Bulan_Angka.
+    Periode yang tumpang tindih antar file sudah ditolak deteksi_duplikat_unggahan;
+    bulan yang sama di dalam satu file dijumlahkan. Bila `laporan` (list)
+    diberikan, temuan validasi skema per chunk (digabung per file) dan jumlah
+    baris berperiode tidak valid ditambahkan ke dalamnya.
+    """
+    dibuang = {}
+    temuan = [] if laporan is not None else None
+    chunks = (normal for f in uploaded_files
+              for normal in _normalisasi_chunk(_baca_chunk(f, ukuran_chunk), f.name, dibuang, temuan))
+    total = _agregasi_bulanan(chunks)
+    if laporan is not None:
+        laporan.extend(_gabung_temuan(temuan))
+        laporan.extend({'File': nama, 'Kolom': 'Tanggal/Tahun, Bulan', 'Pemeriksaan': 'periode tidak valid (baris dibuang)', 'Jumlah': n,
+                        'Contoh': '', 'Tingkat': 'peringatan'} for nama, n in dibuang.items() if n)
+    if total is None or total.empty:
+        raise ValueError("Tidak ada baris valid pada file penumpang format long/harian.")
+    total = total.reset_index()
+    tahun = total['Tahun'].astype(int)
+    bulan = total['Bulan_Angka'].astype(int)
+    return pd.DataFrame({
+        'Bulan': bulan.map(ANGKA_KE_BULAN),
+        'Penumpang (000)': total['penumpang_ribu'],
+        'Total Jarak Tempuh Penumpang': total['jarak_juta_km'],
+        # juta km / ribu penumpang = ribu km per penumpang
+        'Rata-rata Jarak Perjalanan Per penumpang': (total['jarak_juta_km'] / total['penumpang_ribu'] * 1e3).round(2),
+        'Tahun': tahun,
+        'Bulan_Angka': bulan,
+    })
+
+def _read_penumpang_file(uploaded_files, laporan=None):
+    """
+    MODIFIKASI: Menerima list file dan menggabungkannya.
+    Fungsi untuk membaca data penumpang dalam format "wide".
+    Bila `laporan` (list) diberikan, temuan validasi SKEMA_PENUMPANG dan
+    pemeriksaan periode ditambahkan ke dalamnya. Validasi dan konversi angka
+    dijalankan sekali pada gabungan semua file, bukan per file.
+    """
+    if not uploaded_files:
+        return None, "Tidak ada file penumpang yang diunggah."
 
     # Pemetaan nama bulan ke angka untuk pengurutan
     month_mapping = {
@@ -639,13 +2095,20 @@ def _read_penumpang_file(uploaded_files):
     }
 
     df_list = []
+    # Nama file asal per baris gabungan, untuk laporan kualitas
+    berkas = []
+    # File format long/harian dikumpulkan lalu diagregasi bersama secara streaming
+    file_streaming = []
     for uploaded_file in uploaded_files:
         try:
             file_extension = os.path.splitext(uploaded_file.name)[1].lower()
+            if file_extension in ('.csv', '.xlsx') and _deteksi_format_penumpang(uploaded_file) != 'wide':
+                file_streaming.append(uploaded_file)
+                continue
 
             header_row = 3
             if file_extension == '.xlsx':
-                df_raw = pd.read_excel(uploaded_file, header=header_row)
+                df_raw = _baca_excel_cepat(uploaded_file, header=header_row)
             elif file_extension == '.csv':
                 df_raw = pd.read_csv(uploaded_file, header=header_row)
             else:
@@ -661,7 +2124,7 @@ def _read_penumpang_file(uploaded_files):
             
             uploaded_file.seek(0)
             if file_extension == '.xlsx':
-                df_year_raw = pd.read_excel(uploaded_file, header=None)
+                df_year_raw = _baca_excel_cepat(uploaded_file, header=None)
             else:
                 df_year_raw = pd.read_csv(uploaded_file, header=None)
             
@@ -669,9 +2132,10 @@ def _read_penumpang_file(uploaded_files):
             if tahun is None:
                 raise ValueError(f"Tidak dapat menemukan tahun pada file: {uploaded_file.name}")
             
-            penumpang_col = next((col for col in df_transposed.columns if 'penumpang' in str(col).lower() and '000' in str(col).lower()), None)
-            total_jarak_col = next((col for col in df_transposed.columns if 'total jarak' in str(col).lower()), None)
-            rata_jarak_col = next((col for col in df_transposed.columns if 'rata-rata jarak' in str(col).lower() or 'rata2' in str(col).lower()), None)
+            peta_kolom = cocokkan_kolom(df_transposed.columns, SKEMA_PENUMPANG)
+            penumpang_col = peta_kolom['Penumpang (000)']
+            total_jarak_col = peta_kolom['Total Jarak Tempuh Penumpang']
+            rata_jarak_col = peta_kolom['Rata-rata Jarak Perjalanan Per penumpang']
             
             if not all([penumpang_col, total_jarak_col, rata_jarak_col]):
                 raise ValueError(f"Tidak dapat menemukan kolom metrik yang diperlukan di {uploaded_file.name}")
@@ -685,31 +2149,47 @@ def _read_penumpang_file(uploaded_files):
             
             df_final['Tahun'] = tahun
             
-            def safe_numeric_conversion(series, thousands_separator):
-                cleaned_series = series.astype(str).str.replace(thousands_separator, '', regex=False)
-                return pd.to_numeric(cleaned_series, errors='coerce')
-
-            df_final['Penumpang (000)'] = safe_numeric_conversion(df_final['Penumpang (000)'], '.')
-            df_final['Total Jarak Tempuh Penumpang'] = safe_numeric_conversion(df_final['Total Jarak Tempuh Penumpang'], '.')
-            df_final['Rata-rata Jarak Perjalanan Per penumpang'] = safe_numeric_conversion(df_final['Rata-rata Jarak Perjalanan Per penumpang'], ',').round(2)
-
-            df_final.dropna(inplace=True)
-            df_final.reset_index(drop=True, inplace=True)
-            
             # --- Perbaikan: Tambahkan kolom angka bulan untuk pengurutan yang benar ---
             df_final['Bulan_Angka'] = df_final['Bulan'].apply(lambda x: month_mapping.get(x, 0))
             # --- Akhir Perbaikan ---
 
             df_list.append(df_final)
+            berkas.append(np.full(len(df_final), uploaded_file.name, dtype=object))
 
         except Exception as e:
             st.error(f"ERROR saat membaca file {uploaded_file.name}: {e}")
             return None, f"ERROR saat membaca file {uploaded_file.name}: {e}"
 
+    if df_list:
+        df_wide = pd.concat(df_list, ignore_index=True)
+        berkas = np.concatenate(berkas)
+        if laporan is not None:
+            laporan.extend(validasi_skema(df_wide, SKEMA_PENUMPANG, berkas))
+        # Konversi mengikuti aturan pemisah ribuan di SKEMA_PENUMPANG (sama dengan validasi)
+        for kolom, aturan in SKEMA_PENUMPANG.items():
+            df_wide[kolom] = _konversi_angka(df_wide[kolom], aturan['ribuan'])
+        df_wide['Rata-rata Jarak Perjalanan Per penumpang'] = df_wide['Rata-rata Jarak Perjalanan Per penumpang'].round(2)
+        tersimpan = df_wide.notna().all(axis=1).to_numpy()
+        df_list, berkas = [df_wide[tersimpan]], [berkas[tersimpan]]
+
+    if file_streaming:
+        try:
+            df_streaming = baca_penumpang_streaming(file_streaming, laporan=laporan)
+            df_list.append(df_streaming)
+            # Bulan hasil agregasi streaming bisa berasal dari beberapa file sekaligus
+            berkas.append(np.full(len(df_streaming), ', '.join(f.name for f in file_streaming), dtype=object))
+        except Exception as e:
+            nama = ', '.join(f.name for f in file_streaming)
+            st.error(f"ERROR saat membaca file {nama}: {e}")
+            return None, f"ERROR saat membaca file {nama}: {e}"
+
     if not df_list:
         return None, "Tidak ada data yang valid untuk digabungkan."
         
     df_combined = pd.concat(df_list, ignore_index=True)
+    if laporan is not None:
+        # Periode yang tumpang tindih atau bolong antar file hanya terlihat setelah digabung
+        laporan.extend(validasi_periode(df_combined, np.concatenate(berkas), 'Semua file penumpang'))
     # --- Perbaikan: Urutkan berdasarkan Tahun dan Bulan_Angka (kronologis) ---
     df_combined.sort_values(by=['Tahun', 'Bulan_Angka'], inplace=True)
     # --- Akhir Perbaikan ---
@@ -720,151 +2200,1351 @@ def _read_penumpang_file(uploaded_files):
     
     return df_combined, None
 
-def _read_libur_file(uploaded_files):
+# Kolom file libur yang dibaca; kolom lain (No, Hari, keterangan) dilewati saat membaca Excel
+KOLOM_LIBUR = ('bulan', 'tahun', 'libur nasional', 'cuti bersama', 'tanggal')
+
+def _read_libur_file(uploaded_files, laporan=None):
+    """
+    MODIFIKASI: Menerima list file dan menggabungkan.
+    Fungsi untuk membaca data libur dalam format "long".
+    Bila `laporan` (list) diberikan, temuan validasi SKEMA_LIBUR (dijalankan sekali
+    pada gabungan semua file) ditambahkan ke dalamnya.
+    """
+    if not uploaded_files:
+        return None, "Tidak ada file libur yang diunggah."
+
+    # Pemetaan nama bulan ke angka untuk pengurutan
+    month_mapping = {
+        'Januari': 1, 'Februari': 2, 'Maret': 3, 'April': 4,
+        'Mei': 5, 'Juni': 6, 'Juli': 7, 'Agustus': 8,
+        'September': 9, 'Oktober': 10, 'November': 11, 'Desember': 12
+    }
+
+    df_list = []
+    berkas = []
+    for uploaded_file in uploaded_files:
+        try:
+            file_extension = os.path.splitext(uploaded_file.name)[1].lower()
+            
+            header_row = 0
+            if file_extension == '.xlsx':
+                df_raw = _baca_excel_cepat(uploaded_file, header=header_row, kata_kunci=KOLOM_LIBUR)
+            elif file_extension == '.csv':
+                df_raw = pd.read_csv(uploaded_file, header=header_row)
+            else:
+                raise ValueError(f"Tipe file tidak didukung: {uploaded_file.name}")
+            
+            df_raw.dropna(how='all', inplace=True)
+            df_raw.reset_index(drop=True, inplace=True)
+            df_raw.columns = [str(col).strip() for col in df_raw.columns]
+
+            peta_kolom = cocokkan_kolom(df_raw.columns, SKEMA_LIBUR)
+            bulan_col = peta_kolom['Bulan']
+            tahun_col = peta_kolom['Tahun']
+            libur_nasional_col = peta_kolom['Libur Nasional']
+            cuti_bersama_col = peta_kolom['Cuti Bersama']
+            # Kolom tanggal opsional; dibutuhkan untuk kalender hari kerja harian
+            tanggal_col = peta_kolom['Tanggal']
+
+            if not all([bulan_col, tahun_col, libur_nasional_col, cuti_bersama_col]):
+                raise ValueError(f"Tidak dapat menemukan semua kolom yang diperlukan di {uploaded_file.name}")
+            
+            kolom = [bulan_col, tahun_col, libur_nasional_col, cuti_bersama_col] + ([tanggal_col] if tanggal_col else [])
+            df = df_raw[kolom].copy()
+            df.rename(columns={
+                bulan_col: 'Bulan',
+                tahun_col: 'Tahun',
+                libur_nasional_col: 'Libur Nasional',
+                cuti_bersama_col: 'Cuti Bersama',
+                tanggal_col: 'Tanggal'
+            }, inplace=True)
+
+            df['Bulan'] = df['Bulan'].str.strip()
+            df_list.append(df)
+            berkas.append(np.full(len(df), uploaded_file.name, dtype=object))
+            
+        except Exception as e:
+            st.error(f"ERROR saat membaca file {uploaded_file.name}: {e}")
+            return None, f"ERROR saat membaca file {uploaded_file.name}: {e}"
+
+    if not df_list:
+        return None, "Tidak ada data yang valid untuk digabungkan."
+    
+    # Validasi dan konversi tipe dilakukan sekali pada gabungan semua file, bukan per file
+    df_combined = pd.concat(df_list, ignore_index=True)
+    if laporan is not None:
+        berkas = np.concatenate(berkas)
+        laporan.extend(validasi_skema(df_combined, SKEMA_LIBUR, berkas))
+        laporan.extend(_validasi_libur(df_combined, berkas))
+    df_combined['Tahun'] = pd.to_numeric(df_combined['Tahun'], errors='coerce')
+    if 'Tanggal' in df_combined.columns:
+        df_combined['Tanggal'] = pd.to_numeric(df_combined['Tanggal'], errors='coerce')
+    df_combined.dropna(subset=['Tahun', 'Bulan'], inplace=True)
+
+    # --- Perbaikan: Tambahkan kolom angka bulan untuk pengurutan yang benar ---
+    df_combined['Bulan_Angka'] = df_combined['Bulan'].map(month_mapping).fillna(0)
+    # --- Akhir Perbaikan ---
+    # --- Perbaikan: Urutkan berdasarkan Tahun dan Bulan_Angka (kronologis) ---
+    df_combined.sort_values(by=['Tahun', 'Bulan_Angka'], inplace=True)
+    # --- Akhir Perbaikan ---
+    df_combined.reset_index(drop=True, inplace=True)
+    
+    # Hapus kolom Bulan_Angka setelah pengurutan selesai
+    df_combined.drop(columns='Bulan_Angka', inplace=True)
+
+    return df_combined, None
+
+# --- Deteksi Duplikat & Tumpang Tindih Unggahan ---
+# Ukuran blok baca saat menghitung sidik isi file
+UKURAN_BLOK_SIDIK = 1 << 20
+# Baris teratas file penumpang wide BPS yang memuat tahun dan nama bulan
+_BARIS_HEADER_WIDE = 4
+
+def sidik_konten(uploaded_file):
+    """SHA-256 isi file, dibaca per blok; nama file tidak ikut dihitung."""
+    uploaded_file.seek(0)
+    sidik = hashlib.sha256()
+    for blok in iter(lambda: uploaded_file.read(UKURAN_BLOK_SIDIK), b''):
+        sidik.update(blok)
+    uploaded_file.seek(0)
+    return sidik.hexdigest()
+
+def _periode_wide(uploaded_file):
+    """Indeks bulan file wide BPS dari baris header saja: tahun di judul x nama bulan di baris kolom."""
+    if os.path.splitext(uploaded_file.name)[1].lower() == '.csv':
+        baris = pd.read_csv(uploaded_file, header=None, nrows=_BARIS_HEADER_WIDE).values.tolist()
+    else:
+        generator = _baris_excel(uploaded_file)
+        baris = list(itertools.islice(generator, _BARIS_HEADER_WIDE))
+        generator.close()
+    tahun = next((int(sel) for row in baris for sel in row
+                  if isinstance(sel, (int, np.integer, str)) and str(sel).isdigit() and len(str(sel)) == 4), None)
+    if tahun is None or len(baris) < _BARIS_HEADER_WIDE:
+        return np.empty(0, dtype=np.int64)
+    bulan = [BULAN_KE_ANGKA[str(sel).strip()] for sel in baris[-1] if str(sel).strip() in BULAN_KE_ANGKA]
+    return tahun * 12 + np.asarray(bulan, dtype=np.int64) - 1
+
+def _periode_kolom(uploaded_file, kata_kunci, ukuran_chunk=UKURAN_CHUNK_STREAMING):
+    """Generator chunk yang hanya memuat kolom periode (nama memuat salah satu `kata_kunci`)."""
+    uploaded_file.seek(0)
+    if os.path.splitext(uploaded_file.name)[1].lower() == '.csv':
+        pakai = lambda col: any(k in str(col).strip().lower() for k in kata_kunci)
+        with pd.read_csv(uploaded_file, chunksize=ukuran_chunk, encoding='utf-8-sig', usecols=pakai) as reader:
+            yield from reader
+    else:
+        yield _baca_excel_cepat(uploaded_file, kata_kunci=kata_kunci)
+
+def periode_file(uploaded_file, jenis):
+    """
+    Indeks bulan unik (Tahun*12 + bulan - 1) yang dicakup sebuah file, tanpa
+    membaca kolom nilai: file penumpang wide cukup dari header, long/harian dari
+    kolom Tanggal atau Tahun/Bulan, dan file libur dari kolom Tahun (satu tahun
+    libur mencakup kedua belas bulannya).
+    """
+    try:
+        if jenis == 'libur':
+            tahun = [pd.to_numeric(chunk.iloc[:, 0], errors='coerce').dropna().unique()
+                     for chunk in _periode_kolom(uploaded_file, ('tahun',)) if chunk.shape[1]]
+            tahun = np.unique(np.concatenate(tahun)).astype(np.int64) if tahun else np.empty(0, dtype=np.int64)
+            return (tahun[:, None] * 12 + np.arange(12)).ravel()
+        if _deteksi_format_penumpang(uploaded_file) == 'wide':
+            return np.unique(_periode_wide(uploaded_file))
+        indeks = []
+        for chunk in _periode_kolom(uploaded_file, ('tanggal', 'tahun', 'bulan')):
+            tahun, bulan = _tahun_bulan_chunk(chunk, uploaded_file.name)
+            periode = (tahun * 12 + bulan - 1).dropna()
+            indeks.append(np.unique(periode.to_numpy(dtype=np.int64)))
+        return np.unique(np.concatenate(indeks)) if indeks else np.empty(0, dtype=np.int64)
+    finally:
+        uploaded_file.seek(0)
+
+def deteksi_duplikat_unggahan(unggahan):
+    """
+    Memeriksa file unggahan sebelum dibaca penuh. `unggahan` adalah dict
+    {(kelompok, jenis): [file, ...]}, mis. ('training', 'penumpang').
+    1. Indeks hash isi: salinan identik di kelompok dan jenis yang sama
+       digabung (hanya satu yang dipakai); salinan di kelompok lain ditolak.
+    2. Indeks hash periode per jenis: bulan yang dicakup file di lebih dari
+       satu kelompok (mis. tahun testing juga ada di training) ditolak, begitu
+       pula bulan yang dicakup dua file berbeda dalam kelompok dan jenis yang
+       sama (mis. CSV ekspor ulang di samping xlsx tahun yang sama), yang
+       totalnya akan terhitung ganda oleh _agregasi_bulanan.
+    Keduanya satu lintasan atas isi/periode file (O(total baris)).
+    File yang periodenya tidak dapat dibaca (mis. tanpa kolom Tahun/Bulan)
+    dilewati di sini agar kesalahannya dilaporkan oleh pembaca file, bukan
+    sebagai file ganda. `error` hanya berisi salinan atau periode yang bentrok.
+    Mengembalikan (unggahan_bersih, catatan_gabung, error); catatan berformat
+    baris laporan kualitas (KOLOM_LAPORAN_KUALITAS).
+    """
+    try:
+        indeks_konten = {}
+        bersih, catatan = {}, []
+        for (kelompok, jenis), files in unggahan.items():
+            bersih[(kelompok, jenis)] = []
+            for f in files:
+                sidik = sidik_konten(f)
+                asal = indeks_konten.setdefault(sidik, (kelompok, jenis, f))
+                if asal[2] is f:
+                    bersih[(kelompok, jenis)].append(f)
+                elif asal[:2] == (kelompok, jenis):
+                    catatan.append({'File': f.name, 'Kolom': '-', 'Pemeriksaan': f'salinan identik {asal[2].name} (tidak dipakai)',
+                                    'Jumlah': 1, 'Contoh': '', 'Tingkat': 'peringatan'})
+                else:
+                    return None, catatan, (f"Isi file {f.name} ({kelompok} {jenis}) identik dengan "
+                                           f"{asal[2].name} ({asal[0]} {asal[1]})")
+
+        indeks_periode = {}
+        bentrok, bentrok_kelompok = {}, {}
+        for (kelompok, jenis), files in bersih.items():
+            for f in files:
+                try:
+                    periode = periode_file(f, jenis)
+                except Exception as e:
+                    print(f"ERROR: {e}")
+                    continue
+                for i in periode.tolist():
+                    asal = indeks_periode.setdefault((jenis, i), (kelompok, f))
+                    if asal[0] != kelompok:
+                        bentrok.setdefault((jenis, asal[1].name, f.name), []).append(i)
+                    elif asal[1] is not f:
+                        bentrok_kelompok.setdefault((f"{kelompok} {jenis}", asal[1].name, f.name), []).append(i)
+        ringkas = lambda daftar: '; '.join(
+            f"{label} {a} dan {b}: " + ', '.join(f"{ANGKA_KE_BULAN[i % 12 + 1]} {i // 12}" for i in sorted(bulan)[:3])
+            + (f" (+{len(bulan) - 3} bulan lain)" if len(bulan) > 3 else '')
+            for (label, a, b), bulan in daftar.items())
+        if bentrok:
+            return None, catatan, "Periode data training dan testing tumpang tindih: " + ringkas(bentrok)
+        if bentrok_kelompok:
+            return None, catatan, ("Periode file dalam kelompok yang sama tumpang tindih sehingga totalnya "
+                                   "akan terhitung ganda: " + ringkas(bentrok_kelompok))
+        return bersih, catatan, None
+    except Exception as e:
+        print(f"ERROR: {e}")
+        catatan = [{'File': '-', 'Kolom': '-', 'Pemeriksaan': f'pemeriksaan file ganda dilewati: {e}',
+                    'Jumlah': 1, 'Contoh': '', 'Tingkat': 'peringatan'}]
+        return unggahan, catatan, None
+
+def _process_and_combine_data(df_penumpang_train, df_libur_train, df_penumpang_test, df_libur_test):
+    """
+    Menggabungkan data penumpang dan libur untuk data training dan testing.
+    """
+    try:
+        libur_bulanan_train = df_libur_train.groupby(['Bulan', 'Tahun']).agg(
+            jumlah_libur_nasional=('Libur Nasional', lambda x: x.notna().sum()),
+            jumlah_cuti_bersama=('Cuti Bersama', lambda x: x.notna().sum())
+        ).reset_index()
+
+        df_training = pd.merge(df_penumpang_train, libur_bulanan_train, on=['Bulan', 'Tahun'], how='left').fillna(0)
+        
+        libur_bulanan_test = df_libur_test.groupby(['Bulan', 'Tahun']).agg(
+            jumlah_libur_nasional=('Libur Nasional', lambda x: x.notna().sum()),
+            jumlah_cuti_bersama=('Cuti Bersama', lambda x: x.notna().sum())
+        ).reset_index()
+
+        df_testing = pd.merge(df_penumpang_test, libur_bulanan_test, on=['Bulan', 'Tahun'], how='left').fillna(0)
+
+        # Fitur kalender harian (hari kerja efektif, libur panjang, hari kejepit) bila file libur bertanggal
+        tahun_awal = int(pd.concat([df_penumpang_train['Tahun'], df_penumpang_test['Tahun']]).min())
+        kalender = _kalender_bulanan_cached(df_libur_train, df_libur_test, tahun_awal)
+        if kalender is not None:
+            kolom_kalender = kalender[['Bulan', 'Tahun'] + FITUR_KALENDER]
+            df_training = pd.merge(df_training, kolom_kalender, on=['Bulan', 'Tahun'], how='left')
+            df_testing = pd.merge(df_testing, kolom_kalender, on=['Bulan', 'Tahun'], how='left')
+        
+        df_training['Bulan ke-n'] = np.arange(1, len(df_training) + 1)
+        start_month_test = len(df_training) + 1
+        df_testing['Bulan ke-n'] = np.arange(start_month_test, start_month_test + len(df_testing))
+
+        return df_training, df_testing, None
+        
+    except Exception as e:
+        print(f"ERROR: {e}")
+        return None, None, f"ERROR saat menggabungkan data: {e}"
+
+# --- Fitur Model Regresi ---
+FITUR_REGRESI = ['Bulan ke-n', 'Total Jarak Tempuh Penumpang', 'Rata-rata Jarak Perjalanan Per penumpang',
+                 'jumlah_libur_nasional', 'jumlah_cuti_bersama']
+TARGET_REGRESI = 'Penumpang (000)'
+BULAN_KE_ANGKA = {
+    'Januari': 1, 'Februari': 2, 'Maret': 3, 'April': 4,
+    'Mei': 5, 'Juni': 6, 'Juli': 7, 'Agustus': 8,
+    'September': 9, 'Oktober': 10, 'November': 11, 'Desember': 12
+}
+ANGKA_KE_BULAN = {v: k for k, v in BULAN_KE_ANGKA.items()}
+
+# --- Kalender Hari Kerja Harian ---
+FITUR_KALENDER = ['hari_kerja_efektif', 'jumlah_libur_panjang', 'jumlah_hari_kejepit']
+KALENDER_TAHUN_KE_DEPAN = 6  # cukup untuk prediksi 5 tahun setelah data testing
+# Libur nasional bertanggal tetap (bulan, tanggal); dipakai untuk tahun tanpa file libur.
+# Libur berbasis kalender lunar (Idulfitri, Imlek, Nyepi, dst.) tidak dapat diturunkan di sini.
+LIBUR_TANGGAL_TETAP = [(1, 1), (5, 1), (6, 1), (8, 17), (12, 25)]
+MINIMAL_LIBUR_PANJANG = 3  # hari libur berturut-turut (termasuk akhir pekan)
+
+def _tanggal_libur(df_libur):
+    """Mengubah baris libur bertanggal menjadi array datetime64[D] (libur nasional dan cuti bersama digabung)."""
+    if df_libur is None or 'Tanggal' not in df_libur.columns:
+        return None
+    ada_libur = df_libur['Libur Nasional'].notna() | df_libur['Cuti Bersama'].notna()
+    df = df_libur.loc[ada_libur & df_libur['Tanggal'].notna()]
+    tanggal = pd.to_datetime(pd.DataFrame({
+        'year': df['Tahun'].astype(int),
+        'month': df['Bulan'].map(BULAN_KE_ANGKA),
+        'day': df['Tanggal'].astype(int),
+    }), errors='coerce').dropna()
+    return np.unique(tanggal.to_numpy().astype('datetime64[D]'))
+
+def bangun_kalender_bulanan(df_libur, tahun_akhir=None, tahun_awal=None):
+    """
+    Membangun kalender harian dari baris libur bertanggal, lalu meringkasnya per bulan:
+    - hari_kerja_efektif: hari Senin-Jumat yang bukan libur nasional/cuti bersama
+    - jumlah_libur_panjang: rangkaian >= 3 hari libur berturut-turut (dihitung di bulan awalnya)
+    - jumlah_hari_kejepit: hari kerja yang diapit dua hari libur
+    Tahun yang tidak memiliki file libur (sejak `tahun_awal` hingga `tahun_akhir`)
+    hanya memakai LIBUR_TANGGAL_TETAP; kolom 'sumber_libur' menandai asalnya.
+    Mengembalikan DataFrame (Bulan, Tahun, fitur kalender, sumber_libur) atau None
+    bila file libur tidak memiliki kolom tanggal.
+    """
+    libur = _tanggal_libur(df_libur)
+    if libur is None:
+        return None
+
+    tahun_berkas = np.unique(df_libur['Tahun'].dropna().astype(int))
+    tahun_awal = min(int(tahun_berkas.min()), tahun_awal or int(tahun_berkas.min()))
+    tahun_akhir = max(int(tahun_berkas.max()), tahun_akhir or 0)
+    tahun_tanpa_berkas = np.setdiff1d(np.arange(tahun_awal, tahun_akhir + 1), tahun_berkas)
+    libur_tetap = np.array([f'{t:04d}-{b:02d}-{h:02d}' for t in tahun_tanpa_berkas for b, h in LIBUR_TANGGAL_TETAP],
+                           dtype='datetime64[D]')
+    kalender = np.busdaycalendar(weekmask='1111100', holidays=np.concatenate([libur, libur_tetap]))
+
+    # Hari kerja efektif per bulan dengan aritmetika hari kerja (vektor untuk semua bulan)
+    awal_bulan = np.arange(f'{tahun_awal:04d}-01', f'{tahun_akhir + 1:04d}-01', dtype='datetime64[M]')
+    hari_kerja = np.busday_count(awal_bulan.astype('datetime64[D]'), (awal_bulan + 1).astype('datetime64[D]'),
+                                 busdaycal=kalender)
+
+    # Kalender harian, diperpanjang satu hari di kedua sisi agar rangkaian di tepi tahun terbaca
+    hari = np.arange(awal_bulan[0].astype('datetime64[D]') - 1, (awal_bulan[-1] + 1).astype('datetime64[D]') + 1)
+    kerja = np.is_busday(hari, busdaycal=kalender)
+    libur_harian = ~kerja
+    indeks_bulan = (hari.astype('datetime64[M]') - awal_bulan[0]).astype(np.int64)
+    dalam_rentang = (indeks_bulan >= 0) & (indeks_bulan < len(awal_bulan))
+
+    # Rangkaian hari libur berturut-turut: awal & akhir dari perubahan status
+    tepi = np.diff(np.concatenate([[0], libur_harian.astype(np.int8), [0]]))
+    awal_rangkaian = np.flatnonzero(tepi == 1)
+    panjang_rangkaian = np.flatnonzero(tepi == -1) - awal_rangkaian
+    awal_panjang = awal_rangkaian[(panjang_rangkaian >= MINIMAL_LIBUR_PANJANG) & dalam_rentang[awal_rangkaian]]
+    libur_panjang = np.bincount(indeks_bulan[awal_panjang], minlength=len(awal_bulan))
+
+    kejepit = kerja[1:-1] & libur_harian[:-2] & libur_harian[2:]
+    indeks_kejepit = indeks_bulan[1:-1][kejepit]
+    hari_kejepit = np.bincount(indeks_kejepit[(indeks_kejepit >= 0) & (indeks_kejepit < len(awal_bulan))],
+                               minlength=len(awal_bulan))
+
+    tahun = awal_bulan.astype('datetime64[Y]').astype(np.int64) + 1970
+    bulan = (awal_bulan.astype(np.int64) % 12) + 1
+    return pd.DataFrame({
+        'Bulan': [ANGKA_KE_BULAN[b] for b in bulan],
+        'Tahun': tahun,
+        'hari_kerja_efektif': hari_kerja,
+        'jumlah_libur_panjang': libur_panjang,
+        'jumlah_hari_kejepit': hari_kejepit,
+        'sumber_libur': np.where(np.isin(tahun, tahun_berkas), 'file libur', 'tanggal tetap'),
+    })
+
+@st.cache_data(show_spinner=False)
+def _kalender_bulanan_cached(df_libur_train, df_libur_test, tahun_awal=None):
+    """
+    Kalender bulanan historis + KALENDER_TAHUN_KE_DEPAN tahun ke depan, di-cache per
+    data libur. `tahun_awal` (tahun pertama data penumpang) memperpanjang kalender ke
+    belakang bila file libur dimulai lebih lambat, agar tidak ada bulan tanpa fitur kalender.
+    """
+    df_libur = pd.concat([df_libur_train, df_libur_test], ignore_index=True)
+    if df_libur.empty or 'Tanggal' not in df_libur.columns:
+        return None
+    return bangun_kalender_bulanan(df_libur, int(df_libur['Tahun'].max()) + KALENDER_TAHUN_KE_DEPAN, tahun_awal)
+
+# --- Rekayasa Fitur Musiman & Lag ---
+# Opsi default tidak menambah fitur apa pun sehingga model dasar tetap sama.
+OPSI_FITUR_DEFAULT = {
+    'dummy_bulan': False,   # 11 dummy bulan (Januari sebagai baseline)
+    'fourier_k': 0,         # jumlah pasangan sin/cos periode 12 bulan
+    'lag_penumpang': (),    # lag penumpang dalam bulan, mis. (1, 12)
+    'lag_libur': (),        # lag jumlah libur nasional & cuti bersama
+    'rata_bergulir': (),    # rata-rata penumpang w bulan sebelumnya
+    'kalender_harian': False,  # FITUR_KALENDER dari kalender hari kerja harian
+}
+_POLA_KOLOM_FITUR_MUSIMAN = re.compile(r'^(bulan_|fourier_|lag_|rata_penumpang_)')
+
+def _geser(arr, lag):
+    """Menggeser array `lag` langkah ke belakang (nilai bulan t-lag), awalnya diisi NaN."""
+    out = np.full(len(arr), np.nan)
+    if lag < len(arr):
+        out[lag:] = arr[:len(arr) - lag]
+    return out
+
+def _rata_bergulir_sebelumnya(arr, window):
+    """Rata-rata `window` nilai sebelum bulan t (tanpa bulan t itu sendiri, agar tidak bocor)."""
+    out = np.full(len(arr), np.nan)
+    if window < len(arr) + 1:
+        kumulatif = np.concatenate([[0.0], np.cumsum(arr, dtype=np.float64)])
+        out[window:] = (kumulatif[window:len(arr)] - kumulatif[:len(arr) - window]) / window
+    return out
+
+def _hitung_fitur_musiman(bulan_angka, penumpang, libur_nasional, cuti_bersama, opsi):
+    """
+    Menghitung semua fitur musiman & lag sekaligus (vektor) untuk seluruh linimasa.
+    Mengembalikan dict nama_fitur -> array dengan urutan kolom yang tetap.
+    """
+    fitur = {}
+    if opsi['dummy_bulan']:
+        for angka in range(2, 13):
+            fitur[f'bulan_{ANGKA_KE_BULAN[angka]}'] = (bulan_angka == angka).astype(np.float64)
+    sudut = 2 * np.pi * bulan_angka / 12
+    for k in range(1, opsi['fourier_k'] + 1):
+        fitur[f'fourier_sin_{k}'] = np.sin(k * sudut)
+        fitur[f'fourier_cos_{k}'] = np.cos(k * sudut)
+    for lag in opsi['lag_penumpang']:
+        fitur[f'lag_penumpang_{lag}'] = _geser(penumpang, lag)
+    for lag in opsi['lag_libur']:
+        fitur[f'lag_libur_nasional_{lag}'] = _geser(libur_nasional, lag)
+        fitur[f'lag_cuti_bersama_{lag}'] = _geser(cuti_bersama, lag)
+    for window in opsi['rata_bergulir']:
+        fitur[f'rata_penumpang_{window}'] = _rata_bergulir_sebelumnya(penumpang, window)
+    return fitur
+
+def _nama_fitur_musiman(opsi):
+    """Daftar nama fitur tambahan yang dihasilkan oleh `opsi` (kosong untuk opsi default)."""
+    if not opsi:
+        return []
+    kosong = np.zeros(0)
+    return list(_hitung_fitur_musiman(kosong, kosong, kosong, kosong, {**OPSI_FITUR_DEFAULT, **opsi}).keys())
+
+def bangun_fitur_musiman(df_training, df_testing, opsi=None):
+    """
+    Tahap rekayasa fitur antara _process_and_combine_data dan latih_dan_evaluasi_regresi.
+    Fitur kalender (FITUR_KALENDER) sudah digabung saat data diproses; di sini hanya dipilih.
+    Fitur dihitung pada gabungan training + testing agar lag di awal data testing
+    memakai nilai aktual akhir training. Baris awal training yang lag-nya belum
+    tersedia berisi NaN dan dilewati saat fitting.
+    Mengembalikan (df_training, df_testing, daftar_fitur_tambahan, error).
+    """
+    try:
+        opsi = {**OPSI_FITUR_DEFAULT, **(opsi or {})}
+        df_training = df_training.loc[:, [c for c in df_training.columns if not _POLA_KOLOM_FITUR_MUSIMAN.match(c)]]
+        df_testing = df_testing.loc[:, [c for c in df_testing.columns if not _POLA_KOLOM_FITUR_MUSIMAN.match(c)]]
+        fitur_kalender = list(FITUR_KALENDER) if opsi['kalender_harian'] else []
+        if fitur_kalender and not set(FITUR_KALENDER).issubset(df_training.columns):
+            raise ValueError("fitur kalender membutuhkan kolom 'Tanggal' pada file libur")
+        if not _nama_fitur_musiman(opsi):
+            return df_training, df_testing, fitur_kalender, None
+
+        df_all = pd.concat([df_training, df_testing], ignore_index=True)
+        fitur = _hitung_fitur_musiman(
+            df_all['Bulan'].map(BULAN_KE_ANGKA).to_numpy(dtype=np.float64),
+            df_all['Penumpang (000)'].to_numpy(dtype=np.float64),
+            df_all['jumlah_libur_nasional'].to_numpy(dtype=np.float64),
+            df_all['jumlah_cuti_bersama'].to_numpy(dtype=np.float64),
+            opsi,
+        )
+        df_fitur = pd.DataFrame(fitur)
+        n_training = len(df_training)
+        df_training = pd.concat([df_training, df_fitur.iloc[:n_training].set_index(df_training.index)], axis=1)
+        df_testing = pd.concat([df_testing, df_fitur.iloc[n_training:].set_index(df_testing.index)], axis=1)
+        return df_training, df_testing, list(fitur.keys()) + fitur_kalender, None
+    except Exception as e:
+        print(f"ERROR: {e}")
+        return None, None, [], f"ERROR saat membangun fitur musiman: {e}"
+
+@st.cache_data(show_spinner=False)
+def _bangun_fitur_musiman_cached(df_training, df_testing, opsi):
+    """Versi ter-cache per versi data dan opsi fitur."""
+    return bangun_fitur_musiman(df_training, df_testing, opsi)
+
+def _prediksi_rekursif(model, df_history, df_future, opsi):
+    """
+    Prediksi ke depan untuk model dengan fitur lag: fitur yang bergantung pada
+    penumpang dihitung ulang setiap bulan dari riwayat yang sudah diperpanjang
+    dengan prediksi sebelumnya; fitur kalender dan libur dihitung sekali (vektor).
+    """
+    n_history = len(df_history)
+    penumpang = np.concatenate([df_history['Penumpang (000)'].to_numpy(dtype=np.float64),
+                                np.full(len(df_future), np.nan)])
+    bulan_angka = pd.concat([df_history['Bulan'], df_future['Bulan']]).map(BULAN_KE_ANGKA).to_numpy(dtype=np.float64)
+    libur_nasional = np.concatenate([df_history['jumlah_libur_nasional'].to_numpy(dtype=np.float64),
+                                     df_future['jumlah_libur_nasional'].to_numpy(dtype=np.float64)])
+    cuti_bersama = np.concatenate([df_history['jumlah_cuti_bersama'].to_numpy(dtype=np.float64),
+                                   df_future['jumlah_cuti_bersama'].to_numpy(dtype=np.float64)])
+
+    features = list(model.feature_names_in_)
+    fitur_semua = _hitung_fitur_musiman(bulan_angka, penumpang, libur_nasional, cuti_bersama, opsi)
+    X = np.column_stack([
+        fitur_semua[f][n_history:] if f in fitur_semua else df_future[f].to_numpy(dtype=np.float64)
+        for f in features
+    ])
+    kolom_dinamis = [j for j, f in enumerate(features) if f.startswith(('lag_penumpang_', 'rata_penumpang_'))]
+
+    for i in range(len(df_future)):
+        t = n_history + i
+        if kolom_dinamis:
+            fitur_t = _hitung_fitur_musiman(bulan_angka[:t + 1], penumpang[:t + 1],
+                                            libur_nasional[:t + 1], cuti_bersama[:t + 1], opsi)
+            for j in kolom_dinamis:
+                X[i, j] = fitur_t[features[j]][-1]
+        if hasattr(model, 'coef_'):
+            penumpang[t] = model.intercept_ + X[i] @ model.coef_
+        else:
+            penumpang[t] = model.predict(pd.DataFrame(X[i:i + 1], columns=features))[0]
+    return penumpang[n_history:]
+
+def _latih_estimator(model, df_training, df_testing, features):
+    """
+    Melatih estimator bergaya sklearn dan menghitung metrik standar aplikasi.
+    Baris dengan fitur NaN (awal lag) dilewati saat fitting dan prediksinya bernilai NaN.
+    """
+    X_train = df_training[features]
+    y_train = df_training['Penumpang (000)'].values
+    valid_train = X_train.notna().all(axis=1).to_numpy()
+    if valid_train.sum() <= len(features):
+        raise ValueError(f"hanya {int(valid_train.sum())} baris training lengkap untuk {len(features)} fitur; "
+                         "kurangi lag atau tambah data training")
+
+    model.fit(X_train[valid_train], y_train[valid_train])
+    return _evaluasi_estimator(model, df_training, df_testing, features)
+
+def _evaluasi_estimator(model, df_training, df_testing, features):
+    """Prediksi dan metrik standar aplikasi untuk model yang sudah dilatih."""
+    X_train = df_training[features]
+    y_train = df_training['Penumpang (000)'].values
+    valid_train = X_train.notna().all(axis=1).to_numpy()
+    y_pred_training = np.full(len(X_train), np.nan)
+    y_pred_training[valid_train] = model.predict(X_train[valid_train])
+    
+    X_test = df_testing[features]
+    y_test = df_testing['Penumpang (000)'].values
+    y_pred_testing = model.predict(X_test)
+    
+    y_train_valid, y_pred_training_valid = y_train[valid_train], y_pred_training[valid_train]
+    mae_training = mean_absolute_error(y_train_valid, y_pred_training_valid)
+    mape_training = np.mean(np.abs((y_train_valid - y_pred_training_valid) / np.where(y_train_valid == 0, 1e-10, y_train_valid))) * 100
+    
+    mae_testing = mean_absolute_error(y_test, y_pred_testing)
+    mape_testing = np.mean(np.abs((y_test - y_pred_testing) / np.where(y_test == 0, 1e-10, y_test))) * 100
+
+    return {
+        'model': model,
+        'y_pred_training': y_pred_training,
+        'y_pred_testing': y_pred_testing,
+        'mae_training': mae_training,
+        'mape_training': mape_training,
+        'mae_testing': mae_testing,
+        'mape_testing': mape_testing,
+        'features': X_train.columns.tolist()
+    }
+
+def latih_dan_evaluasi_regresi(df_training, df_testing, features=None):
+    """
+    Melatih model regresi berganda, membuat prediksi, dan menghitung metrik.
+    `features` default ke fitur dasar; baris dengan fitur NaN (awal lag) dilewati
+    saat fitting dan prediksinya bernilai NaN. Koefisien dihitung oleh inti
+    multi-seri (`_regresi_bertumpuk`, satu seri) lalu dipasang ke LinearRegression
+    agar antarmuka model (`predict`, `coef_`, `feature_names_in_`) tetap sama.
+    """
+    try:
+        features = list(features or FITUR_REGRESI)
+        inti = _regresi_bertumpuk(df_training, df_testing, None, features, horizon=0)
+        model = LinearRegression()
+        model.coef_, model.intercept_ = inti['coef'][0], float(inti['intercept'][0])
+        model.feature_names_in_ = np.asarray(features, dtype=object)
+        model.n_features_in_ = len(features)
+        results = _evaluasi_estimator(model, df_training, df_testing, features)
+        return results, None
+    except Exception as e:
+        print(f"ERROR: {e}")
+        return None, f"ERROR saat melatih atau mengevaluasi model: {e}"
+
+# --- Model Deret Waktu: Regresi dengan Galat ARIMA ---
+@st.cache_resource(show_spinner=False)
+def get_sarimax_executor():
+    """
+    Process pool bersama untuk pencarian orde SARIMAX (dipakai ulang lintas sesi
+    agar biaya start proses hanya dibayar sekali). None bila hanya ada satu CPU.
+    """
+    n_workers = os.cpu_count() or 1
+    if n_workers < 2:
+        return None
+    return ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context('spawn'))
+
+def latih_dan_evaluasi_sarimax(df_training, df_testing, features=None, executor=None):
+    """
+    Alternatif latih_dan_evaluasi_regresi: regresi dengan galat SARIMA pada regresor
+    yang sama. Orde (p,d,q)(P,D,Q,12) dipilih lewat grid search ber-AIC (lihat
+    sarimax_engine.cari_orde). Data testing diramal multi-langkah dari akhir
+    training, lalu ditambahkan ke state model agar prediksi 5 tahun dimulai
+    setelah data testing. Hasilnya memiliki kunci yang sama dengan model OLS.
+    """
+    try:
+        features = list(features or FITUR_REGRESI)
+        X_train = df_training[features]
+        y_train = df_training['Penumpang (000)'].values
+        X_test = df_testing[features]
+        y_test = df_testing['Penumpang (000)'].values
+
+        grid, n_dipangkas = cari_orde(y_train, X_train, executor=executor)
+        if not np.isfinite(grid['aic'].iloc[0]):
+            raise ValueError("tidak ada orde SARIMAX yang berhasil dilatih; tambah data training")
+        terbaik = grid.iloc[0]
+
+        model = RegresiARIMA(terbaik['order'], terbaik['seasonal_order']).fit(X_train, y_train)
+        y_pred_training = model.prediksi_dalam_sampel()
+        y_pred_testing = model.predict(X_test)
+        model.tambah_observasi(X_test, y_test)
+
+        valid_train = ~np.isnan(y_pred_training)
+        y_train_valid, y_pred_training_valid = y_train[valid_train], y_pred_training[valid_train]
+        mae_training = mean_absolute_error(y_train_valid, y_pred_training_valid)
+        mape_training = np.mean(np.abs((y_train_valid - y_pred_training_valid) / np.where(y_train_valid == 0, 1e-10, y_train_valid))) * 100
+        mae_testing = mean_absolute_error(y_test, y_pred_testing)
+        mape_testing = np.mean(np.abs((y_test - y_pred_testing) / np.where(y_test == 0, 1e-10, y_test))) * 100
+
+        results = {
+            'model': model,
+            'y_pred_training': y_pred_training,
+            'y_pred_testing': y_pred_testing,
+            'mae_training': mae_training,
+            'mape_training': mape_training,
+            'mae_testing': mae_testing,
+            'mape_testing': mape_testing,
+            'features': features,
+            'jenis_model': f"SARIMAX{tuple(model.order)}x{tuple(model.seasonal_order)}",
+            'keterangan_model': "Koefisien adalah bagian regresi; galatnya mengikuti proses ARIMA musiman.",
+            'grid_orde': grid,
+            'orde_dipangkas': n_dipangkas,
+        }
+        return results, None
+    except Exception as e:
+        print(f"ERROR: {e}")
+        return None, f"ERROR saat melatih model SARIMAX: {e}"
+
+# --- Regresi Teregularisasi (Ridge / Lasso / Elastic-Net) ---
+JUMLAH_ALPHA_JALUR = 100
+RASIO_ALPHA_MIN = 1e-4  # alpha terkecil relatif terhadap alpha terbesar di jalur
+ENET_TOLERANSI = 1e-8
+ENET_MAKS_ITERASI = 20000
+JENIS_REGULARISASI = {'ridge': 'Ridge', 'lasso': 'Lasso', 'elasticnet': 'Elastic-Net'}
+
+class ModelTeregularisasi:
+    """Model linear dari satu titik jalur regularisasi; antarmukanya mengikuti LinearRegression."""
+
+    def __init__(self, coef, intercept, features, alpha, jenis):
+        self.coef_ = np.asarray(coef, dtype=np.float64)
+        self.intercept_ = float(intercept)
+        self.feature_names_in_ = np.asarray(features, dtype=object)
+        self.alpha_ = float(alpha)
+        self.jenis = jenis
+
+    def predict(self, X):
+        return X[list(self.feature_names_in_)].to_numpy(dtype=np.float64) @ self.coef_ + self.intercept_
+
+def _grid_alpha(Xs, yc, jenis, l1_ratio):
+    """Grid alpha log-spasi; untuk lasso/elastic-net batas atas adalah alpha yang membuat semua koefisien nol."""
+    n = len(yc)
+    if jenis == 'ridge':
+        # Skala relatif terhadap X^T X = n * korelasi: dari hampir OLS hingga koefisien ~0
+        alpha_max, alpha_min = n * 1e2, n * 1e-6
+    else:
+        alpha_max = np.max(np.abs(Xs.T @ yc)) / (n * (l1_ratio if jenis == 'elasticnet' else 1.0))
+        alpha_min = alpha_max * RASIO_ALPHA_MIN
+    return np.logspace(np.log10(alpha_max), np.log10(alpha_min), JUMLAH_ALPHA_JALUR)
+
+def _jalur_koefisien(X, y, alphas, jenis, l1_ratio):
+    """
+    Koefisien (skala asli) dan intercept untuk semua alpha sekaligus.
+    Ridge memakai satu SVD: b(alpha) = V diag(s / (s^2 + alpha)) U^T y.
+    Lasso/elastic-net memakai enet_path (coordinate descent dengan warm start
+    dari alpha sebelumnya di sepanjang jalur).
+    """
+    x_mean, y_mean = X.mean(axis=0), y.mean()
+    x_scale = X.std(axis=0)
+    x_scale[x_scale == 0] = 1.0
+    Xs = (X - x_mean) / x_scale
+    yc = y - y_mean
+
+    if jenis == 'ridge':
+        U, sv, Vt = np.linalg.svd(Xs, full_matrices=False)
+        faktor = sv[None, :] / (sv[None, :] ** 2 + alphas[:, None])
+        coef_std = (faktor * (U.T @ yc)[None, :]) @ Vt
+    else:
+        _, coef_std, _ = enet_path(Xs, yc, l1_ratio=l1_ratio if jenis == 'elasticnet' else 1.0, alphas=alphas,
+                                   tol=ENET_TOLERANSI, max_iter=ENET_MAKS_ITERASI)
+        coef_std = coef_std.T
+    coef = coef_std / x_scale
+    return coef, y_mean - coef @ x_mean, coef_std
+
+def _mape_per_kolom(y, prediksi):
+    """MAPE untuk setiap kolom prediksi (satu kolom per alpha)."""
+    return np.mean(np.abs((y[:, None] - prediksi) / np.where(y == 0, 1e-10, y)[:, None]), axis=0) * 100
+
+def hitung_jalur_regularisasi(df_training, df_testing, features, jenis='ridge', l1_ratio=0.5, n_splits=3):
+    """
+    Menghitung seluruh jalur regularisasi dan memilih alpha dengan validasi silang
+    deret waktu (TimeSeriesSplit, fold berurutan tanpa melihat masa depan).
+    Mengembalikan (hasil, error); hasil berisi alpha, koefisien per alpha,
+    MAPE CV dan MAPE testing per alpha, serta indeks alpha terpilih.
+    """
+    try:
+        start = time.perf_counter()
+        X_all = df_training[features].to_numpy(dtype=np.float64)
+        y_all = df_training['Penumpang (000)'].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(X_all).any(axis=1)
+        X, y = X_all[valid], y_all[valid]
+        if len(y) < 2 * (n_splits + 1):
+            raise ValueError(f"hanya {len(y)} baris training lengkap untuk {n_splits} fold validasi silang")
+
+        x_scale = X.std(axis=0)
+        x_scale[x_scale == 0] = 1.0
+        alphas = _grid_alpha((X - X.mean(axis=0)) / x_scale, y - y.mean(), jenis, l1_ratio)
+
+        cv_mape = np.zeros(len(alphas))
+        for idx_latih, idx_validasi in TimeSeriesSplit(n_splits=n_splits).split(X):
+            coef, intercept, _ = _jalur_koefisien(X[idx_latih], y[idx_latih], alphas, jenis, l1_ratio)
+            cv_mape += _mape_per_kolom(y[idx_validasi], X[idx_validasi] @ coef.T + intercept)
+        cv_mape /= n_splits
+
+        coef, intercept, coef_std = _jalur_koefisien(X, y, alphas, jenis, l1_ratio)
+        X_test = df_testing[features].to_numpy(dtype=np.float64)
+        test_mape = _mape_per_kolom(df_testing['Penumpang (000)'].to_numpy(dtype=np.float64), X_test @ coef.T + intercept)
+
+        return {
+            'jenis': jenis,
+            'l1_ratio': l1_ratio,
+            'features': list(features),
+            'alphas': alphas,
+            'coef': coef,
+            'coef_std': coef_std,
+            'intercept': intercept,
+            'cv_mape': cv_mape,
+            'test_mape': test_mape,
+            'indeks_terbaik': int(np.argmin(cv_mape)),
+            'durasi_ms': (time.perf_counter() - start) * 1e3,
+        }, None
+    except Exception as e:
+        print(f"ERROR: {e}")
+        return None, f"ERROR saat menghitung jalur regularisasi: {e}"
+
+@st.cache_data(show_spinner=False)
+def _hitung_jalur_regularisasi_cached(df_training, df_testing, features, jenis, l1_ratio, n_splits):
+    return hitung_jalur_regularisasi(df_training, df_testing, list(features), jenis, l1_ratio, n_splits)
+
+def hasil_model_regularisasi(jalur, df_training, df_testing, indeks=None):
+    """Membentuk dict hasil (format sama dengan latih_dan_evaluasi_regresi) dari satu titik jalur."""
+    indeks = jalur['indeks_terbaik'] if indeks is None else indeks
+    features = jalur['features']
+    alpha = jalur['alphas'][indeks]
+    nama = JENIS_REGULARISASI[jalur['jenis']]
+    model = ModelTeregularisasi(jalur['coef'][indeks], jalur['intercept'][indeks], features, alpha, nama)
+
+    X_train = df_training[features]
+    y_train = df_training['Penumpang (000)'].values
+    valid_train = X_train.notna().all(axis=1).to_numpy()
+    y_pred_training = np.full(len(X_train), np.nan)
+    y_pred_training[valid_train] = model.predict(X_train[valid_train])
+    y_pred_testing = model.predict(df_testing)
+    y_test = df_testing['Penumpang (000)'].values
+
+    y_train_valid, y_pred_training_valid = y_train[valid_train], y_pred_training[valid_train]
+    return {
+        'model': model,
+        'y_pred_training': y_pred_training,
+        'y_pred_testing': y_pred_testing,
+        'mae_training': mean_absolute_error(y_train_valid, y_pred_training_valid),
+        'mape_training': _mape_per_kolom(y_train_valid, y_pred_training_valid[:, None])[0],
+        'mae_testing': mean_absolute_error(y_test, y_pred_testing),
+        'mape_testing': _mape_per_kolom(y_test, y_pred_testing[:, None])[0],
+        'features': list(features),
+        'jenis_model': f"{nama} (alpha={alpha:.4g})",
+        'keterangan_model': "Koefisien regresi teregularisasi pada fitur terstandarisasi, dikembalikan ke skala asli.",
+    }
+
+# --- Diagnostik Pengaruh & Pencilan ---
+# Batas |residual studentized eksternal| untuk menandai pencilan
+AMBANG_STUDENTIZED = 3.0
+
+def _perbarui_cholesky(R, x, tanda):
+    """
+    Update (tanda=+1) atau downdate (tanda=-1) rank-satu faktor segitiga atas R
+    sehingga R'^T R' = R^T R + tanda * x x^T, dalam O(k^2) tanpa fitting ulang.
+    Downdate yang membuat matriks tidak definit positif menghasilkan LinAlgError.
+    """
+    R = R.copy()
+    x = np.asarray(x, dtype=np.float64).copy()
+    for k in range(len(x)):
+        r2 = R[k, k] ** 2 + tanda * x[k] ** 2
+        if r2 <= 1e-12 * R[k, k] ** 2:
+            raise np.linalg.LinAlgError("matriks desain menjadi singular setelah observasi dikeluarkan")
+        r = np.sqrt(r2)
+        c, s = r / R[k, k], x[k] / R[k, k]
+        R[k, k] = r
+        R[k, k + 1:] = (R[k, k + 1:] + tanda * s * x[k + 1:]) / c
+        x[k + 1:] = c * x[k + 1:] - s * R[k, k + 1:]
+    return R
+
+class RegresiInkremental:
+    """
+    OLS yang disimpan sebagai faktor R (R^T R = Z^T Z, Z berkonstanta) dan Z^T y.
+    Observasi dapat dikeluarkan atau dikembalikan dengan update rank-satu; antarmukanya
+    mengikuti LinearRegression (`coef_`, `intercept_`, `feature_names_in_`, `predict`).
+    """
+
+    def __init__(self, R, Zty, features):
+        self.R = np.asarray(R, dtype=np.float64)
+        self.Zty = np.asarray(Zty, dtype=np.float64)
+        self.feature_names_in_ = np.asarray(features, dtype=object)
+        self._hitung_koefisien()
+
+    def _hitung_koefisien(self):
+        beta = solve_triangular(self.R, solve_triangular(self.R, self.Zty, trans='T'))
+        self.intercept_ = float(beta[0])
+        self.coef_ = beta[1:]
+
+    def keluarkan(self, z, y):
+        """Mengeluarkan satu observasi (baris desain z berkonstanta, target y)."""
+        self.R = _perbarui_cholesky(self.R, z, -1)
+        self.Zty = self.Zty - z * y
+        self._hitung_koefisien()
+        return self
+
+    def kembalikan(self, z, y):
+        """Mengembalikan observasi yang sebelumnya dikeluarkan."""
+        self.R = _perbarui_cholesky(self.R, z, +1)
+        self.Zty = self.Zty + z * y
+        self._hitung_koefisien()
+        return self
+
+    def salin(self):
+        return RegresiInkremental(self.R, self.Zty, self.feature_names_in_)
+
+    def predict(self, X):
+        return X[list(self.feature_names_in_)].to_numpy(dtype=np.float64) @ self.coef_ + self.intercept_
+
+@st.cache_data(show_spinner=False)
+def diagnostik_pengaruh(df_training, features):
+    """
+    Leverage, residual studentized (eksternal), Cook's distance, dan DFFITS dari
+    faktor QR tipis Z = QR dalam O(n*k^2): leverage h_i adalah norma baris Q
+    sehingga matriks hat n x n tidak pernah dibentuk.
+    Mengembalikan (hasil, error); hasil berisi 'tabel', 'Z', 'y', dan 'model'
+    (RegresiInkremental pada seluruh data training).
+    """
+    try:
+        features = list(features)
+        X = df_training[features].dropna()
+        y = df_training.loc[X.index, TARGET_REGRESI].to_numpy(dtype=np.float64)
+        Z = np.column_stack([np.ones(len(X)), X.to_numpy(dtype=np.float64)])
+        n, p = Z.shape
+        if n <= p + 1:
+            raise ValueError(f"hanya {n} baris training lengkap untuk {p} parameter")
+
+        Q, R = np.linalg.qr(Z)
+        # Diagonal R dibuat positif agar dapat dipakai sebagai faktor Cholesky Z^T Z
+        tanda = np.sign(np.diag(R))
+        Q, R = Q * tanda, R * tanda[:, None]
+        Qty = Q.T @ y
+        resid = y - Q @ Qty
+        h = np.einsum('ij,ij->i', Q, Q)
+
+        sse = resid @ resid
+        s2 = sse / (n - p)
+        # Varians galat tanpa observasi ke-i, tanpa fitting ulang
+        s2_i = (sse - resid ** 2 / (1 - h)) / (n - p - 1)
+        r_internal = resid / np.sqrt(s2 * (1 - h))
+        t_eksternal = resid / np.sqrt(s2_i * (1 - h))
+        cook = r_internal ** 2 * h / (p * (1 - h))
+        dffits = t_eksternal * np.sqrt(h / (1 - h))
+
+        tabel = pd.DataFrame({
+            'Bulan': df_training.loc[X.index, 'Bulan'].to_numpy(),
+            'Tahun': df_training.loc[X.index, 'Tahun'].to_numpy(),
+            'Residual': resid,
+            'Leverage': h,
+            'Studentized': t_eksternal,
+            "Cook's D": cook,
+            'DFFITS': dffits,
+        }, index=X.index)
+        tanda_pengaruh = {
+            'Leverage': h > 2 * p / n,
+            'Studentized': np.abs(t_eksternal) > AMBANG_STUDENTIZED,
+            "Cook's D": cook > 4 / n,
+            'DFFITS': np.abs(dffits) > 2 * np.sqrt(p / n),
+        }
+        tabel['Ditandai'] = [', '.join(k for k, v in tanda_pengaruh.items() if v[i]) for i in range(n)]
+        model = RegresiInkremental(R, R.T @ Qty, features)
+        return {'tabel': tabel, 'Z': Z, 'y': y, 'model': model, 'ambang': {
+            'Leverage': 2 * p / n, 'Studentized': AMBANG_STUDENTIZED,
+            "Cook's D": 4 / n, 'DFFITS': 2 * np.sqrt(p / n),
+        }}, None
+    except Exception as e:
+        print(f"ERROR: {e}")
+        return None, f"Gagal menghitung diagnostik pengaruh: {e}"
+
+def _model_tanpa_pencilan(pengaruh, kunci, dikecualikan):
+    """
+    Model dengan observasi `dikecualikan` (posisi baris pada tabel pengaruh) dikeluarkan.
+    State di session_state hanya menerapkan selisih pilihan sebelumnya sebagai
+    update/downdate rank-satu, sehingga setiap toggle bernilai O(k^2).
+    """
+    state = st.session_state.get('pengaruh_state')
+    if state is None or state['kunci'] != kunci or not dikecualikan:
+        state = {'kunci': kunci, 'model': pengaruh['model'].salin(), 'dikecualikan': set()}
+    model = state['model'].salin()
+    Z, y = pengaruh['Z'], pengaruh['y']
+    for i in sorted(set(dikecualikan) - state['dikecualikan']):
+        model.keluarkan(Z[i], y[i])
+    for i in sorted(state['dikecualikan'] - set(dikecualikan)):
+        model.kembalikan(Z[i], y[i])
+    st.session_state.pengaruh_state = {'kunci': kunci, 'model': model, 'dikecualikan': set(dikecualikan)}
+    return model
+
+@st.fragment
+def _influence_fragment(results):
+    """Tabel pengaruh dan mode keluarkan-lalu-fit-ulang; setiap toggle hanya menjalankan ulang fragmen ini."""
+    df_training = st.session_state.df_training
+    df_testing = st.session_state.df_testing
+    features = tuple(f for f in results['features'] if f in df_training.columns)
+    with instrument('modeling.diagnostik_pengaruh', rows=len(df_training)):
+        pengaruh, error = diagnostik_pengaruh(df_training, features)
+    if error:
+        st.error(error)
+        return
+
+    tabel = pengaruh['tabel']
+    ambang = pengaruh['ambang']
+    st.write("Observasi berpengaruh dihitung dari faktor QR model OLS pada fitur model aktif. Batas penandaan: "
+             + "; ".join(f"{k} > {_format_indonesian_numeric(v, 3)}" for k, v in ambang.items()) + ".")
+    label = (tabel['Bulan'] + ' ' + tabel['Tahun'].astype(int).astype(str)).tolist()
+    chart = alt.Chart(pd.DataFrame({'Bulan': label, "Cook's D": tabel["Cook's D"].to_numpy(),
+                                    'Ditandai': tabel['Ditandai'].ne('').to_numpy()})).mark_bar().encode(
+        x=alt.X('Bulan:N', sort=None, title=None),
+        y=alt.Y("Cook's D:Q"),
+        color=alt.Color('Ditandai:N', scale=alt.Scale(domain=[False, True], range=['#5c6370', '#F63366']), legend=None),
+        tooltip=['Bulan', "Cook's D"],
+    )
+    st.altair_chart(chart, use_container_width=True)
+    st.dataframe(tabel[tabel['Ditandai'] != ''].style.format(
+        {col: '{:.4g}' for col in ('Residual', 'Leverage', 'Studentized', "Cook's D", 'DFFITS')} | {'Tahun': '{:.0f}'}
+    ), hide_index=True)
+
+    ditandai = [label[i] for i in range(len(label)) if tabel['Ditandai'].iat[i]]
+    if st.button("Pilih semua observasi yang ditandai", key="pengaruh_pilih_ditandai"):
+        st.session_state.pengaruh_dikecualikan = ditandai
+    pilihan = st.multiselect("Bulan yang dikeluarkan dari fitting", label, key="pengaruh_dikecualikan")
+    posisi = [label.index(b) for b in pilihan]
+
+    start = time.perf_counter()
+    try:
+        model = _model_tanpa_pencilan(pengaruh, (dataset_fingerprint(df_training), features), posisi)
+    except np.linalg.LinAlgError as e:
+        st.error(f"Tidak dapat mengeluarkan observasi tersebut: {e}.")
+        return
+    durasi_us = (time.perf_counter() - start) * 1e6
+
+    penuh = pengaruh['model']
+    hasil_penuh = _evaluasi_estimator(penuh, df_training, df_testing, list(features))
+    hasil_baru = _evaluasi_estimator(model, df_training, df_testing, list(features))
+    st.caption(f"Fit ulang dengan {len(posisi)} observasi dikeluarkan: "
+               f"{_format_indonesian_numeric(durasi_us, 0)} µs (update rank-satu).")
+    st.dataframe(pd.DataFrame({
+        'Seluruh data': np.r_[penuh.intercept_, penuh.coef_],
+        'Tanpa bulan terpilih': np.r_[model.intercept_, model.coef_],
+    }, index=['Intercept'] + list(features)).style.format('{:.4g}'))
+    col1, col2 = st.columns(2)
+    with col1:
+        st.metric("MAPE Testing (tanpa bulan terpilih)", f"{_format_indonesian_numeric(hasil_baru['mape_testing'], 2)}%",
+                  delta=f"{hasil_baru['mape_testing'] - hasil_penuh['mape_testing']:+.2f} poin", delta_color="inverse")
+    with col2:
+        st.metric("MAE Testing (tanpa bulan terpilih)", _format_indonesian_numeric(hasil_baru['mae_testing'], 3),
+                  delta=f"{hasil_baru['mae_testing'] - hasil_penuh['mae_testing']:+.3f}", delta_color="inverse")
+
+    if posisi and st.button("Gunakan sebagai Model Aktif", key="pengaruh_gunakan"):
+        hasil_baru['jenis_model'] = f"OLS tanpa {len(posisi)} observasi berpengaruh"
+        hasil_baru['keterangan_model'] = f"Bulan yang dikeluarkan dari fitting: {', '.join(pilihan)}."
+        hasil_baru['opsi_fitur'] = results.get('opsi_fitur')
+        st.session_state.model_results = hasil_baru
+        for stale_key in ('df_future', 'df_future_model'):
+            st.session_state.pop(stale_key, None)
+        st.rerun(scope="app")
+
+# --- Regresi Robust (Huber / IRLS) ---
+# Konstanta tuning Huber: efisiensi 95% bila galat normal
+KONSTANTA_HUBER = 1.345
+IRLS_TOLERANSI = 1e-8
+IRLS_MAKS_ITERASI = 100
+
+def irls_huber(Z, y, beta_awal, c=KONSTANTA_HUBER, tol=IRLS_TOLERANSI, maks_iterasi=IRLS_MAKS_ITERASI):
+    """
+    Regresi Huber dengan iteratively reweighted least squares. Setiap iterasi
+    memperbarui skala (MAD residual) dan seluruh bobot w_i = min(1, c / |r_i/s|)
+    sekaligus, lalu menyelesaikan kuadrat terkecil berbobot lewat QR.
+    Berhenti bila perubahan koefisien relatif < `tol`.
+    Mengembalikan (beta, bobot, skala, jumlah_iterasi, konvergen).
+    """
+    beta = np.asarray(beta_awal, dtype=np.float64)
+    bobot = np.ones(len(y))
+    skala = np.nan
+    for iterasi in range(1, maks_iterasi + 1):
+        resid = y - Z @ beta
+        skala = np.median(np.abs(resid)) / 0.6745
+        if skala <= 0:
+            return beta, bobot, skala, iterasi, True
+        u = np.abs(resid) / skala
+        bobot = np.minimum(1.0, c / np.maximum(u, 1e-12))
+        akar_bobot = np.sqrt(bobot)
+        Q, R = np.linalg.qr(Z * akar_bobot[:, None])
+        beta_baru = solve_triangular(R, Q.T @ (y * akar_bobot))
+        selisih = np.max(np.abs(beta_baru - beta)) / max(np.max(np.abs(beta)), 1e-12)
+        beta = beta_baru
+        if selisih < tol:
+            return beta, bobot, skala, iterasi, True
+    return beta, bobot, skala, maks_iterasi, False
+
+class ModelRobust:
+    """Model linear hasil IRLS Huber; antarmukanya mengikuti LinearRegression."""
+
+    def __init__(self, coef, intercept, features, bobot):
+        self.coef_ = np.asarray(coef, dtype=np.float64)
+        self.intercept_ = float(intercept)
+        self.feature_names_in_ = np.asarray(features, dtype=object)
+        self.bobot_ = np.asarray(bobot, dtype=np.float64)
+
+    def predict(self, X):
+        return X[list(self.feature_names_in_)].to_numpy(dtype=np.float64) @ self.coef_ + self.intercept_
+
+def latih_dan_evaluasi_robust(df_training, df_testing, features=None, c=KONSTANTA_HUBER):
+    """
+    Melatih regresi robust Huber (IRLS) mulai dari koefisien OLS. Matriks desain
+    dan fit OLS awal diambil dari faktor QR yang sama dengan diagnostik pengaruh
+    (di-cache), sehingga biayanya setara fit OLS per iterasi.
+    Mengembalikan (results, error) dengan format latih_dan_evaluasi_regresi.
+    """
+    try:
+        features = list(features or FITUR_REGRESI)
+        pengaruh, error = diagnostik_pengaruh(df_training, tuple(features))
+        if error:
+            return None, error
+        ols = pengaruh['model']
+        beta, bobot, skala, iterasi, konvergen = irls_huber(
+            pengaruh['Z'], pengaruh['y'], np.r_[ols.intercept_, ols.coef_], c=c)
+        model = ModelRobust(beta[1:], beta[0], features, bobot)
+        results = _evaluasi_estimator(model, df_training, df_testing, features)
+        bobot_bawah = int(np.sum(bobot < 1))
+        results.update({
+            'jenis_model': f"Regresi Robust Huber (c={c:g})",
+            'keterangan_model': f"IRLS {iterasi} iterasi{'' if konvergen else ' (belum konvergen)'}; "
+                                f"{bobot_bawah} bulan mendapat bobot < 1 (skala MAD={skala:.4g}).",
+            'bobot_irls': pd.Series(bobot, index=pengaruh['tabel'].index),
+            'iterasi_irls': iterasi,
+            'konvergen_irls': konvergen,
+        })
+        return results, None
+    except Exception as e:
+        print(f"ERROR: {e}")
+        return None, f"ERROR saat melatih regresi robust: {e}"
+
+def show_robust_panel(results):
+    """Membandingkan OLS dan regresi robust Huber pada fitur model aktif."""
+    st.write("Regresi robust memberi bobot lebih kecil pada bulan dengan residual besar (lonjakan libur, "
+             "kesalahan input) sehingga koefisien tidak tertarik oleh segelintir bulan anomali.")
+    df_training = st.session_state.df_training
+    df_testing = st.session_state.df_testing
+    features = [f for f in results['features'] if f in df_training.columns]
+    c = st.slider("Konstanta Huber (c)", 1.0, 3.0, KONSTANTA_HUBER, 0.05, key="robust_c",
+                  help="Semakin kecil, semakin kuat pembobotan turun untuk residual besar.")
+
+    with instrument('modeling.regresi_robust', rows=len(df_training)):
+        hasil_robust, error = latih_dan_evaluasi_robust(df_training, df_testing, features, c)
+    if error:
+        st.error(error)
+        return
+    pengaruh, _ = diagnostik_pengaruh(df_training, tuple(features))
+    hasil_ols = _evaluasi_estimator(pengaruh['model'], df_training, df_testing, features)
+
+    metrik = ['mae_training', 'mape_training', 'mae_testing', 'mape_testing']
+    st.dataframe(pd.DataFrame({
+        'OLS': [hasil_ols[m] for m in metrik],
+        hasil_robust['jenis_model']: [hasil_robust[m] for m in metrik],
+    }, index=['MAE Training', 'MAPE Training (%)', 'MAE Testing', 'MAPE Testing (%)']).style.format(
+        lambda x: _format_indonesian_numeric(x, 3)))
+    st.caption(hasil_robust['keterangan_model'])
+
+    bobot = hasil_robust['bobot_irls']
+    df_bobot = pd.DataFrame({
+        'Bulan': df_training.loc[bobot.index, 'Bulan'] + ' ' + df_training.loc[bobot.index, 'Tahun'].astype(int).astype(str),
+        'Bobot IRLS': bobot.to_numpy(),
+    })
+    st.altair_chart(alt.Chart(df_bobot).mark_bar(color='#F63366').encode(
+        x=alt.X('Bulan:N', sort=None, title=None),
+        y=alt.Y('Bobot IRLS:Q', scale=alt.Scale(domain=[0, 1])),
+        tooltip=['Bulan', 'Bobot IRLS'],
+    ), use_container_width=True)
+
+    if st.button("Gunakan sebagai Model Aktif", key="robust_gunakan"):
+        hasil_robust['opsi_fitur'] = results.get('opsi_fitur')
+        st.session_state.model_results = hasil_robust
+        for stale_key in ('df_future', 'df_future_model'):
+            st.session_state.pop(stale_key, None)
+        st.rerun()
+
+# --- Perbandingan Model (Model Zoo) ---
+# Anggaran waktu per keluarga model (detik); hasil yang melewati anggaran ditandai dan diabaikan
+ANGGARAN_WAKTU_MODEL = {'SARIMAX': 90.0}
+ANGGARAN_WAKTU_DEFAULT = 30.0
+ULANGAN_LATENSI_PREDIKSI = 5
+
+def _zoo_ols(df_training, df_testing, features):
+    results, error = latih_dan_evaluasi_regresi(df_training, df_testing, features)
+    if error:
+        raise ValueError(error)
+    return results
+
+def _zoo_ridge(df_training, df_testing, features):
+    jalur, error = hitung_jalur_regularisasi(df_training, df_testing, features, 'ridge')
+    if error:
+        raise ValueError(error)
+    return hasil_model_regularisasi(jalur, df_training, df_testing)
+
+def _zoo_huber(df_training, df_testing, features):
+    model = make_pipeline(StandardScaler(), HuberRegressor(max_iter=1000))
+    return _latih_estimator(model, df_training, df_testing, features)
+
+def _zoo_gradient_boosting(df_training, df_testing, features):
+    model = GradientBoostingRegressor(random_state=42)
+    return _latih_estimator(model, df_training, df_testing, features)
+
+def _zoo_random_forest(df_training, df_testing, features):
+    model = RandomForestRegressor(n_estimators=200, random_state=42)
+    return _latih_estimator(model, df_training, df_testing, features)
+
+def _zoo_sarimax(df_training, df_testing, features):
+    # Paralelisme sudah di tingkat keluarga model, pencarian orde dijalankan sekuensial
+    results, error = latih_dan_evaluasi_sarimax(df_training, df_testing, [f for f in features if f in FITUR_REGRESI])
+    if error:
+        raise ValueError(error)
+    return results
+
+MODEL_ZOO = {
+    'OLS': _zoo_ols,
+    'Ridge': _zoo_ridge,
+    'Huber': _zoo_huber,
+    'Gradient Boosting': _zoo_gradient_boosting,
+    'Random Forest': _zoo_random_forest,
+    'SARIMAX': _zoo_sarimax,
+}
+
+def _latih_anggota_zoo(nama, df_training, df_testing, features):
+    """Pekerja: melatih satu keluarga model dan mengukur waktu fit serta latensi prediksi."""
+    start = time.perf_counter()
+    results = MODEL_ZOO[nama](df_training, df_testing, list(features))
+    waktu_fit = time.perf_counter() - start
+
+    X_test = df_testing[list(results['features'])]
+    if isinstance(results['model'], RegresiARIMA):
+        X_test = X_test.iloc[:1]  # SARIMAX meramal berurutan dari akhir data; ukur satu langkah
+    durasi = []
+    for _ in range(ULANGAN_LATENSI_PREDIKSI):
+        t0 = time.perf_counter()
+        results['model'].predict(X_test)
+        durasi.append(time.perf_counter() - t0)
+    results.setdefault('jenis_model', nama)
+    return results, waktu_fit, float(np.median(durasi))
+
+def jalankan_model_zoo(df_training, df_testing, features, keluarga=None, anggaran=None):
+    """
+    Melatih beberapa keluarga model bersamaan di thread pool pada split yang sama.
+    Setiap keluarga punya anggaran waktu (ANGGARAN_WAKTU_MODEL); yang melewatinya
+    dicatat sebagai 'melewati anggaran' dan hasilnya diabaikan (thread pekerja
+    tidak dapat dihentikan paksa, tetapi tidak lagi ditunggu).
+    Mengembalikan (leaderboard DataFrame, dict nama -> hasil model).
+    """
+    keluarga = list(keluarga or MODEL_ZOO)
+    anggaran = {**ANGGARAN_WAKTU_MODEL, **(anggaran or {})}
+    executor = ThreadPoolExecutor(max_workers=len(keluarga), thread_name_prefix='model_zoo')
+    mulai = time.perf_counter()
+    futures = {nama: executor.submit(_latih_anggota_zoo, nama, df_training, df_testing, features) for nama in keluarga}
+
+    baris, hasil = [], {}
+    for nama, future in futures.items():
+        batas = anggaran.get(nama, ANGGARAN_WAKTU_DEFAULT)
+        baris_model = {'Model': nama, 'MAE Training': np.nan, 'MAPE Training (%)': np.nan,
+                       'MAE Testing': np.nan, 'MAPE Testing (%)': np.nan,
+                       'Waktu Fit (s)': np.nan, 'Latensi Prediksi (ms)': np.nan}
+        try:
+            results, waktu_fit, latensi = future.result(timeout=max(0.0, mulai + batas - time.perf_counter()))
+        except FuturesTimeoutError:
+            baris_model['Status'] = f'melewati anggaran {batas:.0f} s'
+        except Exception as e:
+            baris_model['Status'] = f'gagal: {e}'
+        else:
+            hasil[nama] = results
+            baris_model.update({
+                'Model': results['jenis_model'],
+                'MAE Training': results['mae_training'], 'MAPE Training (%)': results['mape_training'],
+                'MAE Testing': results['mae_testing'], 'MAPE Testing (%)': results['mape_testing'],
+                'Waktu Fit (s)': waktu_fit, 'Latensi Prediksi (ms)': latensi * 1e3, 'Status': 'ok',
+            })
+        baris_model['Keluarga'] = nama
+        baris.append(baris_model)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    leaderboard = pd.DataFrame(baris).sort_values('MAPE Testing (%)', na_position='last').reset_index(drop=True)
+    return leaderboard, hasil
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def _jalankan_model_zoo_cached(df_training, df_testing, features, keluarga):
+    """Model zoo yang di-cache per data, fitur, dan keluarga; model hasil fit dipakai bersama (read-only)."""
+    return jalankan_model_zoo(df_training, df_testing, list(features), list(keluarga))
+
+# --- Regresi Multi-Seri (Batch) ---
+def _stack_series(df, series_col, labels, features):
     """
-    MODIFIKASI: Menerima list file dan menggabungkan.
-    Fungsi untuk membaca data libur dalam format "long".
+    Menyusun DataFrame long menjadi array bertumpuk (seri, baris, fitur).
+    Seri dengan panjang berbeda di-padding dengan nol; `mask` menandai baris asli
+    yang fitur dan targetnya lengkap (baris awal lag yang NaN ikut dikecualikan).
     """
-    if not uploaded_files:
-        return None, "Tidak ada file libur yang diunggah."
+    if series_col is None:
+        codes = np.zeros(len(df), dtype=np.int64)
+    else:
+        codes = pd.Categorical(df[series_col], categories=labels).codes.astype(np.int64)
+    if (codes < 0).any():
+        raise ValueError("Terdapat seri pada data testing yang tidak ada di data training.")
+    # Posisi setiap baris di dalam serinya, mengikuti urutan kemunculan (kronologis)
+    posisi = pd.Series(codes).groupby(codes).cumcount().to_numpy()
+    n_series = len(labels)
+    n_rows = int(posisi.max()) + 1 if len(posisi) else 0
 
-    # Pemetaan nama bulan ke angka untuk pengurutan
-    month_mapping = {
-        'Januari': 1, 'Februari': 2, 'Maret': 3, 'April': 4,
-        'Mei': 5, 'Juni': 6, 'Juli': 7, 'Agustus': 8,
-        'September': 9, 'Oktober': 10, 'November': 11, 'Desember': 12
-    }
+    nilai_X = df[features].to_numpy(dtype=np.float64)
+    nilai_y = df[TARGET_REGRESI].to_numpy(dtype=np.float64)
+    lengkap = np.isfinite(nilai_X).all(axis=1) & np.isfinite(nilai_y)
+    X = np.zeros((n_series, n_rows, len(features)))
+    y = np.zeros((n_series, n_rows))
+    mask = np.zeros((n_series, n_rows), dtype=bool)
+    X[codes[lengkap], posisi[lengkap]] = nilai_X[lengkap]
+    y[codes[lengkap], posisi[lengkap]] = nilai_y[lengkap]
+    mask[codes, posisi] = lengkap
+    return X, y, mask, codes, posisi
 
-    df_list = []
-    for uploaded_file in uploaded_files:
-        try:
-            file_extension = os.path.splitext(uploaded_file.name)[1].lower()
-            
-            header_row = 0
-            if file_extension == '.xlsx':
-                df_raw = pd.read_excel(uploaded_file, header=header_row)
-            elif file_extension == '.csv':
-                df_raw = pd.read_csv(uploaded_file, header=header_row)
-            else:
-                raise ValueError(f"Tipe file tidak didukung: {uploaded_file.name}")
-            
-            df_raw.dropna(how='all', inplace=True)
-            df_raw.reset_index(drop=True, inplace=True)
-            df_raw.columns = [str(col).strip() for col in df_raw.columns]
+def _masked_metrics(y, y_pred, mask):
+    """MAE dan MAPE per seri, hanya menghitung baris asli (bukan padding)."""
+    n = mask.sum(axis=1)
+    error = np.where(mask, y - y_pred, 0.0)
+    penyebut = np.where(y == 0, 1e-10, y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mae = np.abs(error).sum(axis=1) / n
+        mape = np.abs(error / penyebut).sum(axis=1) / n * 100
+    return mae, mape
 
-            bulan_col = next((col for col in df_raw.columns if 'bulan' in str(col).lower()), None)
-            tahun_col = next((col for col in df_raw.columns if 'tahun' in str(col).lower()), None)
-            libur_nasional_col = next((col for col in df_raw.columns if 'libur nasional' in str(col).lower()), None)
-            cuti_bersama_col = next((col for col in df_raw.columns if 'cuti bersama' in str(col).lower()), None)
+def _regresi_bertumpuk(df_training, df_testing, series_col, features, horizon):
+    """
+    Inti regresi berganda per seri dengan aljabar linier bertumpuk (tanpa loop fit
+    per seri); dipakai oleh model tunggal (`series_col` None) maupun multi-seri.
+    Melempar ValueError bila ada seri dengan baris training lengkap <= jumlah fitur.
+    """
+    if series_col is None:
+        labels = ['Seri Tunggal']
+    else:
+        labels = list(pd.unique(df_training[series_col]))
 
-            if not all([bulan_col, tahun_col, libur_nasional_col, cuti_bersama_col]):
-                raise ValueError(f"Tidak dapat menemukan semua kolom yang diperlukan di {uploaded_file.name}")
-            
-            df = df_raw[[bulan_col, tahun_col, libur_nasional_col, cuti_bersama_col]].copy()
-            df.rename(columns={
-                bulan_col: 'Bulan',
-                tahun_col: 'Tahun',
-                libur_nasional_col: 'Libur Nasional',
-                cuti_bersama_col: 'Cuti Bersama'
-            }, inplace=True)
+    X_tr, y_tr, m_tr, _, _ = _stack_series(df_training, series_col, labels, features)
+    X_te, y_te, m_te, _, _ = _stack_series(df_testing, series_col, labels, features)
+    n_tr = m_tr.sum(axis=1)
+    n_te = m_te.sum(axis=1)
+    kurang = np.flatnonzero(n_tr <= len(features))
+    if len(kurang):
+        seri = '' if series_col is None else f"seri {labels[kurang[0]]}: "
+        raise ValueError(f"{seri}hanya {int(n_tr[kurang[0]])} baris training lengkap untuk {len(features)} fitur; "
+                         "kurangi lag atau tambah data training")
 
-            df['Tahun'] = pd.to_numeric(df['Tahun'], errors='coerce')
-            df['Bulan'] = df['Bulan'].str.strip()
-            df.dropna(subset=['Tahun', 'Bulan'], inplace=True)
-            
-            # --- Perbaikan: Tambahkan kolom angka bulan untuk pengurutan yang benar ---
-            df['Bulan_Angka'] = df['Bulan'].apply(lambda x: month_mapping.get(x, 0))
-            # --- Akhir Perbaikan ---
+    # Standarisasi per seri (seperti LinearRegression yang memusatkan data) agar
+    # solusi tetap terkondisi baik untuk fitur berskala besar.
+    w = m_tr[:, :, None]
+    x_mean = (X_tr * w).sum(axis=1) / n_tr[:, None]
+    y_mean = (y_tr * m_tr).sum(axis=1) / n_tr
+    Xc = np.where(w, X_tr - x_mean[:, None, :], 0.0)
+    yc = np.where(m_tr, y_tr - y_mean[:, None], 0.0)
+    x_scale = np.sqrt((Xc ** 2).sum(axis=1))
+    x_scale[x_scale == 0] = 1.0
+    Xs = Xc / x_scale[:, None, :]
 
-            df_list.append(df)
-            
-        except Exception as e:
-            st.error(f"ERROR saat membaca file {uploaded_file.name}: {e}")
-            return None, f"ERROR saat membaca file {uploaded_file.name}: {e}"
+    # Pseudo-inverse bertumpuk (SVD per seri) memberi solusi kuadrat terkecil norma
+    # minimum seperti lstsq, termasuk untuk fitur konstan atau kolinear (mis. dummy
+    # bulan), tanpa mengkuadratkan bilangan kondisi seperti persamaan normal.
+    beta_s = np.einsum('spn,sn->sp', np.linalg.pinv(Xs), yc)
+    coef = beta_s / x_scale
+    intercept = y_mean - np.einsum('sp,sp->s', x_mean, coef)
 
-    if not df_list:
-        return None, "Tidak ada data yang valid untuk digabungkan."
-    
-    df_combined = pd.concat(df_list, ignore_index=True)
-    # --- Perbaikan: Urutkan berdasarkan Tahun dan Bulan_Angka (kronologis) ---
-    df_combined.sort_values(by=['Tahun', 'Bulan_Angka'], inplace=True)
-    # --- Akhir Perbaikan ---
-    df_combined.reset_index(drop=True, inplace=True)
-    
-    # Hapus kolom Bulan_Angka setelah pengurutan selesai
-    df_combined.drop(columns='Bulan_Angka', inplace=True)
+    y_pred_tr = np.einsum('snp,sp->sn', X_tr, coef) + intercept[:, None]
+    y_pred_te = np.einsum('snp,sp->sn', X_te, coef) + intercept[:, None]
+    mae_tr, mape_tr = _masked_metrics(y_tr, y_pred_tr, m_tr)
+    mae_te, mape_te = _masked_metrics(y_te, y_pred_te, m_te)
 
-    return df_combined, None
+    df_metrik = pd.DataFrame({'Seri': labels, 'n_training': n_tr, 'n_testing': n_te, 'intercept': intercept})
+    for j, fitur in enumerate(features):
+        df_metrik[f'coef_{fitur}'] = coef[:, j]
+    df_metrik['mae_training'] = mae_tr
+    df_metrik['mape_training'] = mape_tr
+    df_metrik['mae_testing'] = mae_te
+    df_metrik['mape_testing'] = mape_te
 
-def _process_and_combine_data(df_penumpang_train, df_libur_train, df_penumpang_test, df_libur_test):
-    """
-    Menggabungkan data penumpang dan libur untuk data training dan testing.
-    """
-    try:
-        libur_bulanan_train = df_libur_train.groupby(['Bulan', 'Tahun']).agg(
-            jumlah_libur_nasional=('Libur Nasional', lambda x: x.notna().sum()),
-            jumlah_cuti_bersama=('Cuti Bersama', lambda x: x.notna().sum())
-        ).reset_index()
+    hasil = {'metrik': df_metrik, 'prediksi': None, 'features': list(features), 'coef': coef, 'intercept': intercept}
+    if not horizon:
+        return hasil
 
-        df_training = pd.merge(df_penumpang_train, libur_bulanan_train, on=['Bulan', 'Tahun'], how='left').fillna(0)
-        
-        libur_bulanan_test = df_libur_test.groupby(['Bulan', 'Tahun']).agg(
-            jumlah_libur_nasional=('Libur Nasional', lambda x: x.notna().sum()),
-            jumlah_cuti_bersama=('Cuti Bersama', lambda x: x.notna().sum())
-        ).reset_index()
+    # Prediksi ke depan: fitur selain Bulan ke-n memakai rata-rata training per seri,
+    # sama seperti predict_5_years. Bulan ke-n melanjutkan nilai terakhir tiap seri
+    # (seri yang mulai belakangan atau berlubang tidak bergeser).
+    langkah = np.arange(1, horizon + 1)
+    kolom_waktu = ['Bulan', 'Tahun', 'Bulan ke-n'] + ([series_col] if series_col else [])
+    df_waktu = pd.concat([df_training[kolom_waktu], df_testing[kolom_waktu]], ignore_index=True)
+    if series_col is None:
+        terakhir = df_waktu.iloc[[-1]]
+    else:
+        terakhir = df_waktu.groupby(series_col, sort=False).tail(1).set_index(series_col).reindex(labels)
+    indeks_bulan = (terakhir['Tahun'].to_numpy(dtype=np.int64) * 12
+                    + terakhir['Bulan'].map(BULAN_KE_ANGKA).to_numpy(dtype=np.int64) - 1)
+    indeks_future = (indeks_bulan[:, None] + langkah[None, :]).ravel()
+    bulan_ke_n = terakhir['Bulan ke-n'].to_numpy(dtype=np.int64)[:, None] + langkah[None, :]
 
-        df_testing = pd.merge(df_penumpang_test, libur_bulanan_test, on=['Bulan', 'Tahun'], how='left').fillna(0)
-        
-        df_training['Bulan ke-n'] = np.arange(1, len(df_training) + 1)
-        start_month_test = len(df_training) + 1
-        df_testing['Bulan ke-n'] = np.arange(start_month_test, start_month_test + len(df_testing))
+    X_future = np.repeat(x_mean[:, None, :], horizon, axis=1)
+    if 'Bulan ke-n' in features:
+        X_future[:, :, features.index('Bulan ke-n')] = bulan_ke_n
+    y_future = np.einsum('snp,sp->sn', X_future, coef) + intercept[:, None]
 
-        return df_training, df_testing, None
-        
-    except Exception as e:
-        print(f"ERROR: {e}")
-        return None, None, f"ERROR saat menggabungkan data: {e}"
+    hasil['prediksi'] = pd.DataFrame({
+        'Seri': np.repeat(labels, horizon),
+        'Bulan': pd.Series(indeks_future % 12 + 1).map(ANGKA_KE_BULAN).to_numpy(),
+        'Tahun': indeks_future // 12,
+        'Bulan ke-n': bulan_ke_n.ravel(),
+        TARGET_REGRESI: y_future.ravel(),
+    })
+    return hasil
 
-def latih_dan_evaluasi_regresi(df_training, df_testing):
-    """
-    Melatih model regresi berganda, membuat prediksi, dan menghitung metrik.
+def latih_dan_evaluasi_regresi_batch(df_training, df_testing, series_col='Seri', horizon=60, features=None):
     """
-    try:
-        X_train = df_training[['Bulan ke-n', 'Total Jarak Tempuh Penumpang', 'Rata-rata Jarak Perjalanan Per penumpang', 
-                               'jumlah_libur_nasional', 'jumlah_cuti_bersama']]
-        y_train = df_training['Penumpang (000)'].values
-        
-        model = LinearRegression()
-        model.fit(X_train, y_train)
+    Melatih satu model regresi berganda per seri (mis. per operator atau wilayah)
+    sekaligus dengan aljabar linier bertumpuk, tanpa loop fit sklearn per seri.
 
-        y_pred_training = model.predict(X_train)
-        
-        X_test = df_testing[['Bulan ke-n', 'Total Jarak Tempuh Penumpang', 'Rata-rata Jarak Perjalanan Per penumpang', 
-                             'jumlah_libur_nasional', 'jumlah_cuti_bersama']]
-        y_test = df_testing['Penumpang (000)'].values
-        y_pred_testing = model.predict(X_test)
-        
-        mae_training = mean_absolute_error(y_train, y_pred_training)
-        mape_training = np.mean(np.abs((y_train - y_pred_training) / np.where(y_train == 0, 1e-10, y_train))) * 100
-        
-        mae_testing = mean_absolute_error(y_test, y_pred_testing)
-        mape_testing = np.mean(np.abs((y_test - y_pred_testing) / np.where(y_test == 0, 1e-10, y_test))) * 100
+    Data masukan berformat long: kolom fitur yang sama dengan
+    `latih_dan_evaluasi_regresi` ditambah kolom `series_col`. Jika `series_col`
+    None, seluruh data dianggap satu seri (jalur yang dipakai model tunggal).
 
-        results = {
-            'model': model,
-            'y_pred_training': y_pred_training,
-            'y_pred_testing': y_pred_testing,
-            'mae_training': mae_training,
-            'mape_training': mape_training,
-            'mae_testing': mae_testing,
-            'mape_testing': mape_testing,
-            'features': X_train.columns.tolist()
-        }
-        
-        return results, None
+    Mengembalikan ({'metrik', 'prediksi', 'features', 'coef', 'intercept'}, error):
+    - 'metrik': satu baris per seri berisi jumlah data, intercept, koefisien, MAE dan MAPE.
+    - 'prediksi': prediksi `horizon` bulan ke depan untuk semua seri dalam format long
+      (None bila horizon 0).
+    """
+    try:
+        return _regresi_bertumpuk(df_training, df_testing, series_col, list(features or FITUR_REGRESI), horizon), None
     except Exception as e:
         print(f"ERROR: {e}")
-        return None, f"ERROR saat melatih atau mengevaluasi model: {e}"
+        return None, f"ERROR saat melatih regresi multi-seri: {e}"
 
 # --- Page Content Functions ---
 def show_home():
@@ -894,6 +3574,7 @@ def show_home():
             - **Data Hari Libur**: 
               - Data harus dalam format **"long"** (tanggal sebagai baris).
               - Baris judul tabel (`Bulan`, `Tahun`, `Libur Nasional`, `Cuti Bersama`) harus berada di **baris pertama** file Excel.
+              - Kolom `Tanggal` bersifat opsional, namun diperlukan untuk fitur kalender hari kerja (hari kejepit, libur panjang).
             """
         )
 
@@ -958,6 +3639,8 @@ def show_upload():
     """Menampilkan konten untuk halaman unggah data."""
     st.title("📁 Unggah Data Excel/CSV")
     st.info("Silakan unggah file data Anda: dua file penumpang dan dua file hari libur. Anda bisa mengunggah lebih dari satu file untuk setiap kategori.")
+    st.caption("File penumpang boleh berformat wide BPS (satu file per tahun), long (kolom Tahun, Bulan, penumpang, "
+               "jarak tempuh), atau harian (kolom Tanggal). Format long/harian dibaca bertahap dan diagregasi ke bulanan.")
     
     with st.container(border=True):
         col1, col2 = st.columns(2)
@@ -995,49 +3678,83 @@ def show_upload():
     if st.button("Proses dan Simpan Data"):
         if uploaded_penumpang_training and uploaded_libur_training and uploaded_penumpang_testing and uploaded_libur_testing:
             
-            # --- MODIFIKASI: Menambahkan validasi file tumpang tindih ---
-            train_files = {file.name for file in uploaded_penumpang_training} | {file.name for file in uploaded_libur_training}
-            test_files = {file.name for file in uploaded_penumpang_testing} | {file.name for file in uploaded_libur_testing}
-            
-            overlapping_files = train_files.intersection(test_files)
-            
-            if overlapping_files:
-                st.error(f"❌ TERDETEKSI FILE GANDA: File berikut muncul di data training dan testing: {', '.join(overlapping_files)}. Harap unggah file yang berbeda untuk training dan testing.")
+            # Validasi file tumpang tindih berdasarkan isi dan periode (bukan nama file), sebelum file dibaca penuh
+            with instrument('upload.deteksi_duplikat'):
+                unggahan, catatan_gabung, error_duplikat = deteksi_duplikat_unggahan({
+                    ('training', 'penumpang'): uploaded_penumpang_training,
+                    ('training', 'libur'): uploaded_libur_training,
+                    ('testing', 'penumpang'): uploaded_penumpang_testing,
+                    ('testing', 'libur'): uploaded_libur_testing,
+                })
+            if error_duplikat:
+                st.error(f"❌ TERDETEKSI FILE GANDA: {error_duplikat}. Harap unggah file yang isi maupun periodenya tidak tumpang tindih.")
                 return
-            # --- Akhir modifikasi ---
+            uploaded_penumpang_training = unggahan[('training', 'penumpang')]
+            uploaded_libur_training = unggahan[('training', 'libur')]
+            uploaded_penumpang_testing = unggahan[('testing', 'penumpang')]
+            uploaded_libur_testing = unggahan[('testing', 'libur')]
             
             with st.spinner('Memproses data...'):
-                df_penumpang_train, error_p_train = _read_penumpang_file(uploaded_penumpang_training)
-                df_libur_train, error_l_train = _read_libur_file(uploaded_libur_training)
-                df_penumpang_test, error_p_test = _read_penumpang_file(uploaded_penumpang_testing)
-                df_libur_test, error_l_test = _read_libur_file(uploaded_libur_testing)
+                # Temuan validasi skema dari keempat pembacaan dikumpulkan menjadi satu laporan
+                temuan = list(catatan_gabung)
+                with instrument('upload.baca_penumpang_training') as rec:
+                    df_penumpang_train, error_p_train = _read_penumpang_file(uploaded_penumpang_training, laporan=temuan)
+                    rec['rows'] = None if df_penumpang_train is None else len(df_penumpang_train)
+                with instrument('upload.baca_libur_training') as rec:
+                    df_libur_train, error_l_train = _read_libur_file(uploaded_libur_training, laporan=temuan)
+                    rec['rows'] = None if df_libur_train is None else len(df_libur_train)
+                with instrument('upload.baca_penumpang_testing') as rec:
+                    df_penumpang_test, error_p_test = _read_penumpang_file(uploaded_penumpang_testing, laporan=temuan)
+                    rec['rows'] = None if df_penumpang_test is None else len(df_penumpang_test)
+                with instrument('upload.baca_libur_testing') as rec:
+                    df_libur_test, error_l_test = _read_libur_file(uploaded_libur_testing, laporan=temuan)
+                    rec['rows'] = None if df_libur_test is None else len(df_libur_test)
 
+                st.session_state.laporan_kualitas = laporan_kualitas(temuan)
                 if any([error_p_train, error_l_train, error_p_test, error_l_test]):
                     st.error("Terjadi kesalahan saat membaca file. Mohon periksa terminal untuk detail.")
+                    if temuan:
+                        show_quality_report(st.session_state.laporan_kualitas)
                     return
                 
-                df_training, df_testing, error_combine = _process_and_combine_data(
-                    df_penumpang_train, df_libur_train, df_penumpang_test, df_libur_test
-                )
+                with instrument('upload.gabung_data') as rec:
+                    df_training, df_testing, error_combine = _process_and_combine_data(
+                        df_penumpang_train, df_libur_train, df_penumpang_test, df_libur_test
+                    )
+                    rec['rows'] = None if df_training is None else len(df_training) + len(df_testing)
 
                 if error_combine:
                     st.error(f"Terjadi kesalahan saat menggabungkan data: {error_combine}")
                     return
                 
-                results, error_model = latih_dan_evaluasi_regresi(df_training, df_testing)
+                opsi_fitur = st.session_state.get('opsi_fitur', OPSI_FITUR_DEFAULT)
+                with instrument('upload.fitur_musiman', rows=len(df_training) + len(df_testing)):
+                    df_training, df_testing, fitur_tambahan, error_fitur = _bangun_fitur_musiman_cached(
+                        df_training, df_testing, opsi_fitur
+                    )
+                if error_fitur:
+                    st.error(f"Gagal membangun fitur musiman: {error_fitur}")
+                    return
+
+                with instrument('upload.latih_model', rows=len(df_training) + len(df_testing)):
+                    results, error_model = latih_dan_evaluasi_regresi(df_training, df_testing, FITUR_REGRESI + fitur_tambahan)
                 if error_model:
                     st.error(f"Gagal melatih model: {error_model}")
                     return
                 
                 # --- MODIFIKASI: Hapus panggilan predict_5_years dari sini ---
                 
-                # Simpan data dan hasil di session_state
-                st.session_state.df_penumpang_train = df_penumpang_train
-                st.session_state.df_libur_train = df_libur_train
-                st.session_state.df_penumpang_test = df_penumpang_test
-                st.session_state.df_libur_test = df_libur_test
-                st.session_state.df_training = df_training
-                st.session_state.df_testing = df_testing
+                # Simpan referensi dataset bersama (content-addressed, tipe numerik diturunkan) di session_state
+                st.session_state.df_penumpang_train = share_dataset(df_penumpang_train)
+                st.session_state.df_libur_train = share_dataset(df_libur_train)
+                st.session_state.df_penumpang_test = share_dataset(df_penumpang_test)
+                st.session_state.df_libur_test = share_dataset(df_libur_test)
+                st.session_state.df_training = share_dataset(df_training)
+                st.session_state.df_testing = share_dataset(df_testing)
+                # Hasil prediksi dan model alternatif lama tidak berlaku untuk data baru
+                for stale_key in ('df_future', 'df_future_model', 'sarimax_results'):
+                    st.session_state.pop(stale_key, None)
+                results['opsi_fitur'] = opsi_fitur
                 st.session_state.model_results = results
                 st.session_state.data_loaded = True
                 
@@ -1057,7 +3774,7 @@ def show_data():
         with st.expander("Tampilkan Data Mentah", expanded=False):
             st.subheader("Data Penumpang Training (Mentah)")
             # --- MODIFIKASI: Format hanya kolom numerik yang relevan ---
-            df_to_display = st.session_state.df_penumpang_train.copy()
+            df_to_display = st.session_state.df_penumpang_train
             st.dataframe(df_to_display.style.format({
                 'Tahun': '{:.0f}', # Tahun tidak diformat
                 'Penumpang (000)': lambda x: _format_indonesian_numeric(x, 0),
@@ -1070,7 +3787,7 @@ def show_data():
 
             st.subheader("Data Penumpang Testing (Mentah)")
             # --- MODIFIKASI: Format hanya kolom numerik yang relevan ---
-            df_to_display = st.session_state.df_penumpang_test.copy()
+            df_to_display = st.session_state.df_penumpang_test
             st.dataframe(df_to_display.style.format({
                 'Tahun': '{:.0f}', # Tahun tidak diformat
                 'Penumpang (000)': lambda x: _format_indonesian_numeric(x, 0),
@@ -1081,12 +3798,29 @@ def show_data():
             st.subheader("Data Libur Testing (Mentah)")
             st.dataframe(st.session_state.df_libur_test)
 
+        laporan = st.session_state.get('laporan_kualitas')
+        if laporan is not None:
+            jumlah_error = int((laporan['Tingkat'] == 'error').sum())
+            with st.expander(f"Laporan Kualitas Data ({len(laporan)} temuan)", expanded=jumlah_error > 0):
+                st.write("Hasil validasi skema saat unggah: kolom wajib, format pemisah ribuan/desimal, tipe dan rentang nilai, "
+                         "serta periode (Tahun, Bulan) ganda atau hilang. Baris yang tidak dapat dikonversi dibuang dari data.")
+                show_quality_report(laporan)
+
+        kalender = _kalender_bulanan_cached(st.session_state.df_libur_train, st.session_state.df_libur_test,
+                                            int(st.session_state.df_training['Tahun'].min()))
+        if kalender is not None:
+            with st.expander("Kalender Hari Kerja Bulanan", expanded=False):
+                st.write("Ringkasan kalender harian dari file libur: hari kerja efektif (Senin-Jumat di luar libur dan cuti bersama), "
+                         f"jumlah libur panjang (≥ {MINIMAL_LIBUR_PANJANG} hari berturut-turut), dan hari kejepit (hari kerja di antara dua hari libur).")
+                st.dataframe(kalender)
+                if (kalender['sumber_libur'] == 'tanggal tetap').any():
+                    st.caption("Tahun tanpa file libur hanya memuat libur bertanggal tetap; libur berbasis kalender lunar belum termasuk.")
+
         with st.expander("Tampilkan Tabel Data Regresi", expanded=True):
             st.subheader("Tabel Data Regresi")
             st.write("Tabel ini menampilkan data yang sudah diolah dan siap untuk digunakan dalam model regresi.")
             
-            df_regr_train = st.session_state.df_training.copy()
-            df_regr_train = df_regr_train[[
+            df_regr_train = st.session_state.df_training[[
                 'Penumpang (000)', 'Bulan ke-n', 'Total Jarak Tempuh Penumpang',
                 'Rata-rata Jarak Perjalanan Per penumpang', 'jumlah_libur_nasional', 'jumlah_cuti_bersama'
             ]]
@@ -1103,8 +3837,7 @@ def show_data():
                 'X5': lambda x: _format_indonesian_numeric(x, 0),
             }))
             
-            df_regr_test = st.session_state.df_testing.copy()
-            df_regr_test = df_regr_test[[
+            df_regr_test = st.session_state.df_testing[[
                 'Penumpang (000)', 'Bulan ke-n', 'Total Jarak Tempuh Penumpang',
                 'Rata-rata Jarak Perjalanan Per penumpang', 'jumlah_libur_nasional', 'jumlah_cuti_bersama'
             ]]
@@ -1131,38 +3864,28 @@ def show_data_analysis():
     st.title("📊 Analisis Data & Uji Asumsi Klasik")
     st.write("Visualisasi dan statistik data untuk mengevaluasi dataset sebelum pemodelan.")
     
-    chart_type = st.session_state.chart_type_option
-    
     if 'df_training' in st.session_state and st.session_state.data_loaded:
         df_training = st.session_state.df_training
         
         with st.expander("Ringkasan Statistik", expanded=True):
             st.subheader("📋 Ringkasan Statistik Data Training")
             st.write("Berikut adalah ringkasan statistik dari data training dengan format yang lebih sederhana.")
-            df_desc = df_training.describe()
-            styled_df_desc = df_desc.style.format(lambda x: _format_indonesian_numeric(x, 0))
-            st.dataframe(styled_df_desc.set_properties(**{'background-color': '#191e24', 'color': 'white'}))
+            with instrument('analisis.ringkasan_statistik', rows=len(df_training)):
+                df_desc = df_training.describe()
+                styled_df_desc = df_desc.style.format(lambda x: _format_indonesian_numeric(x, 0))
+                st.dataframe(styled_df_desc.set_properties(**{'background-color': '#191e24', 'color': 'white'}))
         
         with st.expander("Visualisasi Tren", expanded=True):
             st.subheader("📈 Visualisasi Tren Jumlah Penumpang")
             st.write("Grafik ini menunjukkan tren jumlah penumpang sepanjang periode data yang diunggah (training dan testing).")
-            df_combined_all = pd.concat([st.session_state.df_training, st.session_state.df_testing], ignore_index=True)
-            chart_data = pd.DataFrame({
-                'Bulan ke-n': df_combined_all['Bulan ke-n'],
-                'Jumlah Penumpang': df_combined_all['Penumpang (000)']
-            })
-            # --- MODIFIKASI: Pilihan grafik disesuaikan dengan input sidebar ---
-            if chart_type == 'Garis':
-                st.line_chart(chart_data, x='Bulan ke-n', y='Jumlah Penumpang')
-            elif chart_type == 'Batang':
-                st.bar_chart(chart_data, x='Bulan ke-n', y='Jumlah Penumpang')
-            # --- Akhir Modifikasi ---
+            _trend_chart_fragment()
 
         with st.expander("Korelasi Antar Variabel", expanded=True):
             st.subheader("📈 Korelasi Antar Variabel")
             st.write("Matriks korelasi mengukur hubungan linier antar variabel. Nilai yang mendekati 1 atau -1 menunjukkan korelasi yang kuat.")
-            df_corr = df_training[['Bulan ke-n', 'Total Jarak Tempuh Penumpang', 'Rata-rata Jarak Perjalanan Per penumpang', 'jumlah_libur_nasional', 'jumlah_cuti_bersama', 'Penumpang (000)']]
-            corr_matrix = df_corr.corr()
+            with instrument('analisis.korelasi', rows=len(df_training)):
+                df_corr = df_training[['Bulan ke-n', 'Total Jarak Tempuh Penumpang', 'Rata-rata Jarak Perjalanan Per penumpang', 'jumlah_libur_nasional', 'jumlah_cuti_bersama', 'Penumpang (000)']]
+                corr_matrix = df_corr.corr()
             renamed_columns = {col: _wrap_header_text(col) for col in corr_matrix.columns}
             renamed_corr_matrix = corr_matrix.rename(columns=renamed_columns, index=renamed_columns)
             st.dataframe(renamed_corr_matrix.style.background_gradient(cmap='RdYlBu', vmin=-1, vmax=1).format(lambda x: _format_indonesian_numeric(x, 2)))
@@ -1176,10 +3899,11 @@ def show_data_analysis():
         with st.expander("Hasil Pemodelan OLS & Uji Asumsi Klasik", expanded=True):
             st.subheader("📝 Hasil Pemodelan OLS (Data Training)")
             try:
-                X = df_training[['Bulan ke-n', 'Total Jarak Tempuh Penumpang', 'Rata-rata Jarak Perjalanan Per penumpang', 'jumlah_libur_nasional', 'jumlah_cuti_bersama']]
-                y = df_training['Penumpang (000)']
-                X_with_const = sm.add_constant(X)
-                model_ols = sm.OLS(y, X_with_const).fit()
+                with instrument('analisis.fit_ols_uji_asumsi', rows=len(df_training)):
+                    hasil_asumsi, error = uji_asumsi_klasik(df_training)
+                if error:
+                    raise ValueError(error)
+                model_ols = hasil_asumsi['ols']
                 
                 st.markdown("### 1. Ringkasan Model")
                 summary_metrics_data = {
@@ -1209,19 +3933,27 @@ def show_data_analysis():
                 with col1:
                     st.markdown("##### 1. Asumsi Normalitas")
                     st.write("Plot Normal Q-Q untuk residual. Jika residual terdistribusi normal, titik-titik akan mengikuti garis lurus.")
-                    fig, ax = plt.subplots(figsize=(8, 6))
-                    stats.probplot(model_ols.resid, dist="norm", plot=ax)
-                    ax.set_title("Normal Q-Q Plot Residual", color='white')
-                    st.pyplot(fig)
+                    with instrument('analisis.plot_qq', rows=len(model_ols.resid)):
+                        fig, ax = plt.subplots(figsize=(8, 6))
+                        stats.probplot(model_ols.resid, dist="norm", plot=ax)
+                        ax.set_title("Normal Q-Q Plot Residual", color='white')
+                        st.pyplot(fig)
                 
                 with col2:
                     st.markdown("##### 2. Asumsi Homoskedastisitas")
                     st.write("Plot residual vs fitted value. Sebaran titik yang acak menunjukkan asumsi homoskedastisitas terpenuhi.")
-                    fig, ax = plt.subplots(figsize=(8, 6))
-                    ax.scatter(model_ols.fittedvalues, model_ols.resid, color='#F63366', alpha=0.7)
-                    ax.axhline(y=0, color='white', linestyle='--')
-                    ax.set_title("Residual vs Fitted Value", color='white')
-                    st.pyplot(fig)
+                    with instrument('analisis.plot_residual', rows=len(model_ols.resid)):
+                        fig, ax = plt.subplots(figsize=(8, 6))
+                        ax.scatter(model_ols.fittedvalues, model_ols.resid, color='#F63366', alpha=0.7)
+                        ax.axhline(y=0, color='white', linestyle='--')
+                        ax.set_title("Residual vs Fitted Value", color='white')
+                        st.pyplot(fig)
+
+                st.markdown("### 3. Uji Asumsi Klasik")
+                st.write("Uji formal asumsi klasik yang dihitung dari residual model OLS di atas. "
+                         "Untuk uji berbasis p-value, asumsi dianggap terpenuhi bila p-value lebih besar dari "
+                         f"{_format_indonesian_numeric(TINGKAT_SIGNIFIKANSI_ASUMSI, 2)}.")
+                show_assumption_table(hasil_asumsi)
 
             except Exception as e:
                 st.warning(f"Tidak dapat menghasilkan ringkasan OLS. Pastikan data tidak memiliki varians nol. Error: {e}")
@@ -1229,6 +3961,174 @@ def show_data_analysis():
     else:
         st.warning("Data training belum diunggah. Silakan unggah data terlebih dahulu.")
 
+@st.fragment
+def _trend_chart_fragment():
+    """Grafik tren penumpang; mengganti jenis grafik hanya menjalankan ulang fragmen ini."""
+    with instrument('fragmen.grafik_tren') as rec:
+        chart_type = chart_type_selector("chart_type_analisis")
+        df_combined_all = pd.concat([st.session_state.df_training, st.session_state.df_testing], ignore_index=True)
+        chart_data = pd.DataFrame({
+            'Bulan ke-n': df_combined_all['Bulan ke-n'],
+            'Jumlah Penumpang': df_combined_all['Penumpang (000)']
+        })
+        rec['rows'] = len(chart_data)
+        if chart_type == 'Garis':
+            st.line_chart(chart_data, x='Bulan ke-n', y='Jumlah Penumpang')
+        elif chart_type == 'Batang':
+            st.bar_chart(chart_data, x='Bulan ke-n', y='Jumlah Penumpang')
+
+@st.cache_data(show_spinner=False)
+def _fit_ols_cached(X, y):
+    """Fit OLS statsmodels yang di-cache per data, agar rerun halaman tidak mengulang fitting."""
+    return sm.OLS(y, sm.add_constant(X)).fit()
+
+# --- Uji Asumsi Klasik ---
+TINGKAT_SIGNIFIKANSI_ASUMSI = 0.05
+# Rentang Durbin-Watson yang dianggap bebas autokorelasi orde satu
+RENTANG_DURBIN_WATSON = (1.5, 2.5)
+BATAS_VIF = 10.0
+# Lag Ljung-Box: satu musim (12 bulan), dibatasi separuh jumlah observasi
+LAG_LJUNG_BOX = 12
+
+def _uji_lm_bantu(u, Z):
+    """
+    Uji LM regresi bantu u ~ Z (Z sudah berisi konstanta): statistik n*R^2
+    dengan derajat bebas rank(Z) - 1. Mengembalikan (statistik, p-value).
+    """
+    n = len(u)
+    koef, _, rank, _ = np.linalg.lstsq(Z, u, rcond=None)
+    sisa = u - Z @ koef
+    r2 = 1.0 - (sisa @ sisa) / np.sum((u - u.mean()) ** 2)
+    df = rank - 1
+    if df < 1 or rank >= n:
+        return np.nan, np.nan
+    statistik = n * r2
+    return statistik, stats.chi2.sf(statistik, df)
+
+def hitung_uji_asumsi(model_ols):
+    """
+    Menghitung seluruh uji asumsi klasik dari satu vektor residual hasil fit OLS
+    statsmodels: normalitas (Shapiro-Wilk, Jarque-Bera), homoskedastisitas
+    (Breusch-Pagan, White), autokorelasi (Durbin-Watson, Ljung-Box), dan
+    multikolinearitas (VIF dari diagonal invers matriks korelasi).
+    Mengembalikan dict berisi 'tabel' (lulus/gagal per uji) dan 'vif'.
+    """
+    e = np.asarray(model_ols.resid, dtype=np.float64)
+    Z = np.asarray(model_ols.model.exog, dtype=np.float64)
+    nama_kolom = list(model_ols.model.exog_names)
+    n = len(e)
+    e2 = e * e
+    sse = e2.sum()
+    alpha = TINGKAT_SIGNIFIKANSI_ASUMSI
+
+    # Normalitas: momen residual dihitung sekali untuk Jarque-Bera
+    d = e - e.mean()
+    m2 = np.mean(d ** 2)
+    skew = np.mean(d ** 3) / m2 ** 1.5
+    kurt = np.mean(d ** 4) / m2 ** 2
+    jb = n / 6.0 * (skew ** 2 + (kurt - 3.0) ** 2 / 4.0)
+    sw = stats.shapiro(e) if n >= 3 else (np.nan, np.nan)
+
+    # Homoskedastisitas: regresi bantu e^2 pada X (Breusch-Pagan, versi Koenker)
+    # dan pada X, kuadrat, serta interaksinya (White)
+    konstan = np.all(Z == Z[:1], axis=0)
+    Xv = Z[:, ~konstan]
+    i, j = np.triu_indices(Xv.shape[1])
+    Z_white = np.column_stack([np.ones(n), Xv, Xv[:, i] * Xv[:, j]])
+    # Kolom duplikat (mis. kuadrat variabel dummy) dibuang agar derajat bebas tepat
+    _, unik = np.unique(Z_white.round(12), axis=1, return_index=True)
+    Z_white = Z_white[:, np.sort(unik)]
+    bp = _uji_lm_bantu(e2, Z)
+    white = _uji_lm_bantu(e2, Z_white)
+
+    # Autokorelasi: Durbin-Watson dan Ljung-Box dari autokorelasi residual
+    dw = np.sum(np.diff(e) ** 2) / sse
+    lag = max(1, min(LAG_LJUNG_BOX, n // 2 - 1))
+    acf = np.array([d[k:] @ d[:-k] for k in range(1, lag + 1)]) / (d @ d)
+    q_lb = n * (n + 2) * np.sum(acf ** 2 / (n - np.arange(1, lag + 1)))
+
+    # Multikolinearitas: VIF_j = diag(R^-1)_j, R = matriks korelasi variabel penjelas
+    fitur = [c for c, k in zip(nama_kolom, konstan) if not k]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        try:
+            vif = np.diag(np.linalg.inv(np.corrcoef(Xv, rowvar=False).reshape(len(fitur), len(fitur))))
+        except np.linalg.LinAlgError:
+            vif = np.full(len(fitur), np.inf)
+    vif = np.where(np.isfinite(vif) & (vif > 0), vif, np.inf)
+    df_vif = pd.DataFrame({'Variabel': fitur, 'VIF': vif})
+    df_vif['Hasil'] = np.where(df_vif['VIF'] < BATAS_VIF, 'Lulus', 'Gagal')
+
+    baris = [
+        ('Normalitas', 'Shapiro-Wilk', sw[0], sw[1], f"p > {alpha}"),
+        ('Normalitas', 'Jarque-Bera', jb, stats.chi2.sf(jb, 2), f"p > {alpha}"),
+        ('Homoskedastisitas', 'Breusch-Pagan', bp[0], bp[1], f"p > {alpha}"),
+        ('Homoskedastisitas', 'White', white[0], white[1], f"p > {alpha}"),
+        ('Non-Autokorelasi', 'Durbin-Watson', dw, np.nan,
+         f"{RENTANG_DURBIN_WATSON[0]} < DW < {RENTANG_DURBIN_WATSON[1]}"),
+        ('Non-Autokorelasi', f'Ljung-Box (lag {lag})', q_lb, stats.chi2.sf(q_lb, lag), f"p > {alpha}"),
+        ('Non-Multikolinearitas', 'VIF maksimum', df_vif['VIF'].max() if len(df_vif) else np.nan, np.nan,
+         f"VIF < {BATAS_VIF:g}"),
+    ]
+    tabel = pd.DataFrame(baris, columns=['Asumsi', 'Uji', 'Statistik', 'p-value', 'Kriteria'])
+    lulus = tabel['p-value'] > alpha
+    lulus[tabel['Uji'] == 'Durbin-Watson'] = RENTANG_DURBIN_WATSON[0] < dw < RENTANG_DURBIN_WATSON[1]
+    lulus[tabel['Uji'] == 'VIF maksimum'] = bool(len(df_vif)) and (df_vif['Hasil'] == 'Lulus').all()
+    tabel['Hasil'] = np.where(lulus, 'Lulus', 'Gagal')
+    tabel.loc[tabel['Statistik'].isna(), 'Hasil'] = 'Data kurang'
+    return {'tabel': tabel, 'vif': df_vif}
+
+@st.cache_data(show_spinner=False)
+def uji_asumsi_klasik(df_training, features=tuple(FITUR_REGRESI)):
+    """
+    Fit OLS (memakai _fit_ols_cached) lalu menjalankan seluruh uji asumsi klasik
+    dari residualnya. Halaman Analisis Data, ringkasan chatbot, dan konteks LLM
+    memanggil fungsi ini dengan argumen yang sama sehingga hanya dihitung sekali.
+    Mengembalikan (hasil, error); hasil berisi 'ols', 'tabel', dan 'vif'.
+    """
+    try:
+        # Baris awal tanpa nilai lag (NaN) tidak ikut dalam OLS
+        X = df_training[list(features)].dropna()
+        y = df_training.loc[X.index, TARGET_REGRESI]
+        model_ols = _fit_ols_cached(X, y)
+        return dict(hitung_uji_asumsi(model_ols), ols=model_ols), None
+    except Exception as e:
+        print(f"ERROR: {e}")
+        return None, f"Gagal menghitung uji asumsi klasik: {e}"
+
+def ringkasan_uji_asumsi(tabel):
+    """Satu baris ringkas hasil uji asumsi, dipakai oleh chatbot dan konteks LLM."""
+    return "; ".join(
+        f"{r['Uji']}={r['Statistik']:.3g}" + (f" (p={r['p-value']:.3g})" if pd.notna(r['p-value']) else "")
+        + f" {r['Hasil']}"
+        for _, r in tabel.iterrows()
+    )
+
+def show_assumption_table(hasil_asumsi):
+    """Menampilkan tabel lulus/gagal uji asumsi klasik beserta tabel VIF."""
+    def warna(nilai):
+        return {'Lulus': 'color: #21c354', 'Gagal': 'color: #F63366'}.get(nilai, '')
+
+    tabel = hasil_asumsi['tabel']
+    st.dataframe(
+        tabel.style.format({
+            'Statistik': lambda x: _format_indonesian_numeric(x, 3),
+            'p-value': lambda x: '-' if pd.isna(x) else _format_indonesian_numeric(x, 4),
+        }).map(warna, subset=['Hasil']),
+        hide_index=True,
+    )
+    st.markdown("##### Variance Inflation Factor (VIF)")
+    st.dataframe(
+        hasil_asumsi['vif'].style.format({'VIF': lambda x: _format_indonesian_numeric(x, 2)})
+        .map(warna, subset=['Hasil']),
+        hide_index=True,
+    )
+    gagal = tabel.loc[tabel['Hasil'] == 'Gagal', 'Asumsi'].unique()
+    if len(gagal):
+        st.warning(f"Asumsi yang belum terpenuhi: {', '.join(gagal)}.")
+    else:
+        st.success("Seluruh asumsi klasik terpenuhi pada tingkat signifikansi "
+                   f"{_format_indonesian_numeric(TINGKAT_SIGNIFIKANSI_ASUMSI, 2)}.")
+
 def show_modeling_evaluation():
     """Menampilkan konten untuk halaman Modeling dan Evaluasi."""
     st.title("📈 Modeling & Evaluasi")
@@ -1263,24 +4163,453 @@ def show_modeling_evaluation():
             st.subheader("📝 Persamaan Model")
             st.write("Persamaan regresi linier berganda yang dihasilkan.")
             
-            intercept = model.intercept_
-            coefs = model.coef_
-            features = results['features']
-            
-            eq_string = f"Y' = {_format_indonesian_numeric(intercept, 2)}".replace(",", "@").replace(".", ",").replace("@", ".")
-            for i, coef in enumerate(coefs):
-                sign = '+' if coef >= 0 else '-'
-                eq_string += f" {sign} {_format_indonesian_numeric(abs(coef), 2)}".replace(",", "@").replace(".", ",").replace("@", ".") + f" (X_{i+1})"
-            
-            st.markdown(f"Persamaan model: `{eq_string}`")
+            show_model_equation(results)
 
-            st.write("Di mana:")
-            for i, feature in enumerate(features):
-                st.write(f"$X_{i+1}$ = **{feature}**")
+        with st.expander("Fitur Musiman & Lag", expanded=False):
+            show_seasonal_feature_form(results)
+
+        with st.expander("Model Deret Waktu (SARIMAX)", expanded=False):
+            show_sarimax_panel(results)
+
+        with st.expander("Regresi Teregularisasi (Ridge/Lasso/Elastic-Net)", expanded=False):
+            _regularization_fragment(results)
+
+        with st.expander("Diagnostik Pengaruh & Pencilan", expanded=False):
+            _influence_fragment(results)
+
+        with st.expander("Regresi Robust (Huber / IRLS)", expanded=False):
+            show_robust_panel(results)
+
+        with st.expander("Perbandingan Model (Model Zoo)", expanded=False):
+            show_model_zoo_panel(results)
         
     else:
         st.warning("Data atau model belum tersedia. Silakan unggah data dan jalankan Modeling terlebih dahulu.")
 
+def show_model_equation(results):
+    """Persamaan model linear aktif, atau kepentingan fitur untuk model non-linear."""
+    model = results['model']
+    features = results['features']
+    if not hasattr(model, 'coef_'):
+        st.write(f"Model aktif ({results.get('jenis_model', type(model).__name__)}) tidak memiliki persamaan linear.")
+        importances = getattr(model, 'feature_importances_', None)
+        if importances is not None:
+            st.bar_chart(pd.DataFrame({'Fitur': features, 'Kepentingan': importances}), x='Fitur', y='Kepentingan')
+        return
+
+    intercept = model.intercept_
+    coefs = model.coef_
+
+    eq_string = f"Y' = {_format_indonesian_numeric(intercept, 2)}".replace(",", "@").replace(".", ",").replace("@", ".")
+    for i, coef in enumerate(coefs):
+        sign = '+' if coef >= 0 else '-'
+        eq_string += f" {sign} {_format_indonesian_numeric(abs(coef), 2)}".replace(",", "@").replace(".", ",").replace("@", ".") + f" (X_{i+1})"
+
+    st.markdown(f"Persamaan model: `{eq_string}`")
+    if 'jenis_model' in results:
+        st.caption(f"Model aktif: {results['jenis_model']}. {results.get('keterangan_model', '')}")
+
+    st.write("Di mana:")
+    for i, feature in enumerate(features):
+        st.write(f"$X_{i+1}$ = **{feature}**")
+
+def show_seasonal_feature_form(results):
+    """Form untuk memilih fitur musiman & lag lalu melatih ulang model."""
+    st.write("Tambahkan fitur musiman (mis. puncak Lebaran dan akhir tahun) dan lag penumpang ke model. "
+             "Data testing dievaluasi satu langkah ke depan; prediksi 5 tahun memakai lag secara rekursif.")
+    opsi_lama = {**OPSI_FITUR_DEFAULT, **(results.get('opsi_fitur') or {})}
+    with st.form("form_fitur_musiman"):
+        dummy_bulan = st.checkbox("Dummy bulan (11 kolom)", value=opsi_lama['dummy_bulan'])
+        fourier_k = st.slider("Pasangan Fourier (sin/cos, periode 12 bulan)", 0, 6, opsi_lama['fourier_k'])
+        lag_penumpang = st.multiselect("Lag penumpang (bulan)", [1, 2, 3, 6, 12], default=list(opsi_lama['lag_penumpang']))
+        lag_libur = st.multiselect("Lag libur nasional & cuti bersama (bulan)", [1, 2, 12], default=list(opsi_lama['lag_libur']))
+        rata_bergulir = st.multiselect("Rata-rata bergulir penumpang (bulan)", [3, 6, 12], default=list(opsi_lama['rata_bergulir']))
+        kalender_harian = st.checkbox("Kalender hari kerja (hari kerja efektif, libur panjang, hari kejepit)",
+                                      value=opsi_lama['kalender_harian'],
+                                      disabled=not set(FITUR_KALENDER).issubset(st.session_state.df_training.columns),
+                                      help="Membutuhkan kolom Tanggal pada file libur.")
+        submitted = st.form_submit_button("Latih Ulang Model")
+
+    if submitted:
+        opsi_fitur = {
+            'dummy_bulan': dummy_bulan,
+            'fourier_k': fourier_k,
+            'lag_penumpang': tuple(sorted(lag_penumpang)),
+            'lag_libur': tuple(sorted(lag_libur)),
+            'rata_bergulir': tuple(sorted(rata_bergulir)),
+            'kalender_harian': kalender_harian,
+        }
+        df_training = st.session_state.df_training
+        df_testing = st.session_state.df_testing
+        with instrument('modeling.fitur_musiman', rows=len(df_training) + len(df_testing)):
+            df_training, df_testing, fitur_tambahan, error = _bangun_fitur_musiman_cached(df_training, df_testing, opsi_fitur)
+        if error:
+            st.error(error)
+            return
+        with instrument('modeling.latih_ulang', rows=len(df_training) + len(df_testing)):
+            results_baru, error = latih_dan_evaluasi_regresi(df_training, df_testing, FITUR_REGRESI + fitur_tambahan)
+        if error:
+            st.error(f"Gagal melatih model: {error}")
+            return
+
+        results_baru['opsi_fitur'] = opsi_fitur
+        st.session_state.opsi_fitur = opsi_fitur
+        st.session_state.df_training = share_dataset(df_training)
+        st.session_state.df_testing = share_dataset(df_testing)
+        st.session_state.model_results = results_baru
+        for stale_key in ('df_future', 'df_future_model'):
+            st.session_state.pop(stale_key, None)
+        st.rerun()
+
+def show_sarimax_panel(results):
+    """Panel pencarian orde SARIMAX dan perbandingannya dengan model aktif."""
+    st.write("Regresi dengan galat ARIMA memakai lima regresor yang sama, tetapi memodelkan autokorelasi "
+             "residual bulanan. Orde (p,d,q)(P,D,Q,12) dipilih dengan AIC terkecil; kombinasi musiman "
+             "hanya dicoba untuk kandidat non-musiman terbaik.")
+    if st.button("Cari Orde & Latih SARIMAX"):
+        df_training = st.session_state.df_training
+        df_testing = st.session_state.df_testing
+        with st.spinner("Mencari orde SARIMAX terbaik..."), \
+                instrument('modeling.sarimax', rows=len(df_training) + len(df_testing)):
+            sarimax_results, error = latih_dan_evaluasi_sarimax(df_training, df_testing, executor=get_sarimax_executor())
+        if error:
+            st.error(error)
+            return
+        st.session_state.sarimax_results = sarimax_results
+
+    sarimax_results = st.session_state.get('sarimax_results')
+    if sarimax_results is None:
+        return
+
+    perbandingan = pd.DataFrame({
+        'Model': [results.get('jenis_model', 'OLS'), sarimax_results['jenis_model']],
+        'MAE Training': [results['mae_training'], sarimax_results['mae_training']],
+        'MAPE Training (%)': [results['mape_training'], sarimax_results['mape_training']],
+        'MAE Testing': [results['mae_testing'], sarimax_results['mae_testing']],
+        'MAPE Testing (%)': [results['mape_testing'], sarimax_results['mape_testing']],
+    })
+    st.markdown("##### Perbandingan dengan Model Aktif")
+    st.dataframe(perbandingan.style.format({
+        col: (lambda x: _format_indonesian_numeric(x, 2)) for col in perbandingan.columns if col != 'Model'
+    }), hide_index=True)
+
+    grid = sarimax_results['grid_orde']
+    st.markdown("##### Orde Terbaik Berdasarkan AIC")
+    st.caption(f"{len(grid)} kombinasi orde dicoba, {sarimax_results['orde_dipangkas']} dipangkas tanpa dilatih.")
+    st.dataframe(grid.head(10).astype({'order': str, 'seasonal_order': str}), hide_index=True)
+
+    if results is not sarimax_results and st.button("Gunakan SARIMAX sebagai Model Aktif"):
+        st.session_state.model_results = sarimax_results
+        for stale_key in ('df_future', 'df_future_model'):
+            st.session_state.pop(stale_key, None)
+        st.rerun()
+
+@st.fragment
+def _regularization_fragment(results):
+    """Jalur regularisasi lengkap; mengganti jenis atau alpha hanya menjalankan ulang fragmen ini."""
+    st.write("Fitur 'Total Jarak Tempuh Penumpang' sangat kolinear dengan jumlah penumpang (lihat VIF). "
+             "Regularisasi menyusutkan koefisien; alpha dipilih dengan validasi silang deret waktu.")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        jenis = st.radio("Jenis", list(JENIS_REGULARISASI), format_func=JENIS_REGULARISASI.get, key="regularisasi_jenis")
+    with col2:
+        l1_ratio = st.slider("Rasio L1 (Elastic-Net)", 0.1, 0.9, 0.5, 0.1, key="regularisasi_l1",
+                             disabled=jenis != 'elasticnet')
+    with col3:
+        n_splits = st.number_input("Jumlah fold CV", 2, 5, 3, key="regularisasi_fold")
+
+    df_training = st.session_state.df_training
+    df_testing = st.session_state.df_testing
+    features = tuple(f for f in results['features'] if f in df_training.columns)
+    with instrument('modeling.jalur_regularisasi', rows=len(df_training) * JUMLAH_ALPHA_JALUR):
+        jalur, error = _hitung_jalur_regularisasi_cached(df_training, df_testing, features, jenis, l1_ratio, int(n_splits))
+    if error:
+        st.error(error)
+        return
+
+    log_alpha = np.log10(jalur['alphas'])
+    st.caption(f"{JUMLAH_ALPHA_JALUR} alpha x ({int(n_splits)} fold + data penuh) dihitung dalam "
+               f"{_format_indonesian_numeric(jalur['durasi_ms'], 1)} ms.")
+
+    st.markdown("##### MAPE per Alpha")
+    st.line_chart(pd.DataFrame({'log10(alpha)': log_alpha, 'MAPE CV (%)': jalur['cv_mape'],
+                                'MAPE Testing (%)': jalur['test_mape']}), x='log10(alpha)')
+    st.markdown("##### Jalur Koefisien (fitur terstandarisasi)")
+    st.line_chart(pd.DataFrame(jalur['coef_std'], columns=list(features)).assign(**{'log10(alpha)': log_alpha}),
+                  x='log10(alpha)')
+
+    indeks = st.select_slider("Alpha", options=list(range(len(jalur['alphas']))), value=jalur['indeks_terbaik'],
+                              format_func=lambda i: f"{jalur['alphas'][i]:.4g}", key="regularisasi_alpha")
+    st.write(f"Alpha terpilih CV: **{jalur['alphas'][jalur['indeks_terbaik']]:.4g}**; "
+             f"MAPE testing pada alpha dipilih: **{_format_indonesian_numeric(jalur['test_mape'][indeks], 2)}%**")
+
+    tabel = pd.DataFrame(jalur['coef'], columns=list(features))
+    tabel.insert(0, 'alpha', jalur['alphas'])
+    tabel['intercept'] = jalur['intercept']
+    tabel['MAPE CV (%)'] = jalur['cv_mape']
+    tabel['MAPE Testing (%)'] = jalur['test_mape']
+    st.dataframe(tabel.style.format({col: '{:.4g}' for col in tabel.columns}), height=250)
+
+    if st.button("Gunakan sebagai Model Aktif", key="regularisasi_gunakan"):
+        results_baru = hasil_model_regularisasi(jalur, df_training, df_testing, indeks)
+        results_baru['opsi_fitur'] = results.get('opsi_fitur')
+        st.session_state.model_results = results_baru
+        for stale_key in ('df_future', 'df_future_model'):
+            st.session_state.pop(stale_key, None)
+        st.rerun(scope="app")
+
+def show_model_zoo_panel(results):
+    """Leaderboard beberapa keluarga model pada split training/testing yang sama."""
+    st.write("Melatih beberapa keluarga model bersamaan pada data training dan testing yang sama. "
+             "Model hasil fit di-cache, sehingga membuka kembali halaman ini tidak melatih ulang.")
+    keluarga = st.multiselect("Keluarga model", list(MODEL_ZOO), default=list(MODEL_ZOO), key="model_zoo_keluarga")
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Jalankan Perbandingan", disabled=not keluarga):
+            st.session_state.model_zoo_aktif = True
+    with col2:
+        if st.button("Latih Ulang (Kosongkan Cache)"):
+            _jalankan_model_zoo_cached.clear()
+            st.session_state.model_zoo_aktif = True
+
+    if not st.session_state.get('model_zoo_aktif') or not keluarga:
+        return
+
+    df_training = st.session_state.df_training
+    df_testing = st.session_state.df_testing
+    features = tuple(f for f in results['features'] if f in df_training.columns)
+    with st.spinner("Melatih model..."), instrument('modeling.model_zoo', rows=len(df_training) + len(df_testing)):
+        leaderboard, hasil = _jalankan_model_zoo_cached(df_training, df_testing, features, tuple(keluarga))
+
+    kolom_angka = [c for c in leaderboard.columns if c not in ('Model', 'Status', 'Keluarga')]
+    st.dataframe(leaderboard.drop(columns='Keluarga').style.format(
+        {col: (lambda x: _format_indonesian_numeric(x, 3)) for col in kolom_angka}, na_rep='-'
+    ), hide_index=True)
+
+    if hasil:
+        pilihan = st.selectbox("Jadikan model aktif", [k for k in leaderboard['Keluarga'] if k in hasil])
+        if st.button("Gunakan Model Ini"):
+            results_baru = dict(hasil[pilihan])
+            results_baru['opsi_fitur'] = results.get('opsi_fitur')
+            st.session_state.model_results = results_baru
+            for stale_key in ('df_future', 'df_future_model'):
+                st.session_state.pop(stale_key, None)
+            st.rerun()
+
+# --- Ekspor Model untuk Layanan Prediksi ---
+# Tingkat kepercayaan selang prediksi yang nilai kritis t-nya disertakan di artefak
+TINGKAT_SELANG_PREDIKSI = (0.80, 0.90, 0.95, 0.99)
+
+def ekspor_model(results, df_training):
+    """
+    Menyusun artefak koefisien (dict siap JSON) untuk model_scorer dan
+    prediction_service.py: urutan fitur, intercept, koefisien, dan simpangan baku
+    residual training (juga skala monitoring drift). Hanya untuk OLS ditambahkan
+    faktor segitiga R^-1 dari QR Z = [1, X] (sehingga (Z'Z)^-1 = R^-1 R^-T) dan
+    nilai kritis t untuk selang prediksi; rumus itu tidak berlaku untuk model
+    teregularisasi, robust, atau OLS pada sebagian baris, sehingga artefaknya
+    hanya untuk prediksi titik.
+    Hanya model linear (memiliki coef_/intercept_) yang dapat diekspor.
+    Mengembalikan (artefak, error).
+    """
+    try:
+        model = results['model']
+        features = list(results['features'])
+        if isinstance(model, RegresiARIMA) or not hasattr(model, 'coef_'):
+            raise ValueError(f"model {results.get('jenis_model', type(model).__name__)} bukan model linear berkoefisien; "
+                             "ekspor hanya untuk model regresi linear")
+        X = df_training[features]
+        valid = X.notna().all(axis=1).to_numpy()
+        Z = np.column_stack([np.ones(valid.sum()), X[valid].to_numpy(dtype=np.float64)])
+        y = df_training[TARGET_REGRESI].to_numpy(dtype=np.float64)[valid]
+        beta = np.concatenate([[model.intercept_], np.ravel(model.coef_)])
+        derajat_bebas = len(y) - Z.shape[1]
+        if derajat_bebas < 1:
+            raise ValueError(f"hanya {len(y)} baris training untuk {Z.shape[1]} parameter")
+
+        residual = y - Z @ beta
+        artefak = {
+            'versi': model_scorer.VERSI_ARTEFAK,
+            'jenis_model': results.get('jenis_model', 'Regresi Linear Berganda (OLS)'),
+            'target': TARGET_REGRESI,
+            'features': features,
+            'intercept': float(beta[0]),
+            'coef': beta[1:].tolist(),
+            'sigma': float(np.sqrt(residual @ residual / derajat_bebas)),
+            'derajat_bebas': int(derajat_bebas),
+            'dibuat': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        }
+        # RegresiInkremental dan model lain mengikuti antarmuka LinearRegression tetapi bukan turunannya
+        if isinstance(model, LinearRegression):
+            R = np.linalg.qr(Z, mode='r')
+            artefak['faktor_kovarians'] = solve_triangular(R, np.eye(Z.shape[1])).tolist()
+            artefak['t_kritis'] = {str(t): float(stats.t.ppf((1 + t) / 2, derajat_bebas)) for t in TINGKAT_SELANG_PREDIKSI}
+        return artefak, None
+    except Exception as e:
+        print(f"ERROR: {e}")
+        return None, f"Model tidak dapat diekspor: {e}"
+
+def show_model_export(results, df_training, df_testing):
+    """Tombol unduh artefak model beserta cara menjalankan layanan prediksi lokal."""
+    artefak, error = ekspor_model(results, df_training)
+    if error:
+        st.info(error)
+        return
+    st.write("Artefak berisi koefisien, urutan fitur, dan statistik residual yang dibutuhkan untuk selang prediksi. "
+             "Skorer murni NumPy (`model_scorer.py`) menilai jutaan baris skenario dengan satu perkalian matriks "
+             "tanpa Streamlit maupun sklearn; layanan prediksi lokal memakai skorer yang sama dan menggabungkan "
+             "permintaan yang datang bersamaan.")
+    ada_selang = 'faktor_kovarians' in artefak
+    if not ada_selang:
+        st.info(f"Model {artefak['jenis_model']} bukan OLS biasa: selang prediksi OLS tidak berlaku, sehingga artefak "
+                "hanya mendukung prediksi titik (`model.skor`) dan layanan tidak mengembalikan batas bawah/atas.")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.download_button("Unduh Model (JSON)", json.dumps(artefak, indent=2), file_name="model_regresi.json",
+                           mime="application/json", key="unduh_model_json")
+    with col2:
+        with open(model_scorer.__file__, encoding='utf-8') as f:
+            st.download_button("Unduh Skorer (model_scorer.py)", f.read(), file_name="model_scorer.py",
+                               mime="text/x-python", key="unduh_model_scorer")
+    st.code("from model_scorer import muat_artefak\n"
+            "model = muat_artefak('model_regresi.json')\n"
+            + ("prediksi, bawah, atas = model.selang(df_skenario, tingkat=0.95)" if ada_selang
+               else "prediksi = model.skor(df_skenario)"), language="python")
+    st.code("python prediction_service.py model_regresi.json --port 8765", language="bash")
+    contoh = {'baris': [{f: float(v) for f, v in df_testing[artefak['features']].iloc[0].items()}]}
+    if ada_selang:
+        contoh['tingkat'] = 0.95
+    st.caption("Contoh isi permintaan POST /prediksi (baris pertama data testing):")
+    st.code(json.dumps(contoh, indent=2), language="json")
+
+# --- Monitoring Drift Model ---
+def perbarui_monitoring(state, skorer, df_baru, target='Penumpang (000)'):
+    """
+    Menilai bulan-bulan baru dengan skorer artefak (satu perkalian matriks) lalu
+    memperbarui state monitoring secara inkremental, berurutan menurut periode.
+    Bulan yang sudah pernah diproses dilewati. Mengembalikan ((alarm, riwayat), error)
+    dengan riwayat berisi statistik setelah setiap bulan yang diproses.
+    """
+    try:
+        hilang = [k for k in ('Tahun', 'Bulan', target, *skorer.features) if k not in df_baru.columns]
+        if hilang:
+            return None, f"Kolom berikut tidak ada di data bulan baru: {', '.join(hilang)}"
+        periode = np.array([model_monitor.indeks_periode(t, b) for t, b in zip(df_baru['Tahun'], df_baru['Bulan'])])
+        urutan = np.argsort(periode, kind='stable')
+        nilai = pd.DataFrame({k: _konversi_angka(df_baru[k], None) for k in (target, *skorer.features)}).iloc[urutan]
+        if nilai.isna().any().any():
+            return None, "Data bulan baru memuat nilai kosong atau bukan angka pada kolom target/fitur."
+        prediksi = skorer.skor(nilai[skorer.features])
+
+        alarm, riwayat = [], []
+        for p, aktual, yhat in zip(periode[urutan].tolist(), nilai[target].tolist(), prediksi.tolist()):
+            n_sebelum = state['n']
+            baru = model_monitor.perbarui(state, p, aktual, yhat)
+            if state['n'] == n_sebelum:
+                continue
+            alarm.extend(baru)
+            # CUSUM yang memicu alarm sudah direset ke 0; tampilkan nilai saat alarm
+            pemicu = {a['jenis']: a['nilai'] for a in baru}
+            riwayat.append({'Periode': model_monitor.label_periode(p), 'Aktual': aktual, 'Prediksi': yhat,
+                            'CUSUM +': pemicu.get('cusum_atas', state['cusum_atas']),
+                            'CUSUM -': pemicu.get('cusum_bawah', state['cusum_bawah']),
+                            'EWMA MAPE (%)': state['ewma_mape'], 'Alarm': ', '.join(a['jenis'] for a in baru)})
+        return (alarm, riwayat), None
+    except Exception as e:
+        print(f"ERROR: {e}")
+        return None, f"Gagal memperbarui monitoring: {e}"
+
+@st.fragment
+def show_drift_monitor(results, df_training, df_testing):
+    """
+    Monitoring drift setelah deployment: state CUSUM/EWMA/bias dimulai dari bulan
+    terakhir data testing dan diperbarui setiap kali data aktual bulan baru diunggah.
+    """
+    artefak, error = ekspor_model(results, df_training)
+    if error:
+        st.info(error)
+        return
+    skorer = model_scorer.dari_dict(artefak)
+    if st.session_state.get('monitor_model') is not results['model']:
+        terakhir = df_testing.iloc[-1]
+        st.session_state.monitor_state = model_monitor.inisialisasi(
+            artefak['sigma'], results['mape_testing'],
+            model_monitor.indeks_periode(terakhir['Tahun'], terakhir['Bulan']))
+        st.session_state.monitor_riwayat = []
+        st.session_state.monitor_alarm = []
+        st.session_state.monitor_model = results['model']
+
+    p = model_monitor.PARAMETER_DEFAULT
+    st.write("Setiap bulan aktual baru dibandingkan dengan prediksi model dan statistik residual diperbarui "
+             f"inkremental: CUSUM dua sisi atas residual terstandarisasi (ambang {p['h_cusum']:g}σ), EWMA dari APE "
+             f"(alarm di atas {p['faktor_mape']:g}× MAPE testing), dan bias rata-rata {p['jendela_bias']} bulan terakhir. "
+             "State monitoring disimpan sebagai JSON ringkas agar dapat dilanjutkan di sesi berikutnya.")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        file_state = st.file_uploader("Lanjutkan dari state monitoring (JSON)", type=['json'], key="monitor_state_upload")
+    with col2:
+        file_data = st.file_uploader("Data aktual bulan baru (CSV/XLSX)", type=['csv', 'xlsx'], key="monitor_data_upload")
+    kolom = ['Tahun', 'Bulan', *skorer.features, artefak['target']]
+    st.download_button("Unduh Templat Data Bulan Baru (CSV)", pd.DataFrame(columns=kolom).to_csv(index=False),
+                       file_name="templat_bulan_baru.csv", mime="text/csv", key="unduh_templat_monitor")
+
+    if file_state is not None and st.session_state.get('monitor_state_file') != file_state.file_id:
+        try:
+            state = json.loads(file_state.getvalue())
+            if state.get('versi') != model_monitor.VERSI_STATE:
+                raise ValueError(f"versi state {state.get('versi')} tidak didukung")
+            st.session_state.monitor_state = state
+            st.session_state.monitor_riwayat = []
+            st.session_state.monitor_alarm = []
+        except (ValueError, KeyError) as e:
+            print(f"ERROR: {e}")
+            st.error(f"State monitoring tidak valid: {e}")
+        st.session_state.monitor_state_file = file_state.file_id
+
+    if file_data is not None and st.button("Perbarui Monitoring", key="monitor_perbarui"):
+        df_baru = pd.read_csv(file_data) if file_data.name.lower().endswith('.csv') else _baca_excel_cepat(file_data)
+        with instrument('deployment.monitoring_drift', rows=len(df_baru)):
+            hasil, error = perbarui_monitoring(st.session_state.monitor_state, skorer, df_baru, artefak['target'])
+        if error:
+            st.error(error)
+        elif not hasil[1]:
+            st.info("Tidak ada bulan baru setelah periode terakhir yang sudah dipantau.")
+        else:
+            st.session_state.monitor_alarm.extend(hasil[0])
+            st.session_state.monitor_riwayat.extend(hasil[1])
+
+    state = st.session_state.monitor_state
+    r = model_monitor.ringkasan(state)
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Bulan Dipantau", r['n'], help=f"Periode terakhir: {r['periode_terakhir'] or '-'}")
+    c2.metric("CUSUM +/−", f"{_format_indonesian_numeric(r['cusum_atas'], 2)} / "
+                           f"{_format_indonesian_numeric(r['cusum_bawah'], 2)}")
+    c3.metric("EWMA MAPE", "-" if r['ewma_mape'] is None else f"{_format_indonesian_numeric(r['ewma_mape'], 2)}%",
+              help=f"MAPE testing: {_format_indonesian_numeric(state['mape_dasar'], 2)}%")
+    c4.metric("Bias Bergulir", "-" if r['bias_bergulir'] is None else _format_indonesian_numeric(r['bias_bergulir'], 2))
+    if r['perlu_latih_ulang']:
+        rincian = '; '.join(f"{jenis} {c['jumlah']} bulan ({c['pertama']} s.d. {c['terakhir']})"
+                            for jenis, c in r['alarm_belum_ditangani'].items())
+        st.error(f"Latih ulang model disarankan: alarm belum ditangani - {rincian}.")
+        st.button("Tandai Alarm Sudah Ditangani", key="monitor_tandai_ditangani",
+                  on_click=model_monitor.tandai_ditangani, args=(state,))
+    elif r['n']:
+        st.success("Belum ada drift yang terdeteksi sejak alarm terakhir ditangani.")
+
+    if st.session_state.monitor_riwayat:
+        st.dataframe(pd.DataFrame(st.session_state.monitor_riwayat).style.format(
+            {k: '{:.2f}' for k in ('Aktual', 'Prediksi', 'CUSUM +', 'CUSUM -', 'EWMA MAPE (%)')}), hide_index=True)
+    if st.session_state.monitor_alarm:
+        st.caption("Alarm yang terpicu pada sesi ini:")
+        st.dataframe(pd.DataFrame(st.session_state.monitor_alarm).rename(columns=str.capitalize), hide_index=True)
+
+    st.download_button("Unduh State Monitoring (JSON)", json.dumps(state, separators=(',', ':')),
+                       file_name="state_monitor.json", mime="application/json", key="unduh_state_monitor")
+    st.caption("Pembaruan terjadwal di luar aplikasi (kode keluar 1 selama ada alarm yang belum ditangani):")
+    st.code("python model_monitor.py state_monitor.json --artefak model_regresi.json --data bulan_baru.csv\n"
+            "python model_monitor.py state_monitor.json --tandai-ditangani", language="bash")
+
 def show_deployment():
     """Menampilkan konten untuk halaman Deployment."""
     st.title("🚀 Deployment")
@@ -1295,7 +4624,11 @@ def show_deployment():
         results = st.session_state.model_results
 
         # --- MODIFIKASI: Panggil fungsi prediksi 5 tahun di sini ---
-        predict_5_years(results['model'], df_training)
+        # Prediksi hanya dihitung ulang bila model berubah, bukan di setiap rerun halaman
+        if st.session_state.get('df_future_model') is not results['model']:
+            with instrument('deployment.prediksi_5_tahun', rows=60):
+                predict_5_years(results['model'], df_training, results.get('opsi_fitur'))
+            st.session_state.df_future_model = results['model']
         
         mape_testing_real = results['mape_testing']
         
@@ -1328,7 +4661,7 @@ def show_deployment():
             st.write(f"Model ini memiliki nilai MAPE sebesar **{_format_indonesian_numeric(mape_testing_real, 2)}%** pada data testing, yang termasuk dalam kategori **{accuracy_status}**.")
             st.write(status_text)
         
-        with st.expander("Hasil Prediksi", expanded=True):
+        with st.expander("Hasil Prediksi", expanded=True), instrument('deployment.tabel_prediksi', rows=len(df_training) + len(df_testing) + 60):
             tab1, tab2, tab3 = st.tabs(["Data Training", "Data Testing", "Prediksi 5 Tahun"])
             
             prediction_df_training_real = pd.DataFrame({
@@ -1373,7 +4706,7 @@ def show_deployment():
             
             with tab3:
                 st.write("Tabel ini menampilkan prediksi jumlah penumpang untuk 5 tahun ke depan.")
-                df_future_display = st.session_state.df_future[['Bulan', 'Tahun', 'Penumpang (000)']].copy()
+                df_future_display = st.session_state.df_future[['Bulan', 'Tahun', 'Penumpang (000)']]
                 # --- MODIFIKASI: Format hanya kolom numerik yang relevan ---
                 styled_df = df_future_display.style.format({
                     'Tahun': '{:.0f}', # Tahun tidak diformat
@@ -1385,39 +4718,50 @@ def show_deployment():
         with st.expander("Visualisasi Tren dan Prediksi", expanded=True):
             st.subheader("Visualisasi Tren dan Prediksi")
             st.write("Grafik di bawah ini memvisualisasikan tren data historis dan perbandingan dengan hasil prediksi.")
-            
-            df_combined_training = pd.DataFrame({
-                'Bulan ke-n': df_training['Bulan ke-n'],
-                'Aktual Training': df_training['Penumpang (000)'],
-                'Prediksi Training': results['y_pred_training']
-            })
-            df_combined_testing = pd.DataFrame({
-                'Bulan ke-n': df_testing['Bulan ke-n'],
-                'Aktual Testing': df_testing['Penumpang (000)'],
-                'Prediksi Testing': results['y_pred_testing']
-            })
-            df_combined = pd.concat([df_combined_training, df_combined_testing], ignore_index=True)
-            
-            chart_type = st.session_state.chart_type_option
-            if chart_type == 'Garis':
-                st.line_chart(df_combined, x='Bulan ke-n', y=['Aktual Training', 'Prediksi Training', 'Aktual Testing', 'Prediksi Testing'])
-            elif chart_type == 'Batang':
-                df_combined_long = pd.melt(df_combined, id_vars=['Bulan ke-n'], var_name='Jenis Data', value_name='Jumlah Penumpang')
-                
-                chart = alt.Chart(df_combined_long).mark_bar().encode(
-                    x=alt.X('Bulan ke-n:O', axis=alt.Axis(title='Bulan ke-n')),
-                    y=alt.Y('Jumlah Penumpang:Q', title='Jumlah Penumpang'),
-                    color=alt.Color('Jenis Data:N', legend=alt.Legend(title="Jenis Data")),
-                    xOffset='Jenis Data:N',
-                    tooltip=['Bulan ke-n', 'Jenis Data', 'Jumlah Penumpang']
-                ).properties(
-                    title="Grafik Tren dan Prediksi Jumlah Penumpang"
-                ).interactive()
-                st.altair_chart(chart, use_container_width=True)
+            _deployment_chart_fragment(df_training, df_testing, results)
+
+        with st.expander("Ekspor Model & Layanan Prediksi", expanded=False):
+            show_model_export(results, df_training, df_testing)
+
+        with st.expander("Monitoring Drift Model", expanded=False):
+            show_drift_monitor(results, df_training, df_testing)
             
     else:
         st.warning("Data atau model belum tersedia. Silakan unggah data dan jalankan Modeling terlebih dahulu.")
 
+@st.fragment
+def _deployment_chart_fragment(df_training, df_testing, results):
+    """Grafik aktual vs prediksi; mengganti jenis grafik tidak menjalankan ulang prediksi 5 tahun."""
+    with instrument('fragmen.grafik_prediksi', rows=len(df_training) + len(df_testing)):
+        chart_type = chart_type_selector("chart_type_deployment")
+        df_combined_training = pd.DataFrame({
+            'Bulan ke-n': df_training['Bulan ke-n'],
+            'Aktual Training': df_training['Penumpang (000)'],
+            'Prediksi Training': results['y_pred_training']
+        })
+        df_combined_testing = pd.DataFrame({
+            'Bulan ke-n': df_testing['Bulan ke-n'],
+            'Aktual Testing': df_testing['Penumpang (000)'],
+            'Prediksi Testing': results['y_pred_testing']
+        })
+        df_combined = pd.concat([df_combined_training, df_combined_testing], ignore_index=True)
+
+        if chart_type == 'Garis':
+            st.line_chart(df_combined, x='Bulan ke-n', y=['Aktual Training', 'Prediksi Training', 'Aktual Testing', 'Prediksi Testing'])
+        elif chart_type == 'Batang':
+            df_combined_long = pd.melt(df_combined, id_vars=['Bulan ke-n'], var_name='Jenis Data', value_name='Jumlah Penumpang')
+            
+            chart = alt.Chart(df_combined_long).mark_bar().encode(
+                x=alt.X('Bulan ke-n:O', axis=alt.Axis(title='Bulan ke-n')),
+                y=alt.Y('Jumlah Penumpang:Q', title='Jumlah Penumpang'),
+                color=alt.Color('Jenis Data:N', legend=alt.Legend(title="Jenis Data")),
+                xOffset='Jenis Data:N',
+                tooltip=['Bulan ke-n', 'Jenis Data', 'Jumlah Penumpang']
+            ).properties(
+                title="Grafik Tren dan Prediksi Jumlah Penumpang"
+            ).interactive()
+            st.altair_chart(chart, use_container_width=True)
+
 # --- Main Application Logic ---
 def main():
     """Fungsi utama untuk menjalankan aplikasi Streamlit."""
@@ -1429,7 +4773,17 @@ def main():
     # Tambahkan session_state untuk mengontrol tampilan chatbot
     if 'show_chatbot' not in st.session_state:
         st.session_state.show_chatbot = False
+    if 'chart_type_option' not in st.session_state:
+        st.session_state.chart_type_option = CHART_TYPE_OPTIONS[0]
+
+    # Sinkronkan tracemalloc sebelum halaman dieksekusi: menyala hanya selama ada sesi dengan panel debug aktif
+    sinkronkan_tracemalloc(bool(st.session_state.get('debug_instrumentation')))
+
+    with instrument('app.rerun_penuh'):
+        _render_app()
 
+def _render_app():
+    """Menyusun header, sidebar, halaman aktif, dan footer (satu rerun penuh)."""
     create_header()
     create_sidebar_menu()
     
@@ -1448,6 +4802,8 @@ def main():
     elif st.session_state.page == 'chatbot':
         show_chatbot_page()
     
+    # Panel debug dirender setelah halaman agar memuat tahap-tahap dari eksekusi ini
+    show_instrumentation_panel()
     create_footer()
 
 if __name__ == "__main__":
@@ -0,0 +1,23 @@
+import pytest
+import streamlit as st
+
+import streamlit_app
+
+@pytest.fixture(autouse=True)
+def data_dimuat():
+    st.session_state['data_loaded'] = True
+    yield
+    del st.session_state['data_loaded']
+
+@pytest.mark.parametrize('prompt', ["berapa MAPE training", "berapa MAPE data testing"])
+def test_satu_kata_pendukung_diteruskan_ke_llm(prompt):
+    keputusan = streamlit_app.route_chatbot_intent(prompt)
+    assert keputusan['intent'] is None
+
+@pytest.mark.parametrize('prompt, intent', [
+    ("mengapa MAPE training berbeda dengan testing", 'beda_mape'),
+    ("jelaskan arti koefisien model", 'koefisien'),
+    ("koefisien model regresi", 'koefisien'),
+])
+def test_intent_lokal_tetap_dikenali(prompt, intent):
+    assert streamlit_app.route_chatbot_intent(prompt)['intent'] == intent
@@ -0,0 +1,46 @@
+import csv
+
+import model_monitor
+from model_scorer import VERSI_ARTEFAK, simpan_artefak
+
+SIGMA = 100.0
+
+def _state():
+    return model_monitor.inisialisasi(SIGMA, 100.0, model_monitor.indeks_periode(2024, 12))
+
+def test_alarm_tetap_tercatat_setelah_bulan_normal():
+    state = _state()
+    januari, februari = model_monitor.indeks_periode(2025, 1), model_monitor.indeks_periode(2025, 2)
+
+    alarm = model_monitor.perbarui(state, januari, 1000 + 6 * SIGMA, 1000)
+    assert [a['jenis'] for a in alarm] == ['cusum_atas']
+    assert model_monitor.perbarui(state, februari, 1000, 1000) == []
+
+    r = model_monitor.ringkasan(state)
+    assert r['alarm_aktif'] == []
+    assert r['perlu_latih_ulang']
+    assert r['alarm_belum_ditangani']['cusum_atas'] == {'pertama': 'Januari 2025', 'terakhir': 'Januari 2025', 'jumlah': 1}
+
+    model_monitor.tandai_ditangani(state)
+    assert not model_monitor.ringkasan(state)['perlu_latih_ulang']
+
+def test_cli_alarm_lalu_normal_keluar_1_dan_state_tersimpan(tmp_path, capsys):
+    artefak = {'versi': VERSI_ARTEFAK, 'target': 'Penumpang (000)', 'features': ['x'], 'intercept': 0.0,
+               'coef': [1.0], 'sigma': SIGMA, 'faktor_kovarians': [[0.1, 0.0], [0.0, 0.1]], 't_kritis': {'0.95': 2.0}}
+    simpan_artefak(artefak, tmp_path / 'model.json')
+    with open(tmp_path / 'baru.csv', 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(['Tahun', 'Bulan', 'x', 'Penumpang (000)'])
+        writer.writerow([2025, 'Januari', 1000, 1000 + 6 * SIGMA])
+        writer.writerow([2025, 'Februari', 1000, 1000])
+    path_state = str(tmp_path / 'state.json')
+    argumen = [path_state, '--artefak', str(tmp_path / 'model.json'), '--data', str(tmp_path / 'baru.csv')]
+
+    assert model_monitor.main(argumen + ['--mape-dasar', '5', '--periode-awal', '2024-12']) == 1
+    assert 'DISARANKAN' in capsys.readouterr().out
+    assert model_monitor.muat_state(path_state)['alarm_belum_ditangani']
+
+    # Memproses ulang file yang sama tidak mengubah state maupun rekomendasi
+    assert model_monitor.main(argumen) == 1
+    assert model_monitor.main([path_state, '--tandai-ditangani']) == 0
+    assert model_monitor.muat_state(path_state)['n'] == 2
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from model_scorer import VERSI_ARTEFAK, dari_dict
+from prediction_service import PengumpulBatch, matriks_payload
+
+def _artefak(selang=True):
+    artefak = {'versi': VERSI_ARTEFAK, 'jenis_model': 'uji', 'target': 'Penumpang (000)', 'features': ['a', 'b'],
+               'intercept': 1.0, 'coef': [2.0, 3.0], 'sigma': 1.0}
+    if selang:
+        artefak.update(faktor_kovarians=np.eye(3).tolist(), t_kritis={'0.95': 2.0})
+    return artefak
+
+@pytest.mark.parametrize('payload', [
+    [1, 2],
+    {'data': [1, 2, 3, 4]},
+    {'data': [[1, 2, 3]]},
+    {'data': [[1, 2], [3]]},
+    {'baris': {'a': 1, 'b': 2}},
+])
+def test_payload_salah_bentuk_ditolak(payload):
+    with pytest.raises(ValueError):
+        matriks_payload(dari_dict(_artefak()), payload)
+
+def test_payload_baris_dan_data_setara():
+    model = dari_dict(_artefak())
+    X = matriks_payload(model, {'data': [[1, 2], [3, 4]]})
+    assert np.array_equal(X, matriks_payload(model, {'baris': [{'b': 2, 'a': 1}, {'a': 3, 'b': 4}]}))
+    assert matriks_payload(model, {'baris': []}).shape == (0, 2)
+
+def test_artefak_non_ols_hanya_prediksi_titik():
+    model = dari_dict(_artefak(selang=False))
+    assert model.skor(np.array([[1.0, 1.0]])).tolist() == [6.0]
+    with pytest.raises(ValueError):
+        model.selang(np.array([[1.0, 1.0]]))
+
+    pengumpul = PengumpulBatch(model)
+    try:
+        (yhat,) = pengumpul.prediksi(np.array([[1.0, 1.0]]), 0.95)
+    finally:
+        pengumpul.tutup()
+    assert yhat.tolist() == [6.0]